@@ -0,0 +1,4 @@
+"""Offline benchmarks for the ingest, rewrite, store and render path.
+
+Run from the repository root with `python -m bench`.
+"""
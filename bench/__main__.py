@@ -0,0 +1,721 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+import httpx
+from fastapi import FastAPI
+from groq import Groq
+
+from bench.feed import generate_feed
+from bench.images import IMAGE_BYTES, serve_images
+from bench.llm import Latency, lognormal, serve_llm, server_url, stalling
+from prophet import app as appmod
+from prophet import view
+from prophet.config import AiConfig
+from prophet.container import (
+    get_images,
+    get_repo,
+    get_search,
+    get_snapshots,
+    get_votes,
+)
+from prophet.domain.improvement import Improvement
+from prophet.domain.improvement_repo import IImprovementRepo
+from prophet.domain.original import Original
+from prophet.infra import improvement_codec as codec
+from prophet.infra.feed_fetcher import FeedFetcher
+from prophet.infra.headline_index import HeadlineIndex
+from prophet.infra.image_cache import ImageCache
+from prophet.infra.improvement_async_adapter import AsyncImprovementRepoAdapter
+from prophet.infra.improvement_cached_repo import CachedImprovementRepo
+from prophet.infra.improvement_indexed_repo import IndexedImprovementRepo
+from prophet.infra.improvement_memory_repo import ImprovementMemoryRepo
+from prophet.infra.improvement_sqlite_repo import ImprovementSqliteRepo
+from prophet.infra.llm_fake import FakeLLMClient
+from prophet.infra.llm_groq import GroqClient, RateLimiter
+from prophet.infra.llm_hedging import FALLBACK, HEDGE, PRIMARY, Hedger
+from prophet.infra.search_index import COMPACT_AT, SearchIndex
+from prophet.infra.snapshot_store import SnapshotStore
+from prophet.infra.vote_sqlite_repo import VoteSqliteRepo
+from prophet.metrics import LLM_COMPLETIONS
+from prophet.scheduler import ScheduledFeed
+from prophet.votes import VoteCounter
+
+SUMMARY = (
+    '<img src="https://media.babylonbee.com/articles/6840d6fbee42b6840d6fbee42c.jpg"'
+    ' width="400" style="width: 100%; max-width: 400px;"><p>BOULDER, CO — Federal'
+    " Judge Gordon Gallagher issued an emergency ruling.</p>"
+)
+
+Result = dict[str, Any]
+
+RESULTS = Path(__file__).parent / "results.json"
+
+LLM_MODEL = "llama-3.3-70b-versatile"
+LLM_FALLBACK_MODEL = "llama-3.1-8b-instant"
+LLM_BUDGET = 0.5  # seconds for the benchmarked stage
+LLM_CONCURRENCY = 16
+# 3% of the requests stall, within the 5% above the hedge quantile
+LLM_SCENARIOS: dict[str, dict[str, Latency]] = {
+    "healthy": {
+        LLM_MODEL: stalling(lognormal(0.15), share=0.03, stall=1.5),
+        LLM_FALLBACK_MODEL: lognormal(0.05),
+    },
+    "degraded": {
+        LLM_MODEL: stalling(lognormal(0.6), share=0.03, stall=1.5),
+        LLM_FALLBACK_MODEL: lognormal(0.05),
+    },
+}
+
+
+def measure(
+    fn: Callable[[], object],
+    repeat: int,
+    setup: Callable[[], None] | None = None,
+    **params: Any,
+) -> Result:
+    """Times `fn` `repeat` times, running `setup` untimed before each call."""
+    runs: list[float] = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        _ = fn()
+        runs.append(time.perf_counter() - start)
+    return {
+        "median_s": statistics.median(runs),
+        "min_s": min(runs),
+        "runs": len(runs),
+        "params": params,
+    }
+
+
+def make_improvements(n: int) -> list[Improvement]:
+    newest = datetime(2025, 6, 5, tzinfo=timezone.utc)
+    return [
+        Improvement(
+            original=Original(
+                title=f"Original headline {i}",
+                summary=SUMMARY,
+                link=f"https://babylonbee.com/news/bench-{i}",
+                date=newest - timedelta(minutes=i),
+            ),
+            title=f"Improved headline {i}",
+            summary=f"Improved summary {i}",
+        )
+        for i in range(n)
+    ]
+
+
+def make_repo(
+    kind: str, tmp: Path, improvements: list[Improvement]
+) -> IImprovementRepo:
+    if kind == "memory":
+        repo = ImprovementSqliteRepo(":memory:")
+    elif kind == "ordered":
+        repo = ImprovementMemoryRepo()
+    else:
+        repo = ImprovementSqliteRepo(tmp / f"bench-{time.monotonic_ns()}.sqlite")
+    repo.add_all(improvements)
+    return repo
+
+
+def use_repo(repo: IImprovementRepo) -> CachedImprovementRepo:
+    # the indexes mirror the repo, or repeated runs would skip every entry
+    search = SearchIndex(path=None)
+    search.add_all(repo.get_all())
+    appmod.container.search = search
+    headlines = HeadlineIndex()
+    headlines.add_all(repo.get_all())
+    appmod.container.headlines = headlines
+    cached = CachedImprovementRepo(
+        IndexedImprovementRepo(AsyncImprovementRepoAdapter(repo), search, headlines)
+    )
+    appmod.container.repo = cached
+    return cached
+
+
+def run_repo(
+    kind: str,
+    args: argparse.Namespace,
+    runner: asyncio.Runner,
+    tmp: Path,
+    stored: list[Improvement],
+    image_base: str,
+) -> dict[str, Result]:
+    """Benchmarks the repo-backed stages against one kind of local repo."""
+    results: dict[str, Result] = {}
+    repeat = args.repeat
+    n = args.entries
+    results[f"repo_add_all[{kind}]"] = measure(
+        lambda: make_repo(kind, tmp, stored), repeat, entries=n
+    )
+    repo = make_repo(kind, tmp, stored)
+    results[f"repo_get_all_newest[{kind}]"] = measure(
+        lambda: repo.get_all(appmod.NUM_ARTICLES_TO_KEEP),
+        repeat,
+        stored=n,
+        newest=appmod.NUM_ARTICLES_TO_KEEP,
+    )
+    _ = use_repo(repo)
+    # half of them stored, as the scheduler checks a fetched feed
+    candidates = [imp.original.link for imp in make_improvements(50)] + [
+        f"new-{i}" for i in range(50)
+    ]
+    results[f"existing_links[{kind}]"] = measure(
+        lambda: runner.run(appmod.container.repo.existing_links(candidates)),
+        repeat,
+        stored=n,
+        candidates=len(candidates),
+    )
+
+    def fill() -> None:
+        _ = use_repo(make_repo(kind, tmp, stored))
+
+    results[f"truncate_to[{kind}]"] = measure(
+        lambda: runner.run(appmod.truncate_to(appmod.NUM_ARTICLES_TO_KEEP)),
+        repeat,
+        setup=fill,
+        stored=n,
+        keep=appmod.NUM_ARTICLES_TO_KEEP,
+    )
+
+    update_feeds = [
+        generate_feed(
+            args.new_entries,
+            tmp / f"update-{i}.atom",
+            source=f"s{i}",
+            image_base=image_base,
+        )
+        for i in range(args.feeds)
+    ]
+
+    def fresh(num_feeds: int) -> None:
+        _ = use_repo(make_repo(kind, tmp, []))
+        shutil.rmtree(appmod.container.images.root, ignore_errors=True)
+        appmod.scheduler.feeds = [
+            ScheduledFeed(FeedFetcher(str(path), state_file=None), interval=0)
+            for path in update_feeds[:num_feeds]
+        ]
+
+    appmod.container.llm = FakeLLMClient(latency=args.llm_latency)
+    results[f"fetch_update[{kind}]"] = measure(
+        lambda: runner.run(appmod.fetch_update(debug_print=False)),
+        repeat,
+        setup=lambda: fresh(1),
+        new_entries=args.new_entries,
+        llm_latency_s=args.llm_latency,
+    )
+    results[f"fetch_update_feeds[{kind}]"] = measure(
+        lambda: runner.run(appmod.fetch_update(debug_print=False)),
+        repeat,
+        setup=lambda: fresh(args.feeds),
+        feeds=args.feeds,
+        new_entries_per_feed=args.new_entries,
+        llm_latency_s=args.llm_latency,
+    )
+
+    cached = CachedImprovementRepo(AsyncImprovementRepoAdapter(repo))
+    app = FastAPI()
+    view.define_routes(app)
+    app.dependency_overrides[get_repo] = lambda: cached
+    no_snapshots = SnapshotStore(tmp / "no-snapshots")
+    app.dependency_overrides[get_snapshots] = lambda: no_snapshots
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    )
+
+    results[f"render_improvements_cold[{kind}]"] = measure(
+        lambda: runner.run(client.get("/improvements")),
+        repeat,
+        setup=cached.invalidate,
+        stored=n,
+        page_size=view.PAGE_SIZE,
+    )
+    results[f"render_improvements_warm[{kind}]"] = measure(
+        lambda: runner.run(client.get("/improvements")),
+        repeat,
+        stored=n,
+        page_size=view.PAGE_SIZE,
+    )
+    return results
+
+
+def run_snapshot(
+    args: argparse.Namespace,
+    runner: asyncio.Runner,
+    tmp: Path,
+    stored: list[Improvement],
+) -> dict[str, Result]:
+    """Benchmarks publishing the kept articles and serving them statically."""
+    results: dict[str, Result] = {}
+    kept = stored[: appmod.NUM_ARTICLES_TO_KEEP]
+    snapshots = SnapshotStore(tmp / "snapshots")
+
+    def publish() -> None:
+        version, files = view.render_snapshot(kept)
+        _ = snapshots.publish(version, files)
+
+    results["publish_snapshot"] = measure(
+        publish,
+        args.repeat,
+        setup=lambda: shutil.rmtree(snapshots.root, True),
+        articles=len(kept),
+    )
+
+    app = FastAPI()
+    view.define_routes(app)
+    app.dependency_overrides[get_snapshots] = lambda: snapshots
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    )
+    results["serve_improvements_static"] = measure(
+        lambda: runner.run(
+            client.get("/improvements", headers={"accept-encoding": "identity"})
+        ),
+        args.repeat,
+        page_size=view.PAGE_SIZE,
+    )
+    results["serve_improvements_static_gzip"] = measure(
+        lambda: runner.run(
+            client.get("/improvements", headers={"accept-encoding": "gzip"})
+        ),
+        args.repeat,
+        page_size=view.PAGE_SIZE,
+    )
+    return results
+
+
+def run_image(
+    args: argparse.Namespace, runner: asyncio.Runner, tmp: Path, image_base: str
+) -> dict[str, Result]:
+    """Benchmarks serving an article image through the local cache."""
+    results: dict[str, Result] = {}
+    original = Original(
+        title="t",
+        summary=f'<img src="{image_base}/bench.jpg" />summary',
+        link="image-bench",
+        date=datetime.now(),
+    )
+    repo = CachedImprovementRepo(
+        AsyncImprovementRepoAdapter(ImprovementSqliteRepo(":memory:"))
+    )
+    runner.run(repo.add(Improvement(original=original, title="t", summary="s")))
+    images = ImageCache(tmp / "images")
+
+    app = FastAPI()
+    view.define_routes(app)
+    app.dependency_overrides[get_repo] = lambda: repo
+    app.dependency_overrides[get_images] = lambda: images
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    )
+    url = f"/img/{original.id}"
+    results["serve_image_miss"] = measure(
+        lambda: runner.run(client.get(url)),
+        args.repeat,
+        setup=lambda: shutil.rmtree(images.root, ignore_errors=True),
+        image_bytes=IMAGE_BYTES,
+    )
+    results["serve_image_cached"] = measure(
+        lambda: runner.run(client.get(url)), args.repeat, image_bytes=IMAGE_BYTES
+    )
+    runner.run(images.aclose())
+    return results
+
+
+def run_votes(
+    args: argparse.Namespace, runner: asyncio.Runner, tmp: Path
+) -> dict[str, Result]:
+    """Load-tests voting: a burst of concurrent votes, through the app and
+    straight to the counter, which writes them to a local SQLite file in
+    batches, against writing every vote on its own."""
+    results: dict[str, Result] = {}
+    article = make_improvements(1)[0]
+    article.suggestions = Improvement.candidates(article.title, ["b", "c", "d"])
+    repo = CachedImprovementRepo(
+        AsyncImprovementRepoAdapter(ImprovementSqliteRepo(":memory:"))
+    )
+    runner.run(repo.add(article))
+    store = VoteSqliteRepo(tmp / f"votes-{time.monotonic_ns()}.sqlite")
+    counter = VoteCounter(store)
+
+    app = FastAPI()
+    view.define_routes(app)
+    app.dependency_overrides[get_repo] = lambda: repo
+    app.dependency_overrides[get_votes] = lambda: counter
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    )
+    keys = [(article.id, i % len(article.suggestions)) for i in range(args.votes)]
+
+    async def burst() -> None:
+        counter.start()
+        _ = await asyncio.gather(
+            *(client.post(f"/vote/{id}/{index}") for id, index in keys)
+        )
+        await counter.stop()  # writes the rest
+
+    results["vote_burst"] = measure(
+        lambda: runner.run(burst()), args.repeat, votes=args.votes
+    )
+    results["vote_burst"]["params"]["db_writes"] = counter.flushes / args.repeat
+
+    async def count_only() -> None:
+        counter.start()
+        _ = await asyncio.gather(*(counter.vote(article, index) for _, index in keys))
+        await counter.stop()
+
+    flushes = counter.flushes
+    results["vote_counter"] = measure(
+        lambda: runner.run(count_only()), args.repeat, votes=args.votes
+    )
+    results["vote_counter"]["params"]["db_writes"] = (
+        counter.flushes - flushes
+    ) / args.repeat
+
+    async def write_each() -> None:
+        _ = await asyncio.gather(
+            *(asyncio.to_thread(store.add_votes, {key: 1}) for key in keys)
+        )
+
+    results["vote_write_each"] = measure(
+        lambda: runner.run(write_each()),
+        args.repeat,
+        votes=args.votes,
+        db_writes=args.votes,
+    )
+    for res in results.values():
+        res["params"]["votes_per_s"] = round(args.votes / res["median_s"])
+    return results
+
+
+def run_search(
+    args: argparse.Namespace,
+    runner: asyncio.Runner,
+    tmp: Path,
+    stored: list[Improvement],
+) -> dict[str, Result]:
+    """Builds, saves and loads the search index of all entries and queries
+    it, directly and through `/search`."""
+    results: dict[str, Result] = {}
+    n = args.entries
+    index = SearchIndex(tmp / "search.npz")
+    results["search_index_build"] = measure(
+        lambda: index.add_all(stored), args.repeat, setup=index._clear, entries=n
+    )
+    index.dirty = True
+    results["search_index_save"] = measure(index.save, 1, entries=n)
+    results["search_index_load"] = measure(index.load, args.repeat, entries=n)
+    query = "improved headline 42"
+    results["search_query"] = measure(
+        lambda: index.search(query, view.PAGE_SIZE), args.repeat, entries=n
+    )
+
+    repo = CachedImprovementRepo(
+        AsyncImprovementRepoAdapter(make_repo("ordered", tmp, stored))
+    )
+    app = FastAPI()
+    view.define_routes(app)
+    app.dependency_overrides[get_repo] = lambda: repo
+    app.dependency_overrides[get_search] = lambda: index
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    )
+    results["serve_search"] = measure(
+        lambda: runner.run(client.get("/search", params={"q": query})),
+        args.repeat,
+        entries=n,
+        page_size=view.PAGE_SIZE,
+    )
+
+    # masked documents still cost until compaction drops their postings
+    removed = [imp.id for imp in stored[: int(n * COMPACT_AT)]]
+    index.remove_all(removed)
+    results["search_query_after_removal"] = measure(
+        lambda: index.search(query, view.PAGE_SIZE),
+        args.repeat,
+        entries=n,
+        removed=len(removed),
+    )
+    return results
+
+
+def run_llm(args: argparse.Namespace) -> dict[str, Result]:
+    """Tail latency of one completion stage against a local fake Groq API
+    with injected latency distributions: plain requests, hedged ones, and
+    hedged ones falling back to the faster model within `LLM_BUDGET`."""
+    results: dict[str, Result] = {}
+    n = args.llm_requests
+    stage = "suggestions"
+    routes = [(PRIMARY, LLM_MODEL), (HEDGE, LLM_MODEL), (FALLBACK, LLM_FALLBACK_MODEL)]
+    hedgers: dict[str, Callable[[], Hedger]] = {
+        "plain": lambda: Hedger(LLM_MODEL, hedge_quantile=None),
+        "hedged": lambda: Hedger(LLM_MODEL),
+        "budget": lambda: Hedger(
+            LLM_MODEL, LLM_FALLBACK_MODEL, budgets={stage: LLM_BUDGET}
+        ),
+    }
+    for scenario, latencies in LLM_SCENARIOS.items():
+        with serve_llm(latencies) as server:
+            for policy, make_hedger in hedgers.items():
+                llm = GroqClient(
+                    AiConfig(API_KEY="offline-benchmark", CACHE_PATH=None),
+                    client=Groq(
+                        api_key="offline-benchmark",
+                        base_url=server_url(server),
+                        max_retries=0,
+                    ),
+                    limiter=RateLimiter(1_000_000, 1_000_000_000),
+                    hedger=make_hedger(),
+                )
+
+                def complete(
+                    i: int, llm: GroqClient = llm, policy: str = policy
+                ) -> float:
+                    start = time.perf_counter()
+                    _ = llm.get_alternative_title_suggestions(f"{policy} {i}")
+                    return time.perf_counter() - start
+
+                def answered() -> list[float]:
+                    return [
+                        LLM_COMPLETIONS.value(stage=stage, model=model, path=path)
+                        for path, model in routes
+                    ]
+
+                with ThreadPoolExecutor(LLM_CONCURRENCY) as pool:
+                    # fills the latency window the hedge delay is taken from
+                    _ = list(pool.map(complete, range(-50, 0)))
+                    sent, before = sum(server.requests.values()), answered()
+                    runs = sorted(pool.map(complete, range(n)))
+                sent = sum(server.requests.values()) - sent
+                p95, p99 = runs[int(0.95 * n)], runs[int(0.99 * n)]
+                params: dict[str, Any] = {
+                    "requests": n,
+                    "p95_s": p95,
+                    "p99_s": p99,
+                    "extra_requests": round(sent / n - 1, 3),
+                    "answered": {
+                        path: after - old
+                        for (path, _), old, after in zip(
+                            routes, before, answered(), strict=True
+                        )
+                    },
+                }
+                name = f"{scenario},{policy}"
+                results[f"llm_{stage}[{name}]"] = {
+                    "median_s": statistics.median(runs),
+                    "min_s": runs[0],
+                    "runs": n,
+                    "params": params,
+                }
+                results[f"llm_{stage}_p99[{name}]"] = {
+                    "median_s": p99,
+                    "min_s": p99,
+                    "runs": n,
+                    "params": params,
+                }
+    return results
+
+
+def run_python(code: str, env: dict[str, str] | None = None) -> None:
+    _ = subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+
+def run(args: argparse.Namespace, tmp: Path) -> dict[str, Result]:
+    results: dict[str, Result] = {}
+    runner = asyncio.Runner()
+    repeat = args.repeat
+    n = args.entries
+    feed_path = generate_feed(n, tmp / "feed.atom")
+    stored = make_improvements(n)
+    # refreshes publish snapshots, cache images and promote voted headlines,
+    # keep them out of the real data directory
+    appmod.container.snapshots = SnapshotStore(tmp / "app-snapshots")
+    appmod.container.images = ImageCache(tmp / "app-images")
+    appmod.container.votes = VoteCounter(VoteSqliteRepo(tmp / "app-votes.sqlite"))
+    appmod.container.search = SearchIndex(tmp / "app-search.npz")
+
+    fetcher = FeedFetcher(str(feed_path), state_file=None)
+    results["feed_parse"] = measure(
+        lambda: runner.run(fetcher.fetch()), repeat, entries=n
+    )
+
+    # fresh interpreters, so these include Python's own startup
+    bare_env = {
+        k: v for k, v in os.environ.items() if not k.startswith(("GROQ_", "SUPABASE_"))
+    }
+    results["import_app"] = measure(
+        lambda: run_python("import prophet.app", env=bare_env),
+        repeat,
+        credentials=False,
+    )
+    results["startup"] = measure(
+        lambda: run_python(
+            "import asyncio, prophet.app; asyncio.run(prophet.app.container.warm_up())",
+            env=os.environ.copy(),
+        ),
+        repeat,
+    )
+
+    results["original_post_init"] = measure(
+        lambda: [
+            Original(title="t", summary=SUMMARY, link=f"l{i}", date=datetime.now())
+            for i in range(n)
+        ],
+        repeat,
+        entries=n,
+    )
+    records = [codec.to_record(imp) for imp in stored]
+    results["codec_decode"] = measure(
+        lambda: [codec.from_record(r) for r in records], repeat, entries=n
+    )
+    results["update_response"] = measure(lambda: codec.dumps(stored), repeat, entries=n)
+    headlines = HeadlineIndex()
+    results["headline_index_build"] = measure(
+        lambda: headlines.add_all(stored),
+        repeat,
+        setup=lambda: headlines.remove_all(imp.id for imp in stored),
+        entries=n,
+    )
+    republished = [
+        Original(
+            title=f"BREAKING: {imp.original.title}!",
+            summary="",
+            link=f"r{i}",
+            date=datetime.now(),
+        )
+        for i, imp in enumerate(stored[:50])
+    ]
+    results["headline_near_duplicate"] = measure(
+        lambda: [headlines.near_duplicate(o) for o in republished],
+        repeat,
+        entries=n,
+        lookups=len(republished),
+    )
+
+    with serve_images() as image_server:
+        image_base = image_server.url
+        for kind in args.repos:
+            results.update(run_repo(kind, args, runner, tmp, stored, image_base))
+        results.update(run_image(args, runner, tmp, image_base))
+
+    results.update(run_snapshot(args, runner, tmp, stored))
+    results.update(run_votes(args, runner, tmp))
+    results.update(run_search(args, runner, tmp, stored))
+    if args.llm_requests:
+        results.update(run_llm(args))
+
+    template = view.templates.get_template("list_improvements.html")
+    results["render_template_all"] = measure(
+        lambda: template.render(articles=stored, next_url=None),
+        repeat,
+        articles=n,
+    )
+    runner.close()
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(
+    results: dict[str, Result], baseline_path: Path, baseline: dict[str, Any]
+) -> None:
+    print(f"\nTime relative to {baseline_path} ({baseline['meta']['revision']}):")
+    for name, res in results.items():
+        old = baseline["results"].get(name)
+        if not old:
+            continue
+        ratio = res["median_s"] / old["median_s"] if old["median_s"] else float("inf")
+        print(f"  {name:<45} {ratio:6.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bench", description=__doc__)
+    _ = parser.add_argument("--entries", type=int, default=10_000)
+    _ = parser.add_argument("--new-entries", type=int, default=20)
+    _ = parser.add_argument("--feeds", type=int, default=3)
+    _ = parser.add_argument("--votes", type=int, default=2000)
+    _ = parser.add_argument("--llm-latency", type=float, default=0.05)
+    _ = parser.add_argument(
+        "--llm-requests",
+        type=int,
+        default=400,
+        help="completions per scenario against the fake Groq API, 0 to skip",
+    )
+    _ = parser.add_argument("--repeat", type=int, default=5)
+    _ = parser.add_argument(
+        "--repos",
+        nargs="+",
+        default=["memory", "ordered", "sqlite"],
+        choices=["memory", "ordered", "sqlite"],
+    )
+    _ = parser.add_argument("--out", type=Path, default=RESULTS)
+    _ = parser.add_argument(
+        "--compare", type=Path, help="earlier results to compare against"
+    )
+    args = parser.parse_args()
+    # read first, as it may be the file the results are saved to
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+
+    # the container builds its clients on first use, as in `startup`, with
+    # credentials that never connect during the run
+    os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")
+    os.environ.setdefault("GROQ_CACHE_PATH", "")
+    os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+    os.environ.setdefault("SUPABASE_KEY", "offline-benchmark")
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        results = run(args, Path(tmp))
+    for name, res in results.items():
+        print(
+            f"{name:<45} {res['median_s'] * 1000:10.2f}ms (min {res['min_s'] * 1000:.2f}ms)"
+        )
+
+    _ = args.out.write_text(
+        json.dumps(
+            {
+                "meta": {
+                    "revision": git_revision(),
+                    "python": platform.python_version(),
+                    "created": datetime.now(timezone.utc).isoformat(),
+                    "args": {
+                        k: v
+                        for k, v in vars(args).items()
+                        if k not in ("out", "compare")
+                    },
+                },
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    print(f"\nSaved to {args.out}")
+    if args.compare:
+        compare(results, args.compare, baseline)
+
+
+if __name__ == "__main__":
+    main()
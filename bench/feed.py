@@ -0,0 +1,47 @@
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+
+TEMPLATE_FEED = Path("test/resources/feed.atom")
+
+_ITEM = re.compile(r"<item>.*?</item>", re.DOTALL)
+
+
+def generate_feed(
+    num_entries: int,
+    path: str | Path,
+    template: str | Path = TEMPLATE_FEED,
+    source: str = "n",
+    image_base: str | None = None,
+) -> Path:
+    """Writes a newest-first feed of `num_entries` items cloned from the
+    template's items, each with a unique title, link and date. Feeds with
+    different `source` names share no links. With an `image_base`, every
+    item's image is served from there instead of the real CDN."""
+    text = Path(template).read_text()
+    items = _ITEM.findall(text)
+    if not items:
+        raise ValueError(f"No items in template feed {template}")
+    head = text[: text.index(items[0])]
+    tail = text[text.rindex(items[-1]) + len(items[-1]) :]
+
+    newest = datetime.strptime(
+        "Thu, 05 Jun 2025 10:00:00 -0400", "%a, %d %b %Y %H:%M:%S %z"
+    )
+    entries: list[str] = []
+    for i in range(num_entries):
+        item = items[i % len(items)]
+        date = (newest - timedelta(minutes=i)).strftime("%a, %d %b %Y %H:%M:%S %z")
+        item = re.sub(r"</title>", f" #{i}</title>", item, count=1)
+        item = re.sub(r"</link>", f"?{source}={i}</link>", item, count=1)
+        item = re.sub(r"</guid>", f"?{source}={i}</guid>", item, count=1)
+        item = re.sub(r"<pubDate>.*?</pubDate>", f"<pubDate>{date}</pubDate>", item)
+        if image_base:
+            item = re.sub(
+                r'img src="[^"]*"', f'img src="{image_base}/{source}-{i}.jpg"', item
+            )
+        entries.append(item)
+
+    path = Path(path)
+    _ = path.write_text(head + "\n".join(entries) + tail)
+    return path
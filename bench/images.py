@@ -0,0 +1,53 @@
+import http.server
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+IMAGE_BYTES = 100_000  # about a resized article thumbnail
+
+
+class ImageServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    requests: list[str]  # path of every request answered
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _ImageHandler)
+        self.requests = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _ImageHandler(http.server.BaseHTTPRequestHandler):
+    server: ImageServer
+    body: bytes = b"\xff\xd8\xff" + b"\0" * (IMAGE_BYTES - 3)  # looks like a JPEG
+
+    def do_GET(self) -> None:
+        self.server.requests.append(self.path)
+        if self.path.startswith("/missing"):
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        _ = self.wfile.write(self.body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@contextmanager
+def serve_images() -> Iterator[ImageServer]:
+    """Runs a local stand-in for the image CDN, answering every path with
+    the same JPEG, except for paths under /missing, which are not found."""
+    server = ImageServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
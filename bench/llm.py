@@ -0,0 +1,96 @@
+import http.server
+import json
+import random
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+type Latency = Callable[[random.Random], float]  # seconds per request
+
+
+def lognormal(median: float, sigma: float = 0.3) -> Latency:
+    return lambda rng: rng.lognormvariate(0, sigma) * median
+
+
+def stalling(latency: Latency, share: float, stall: float) -> Latency:
+    """`latency`, plus `stall` seconds for `share` of the requests, as when a
+    request lands on an overloaded replica."""
+    return lambda rng: latency(rng) + (stall if rng.random() < share else 0.0)
+
+
+class FakeLLMServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    latencies: dict[str, Latency]  # by model
+    requests: Counter[str]  # answered per model
+
+    def __init__(self, latencies: dict[str, Latency], seed: int = 0) -> None:
+        super().__init__(("127.0.0.1", 0), _CompletionHandler)
+        self.latencies = latencies
+        self.requests = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self, model: str) -> float:
+        with self._lock:
+            self.requests[model] += 1
+            return self.latencies[model](self._rng)
+
+
+class _CompletionHandler(http.server.BaseHTTPRequestHandler):
+    server: FakeLLMServer
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        model = request["model"]
+        time.sleep(self.server.delay(model))
+        body = json.dumps(
+            {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": f"{model} says hi"},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 100,
+                    "completion_tokens": 20,
+                    "total_tokens": 120,
+                },
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        _ = self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@contextmanager
+def serve_llm(latencies: dict[str, Latency]) -> Iterator[FakeLLMServer]:
+    """Runs a local stand-in for Groq's chat completions API which answers
+    each model after a delay drawn from its latency distribution. Point the
+    Groq client's `base_url` at `server_url(server)`."""
+    server = FakeLLMServer(latencies)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def server_url(server: FakeLLMServer) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}"
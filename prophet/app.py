@@ -1,75 +1,159 @@
-import json
+import asyncio
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Annotated
 
-import feedparser
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi_utils.tasks import repeat_every
 
-from prophet import view
-from prophet.config import AppConfig
+from prophet import metrics, view
+from prophet.config import AppConfig, FeedConfig
+from prophet.container import container, get_llm
 from prophet.domain.improvement import Improvement
-from prophet.domain.improvement_repo import IImprovementRepo
+from prophet.domain.improvement_repo import ImprovementNotFoundError
+from prophet.domain.llm import LLMClient
 from prophet.domain.original import Original
-from prophet.infra.improvement_pickle_repo import ImprovementPickleRepo
-from prophet.infra.improvement_supa_repo import ImprovementSupaRepo
-from prophet.infra.llm_groq import GroqClient
+from prophet.infra import improvement_codec as codec
+from prophet.infra.feed_fetcher import FeedFetcher
+from prophet.infra.file_lease import FileLease
+from prophet.rewriter import Rewriter
+from prophet.scheduler import FeedScheduler, ScheduledFeed
 
-BEE_FEED = "https://babylonbee.com/feed"
-BEE_FEED_TEST = "test/resources/feed_short.atom"  # NOTE: Switch out when done testing
+BEE_FEED_TEST = "test/resources/feed_short.atom"  # e.g. BEES_FEEDS=<this> for testing
 
-REFRESH_PERIOD = 3600  # between fetching articles, in seconds
 NUM_ARTICLES_TO_KEEP = 50
+REWRITE_CONCURRENCY = 5  # articles (or batches) rewritten in parallel
+REWRITE_BATCH_SIZE = 5  # articles per completion, 1 for three calls per article
 
-llm: GroqClient = GroqClient()
-repo: IImprovementRepo = ImprovementSupaRepo()
+Llm = Annotated[LLMClient, Depends(get_llm)]
 
 
-def grab_latest_originals() -> list[Original]:
-    feed: feedparser.FeedParserDict = feedparser.parse(BEE_FEED)  # noqa: F841
-    results: list[Original] = []
-    for entry in feed.entries:
-        o = Original(
-            title=entry.title,
-            summary=entry.summary,
-            link=entry.link,
-            date=datetime.strptime(entry.published, "%a, %d %b %Y %H:%M:%S %z"),
+async def _existing_links(links: list[str]) -> set[str]:
+    return await container.repo.existing_links(links)
+
+
+async def _reuse_near_duplicates(
+    originals: list[Original],
+) -> tuple[list[Improvement], list[Original]]:
+    """Improvements for the originals which only repeat a stored story under
+    another link, reusing that story's rewrite, and the originals left to
+    rewrite."""
+    matches = await asyncio.to_thread(
+        lambda: [container.headlines.near_duplicate(o) for o in originals]
+    )
+    reused: list[Improvement] = []
+    rest: list[Original] = []
+    for original, match in zip(originals, matches, strict=True):
+        stored = None
+        if match is not None:
+            try:
+                stored = await container.repo.get(match)
+            except ImprovementNotFoundError:
+                pass  # deleted since, so the original is rewritten
+        if stored is None:
+            rest.append(original)
+            continue
+        print(f"Reusing the rewrite of near-duplicate {stored.original.link}")
+        reused.append(
+            Improvement(
+                original=original,
+                title=stored.title,
+                summary=stored.summary,
+                suggestions=list(stored.suggestions),
+            )
         )
-        results.append(o)
-    return results
+    return reused, rest
+
+
+async def store_improved(originals: list[Original]) -> list[Improvement]:
+    """Rewrites the originals and stores the successful rewrites. Originals
+    repeating a stored story take over its rewrite instead."""
+    improved, originals = await _reuse_near_duplicates(originals)
+    if originals:
+        improved += await improve_originals(originals)
+    if improved:
+        await container.repo.add_all(improved)
+    return improved
+
+
+async def finish_cycle() -> None:
+    _ = await truncate_to(NUM_ARTICLES_TO_KEEP)
+    _ = await asyncio.gather(
+        publish_snapshot(),
+        prefetch_images(),
+        asyncio.to_thread(container.search.save),
+    )
 
 
-def keep_only_new_originals(
-    additional: list[Original], existing: list[Original] | None = None
-):
-    if not existing:
-        existing = [e.original for e in repo.get_all()]
+async def prefetch_images() -> None:
+    """Caches the images of all listed articles, so no visitor waits for
+    the upstream CDN."""
+    articles = await container.repo.get_all()
+    images = {a.original.id: a.original.image_link or "" for a in articles}
+    fetched = await container.images.prefetch(images)
+    if fetched:
+        print(f"Cached {fetched} new images.")
+
+
+async def publish_snapshot() -> None:
+    """Renders the listings into a new static snapshot, if they changed."""
+    articles = await container.repo.get_all()
+    container.votes.retain([a.id for a in articles])
+    articles = await container.votes.promote(articles)
+    current = container.snapshots.current()
+    if current and current.version == view.snapshot_version(articles):
+        return
+    version, files = view.render_snapshot(articles)
+    _ = await asyncio.to_thread(container.snapshots.publish, version, files)
+    print(f"Published snapshot {version} of {len(articles)} articles.")
+
+
+def make_scheduler(feeds: list[FeedConfig]) -> FeedScheduler:
+    return FeedScheduler(
+        [ScheduledFeed(FeedFetcher(f.URL), f.INTERVAL) for f in feeds],
+        process=store_improved,
+        known_links=_existing_links,
+        after_cycle=finish_cycle,
+        # one polling worker per host, however many uvicorn starts
+        lease=FileLease(),
+    )
 
-    existing_hashes = set([e.id for e in existing])
 
-    remaining: list[Original] = []
-    for new in additional:
-        if new.id not in existing_hashes:
-            remaining.append(new)
+scheduler: FeedScheduler = make_scheduler(FeedConfig.list_from_env())
 
-    return remaining
 
+async def improve_originals(originals: list[Original]) -> list[Improvement]:
+    rewriter = Rewriter(
+        container.llm,
+        concurrency=REWRITE_CONCURRENCY,
+        batch_size=REWRITE_BATCH_SIZE,
+        previous_titles=container.headlines.previous_titles,
+    )
+    return await rewriter.improve_all(originals)
 
-def improve_originals(originals: list[Original]) -> list[Improvement]:
-    improvements: list[Improvement] = []
-    for orig in originals:
-        new_title = llm.rewrite_title(orig.title)
-        new_summary = llm.rewrite_summary(orig, new_title)
 
-        improvements.append(
-            Improvement(original=orig, title=new_title, summary=new_summary)
-        )
-    return improvements
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    start = time.perf_counter()
+    await container.warm_up()
+    container.votes.on_promote = publish_snapshot
+    container.votes.start()
+    scheduler.start()
+    print(f"Started in {(time.perf_counter() - start) * 1000:.0f}ms")
+    try:
+        yield
+    finally:
+        await scheduler.stop()
+        await container.votes.stop()
+        await container.aclose()
 
 
 def init() -> FastAPI:
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
     app.mount("/static", StaticFiles(directory="static"), name="static")
 
     origins = [
@@ -84,6 +168,7 @@ def init() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(metrics.MetricsMiddleware)
     view.define_routes(app)
     return app
 
@@ -91,46 +176,84 @@ def init() -> FastAPI:
 app = init()
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(
+        metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.get("/improve-title")
-def improve_headline(content: str):
+def improve_headline(content: str, llm: Llm):
     return llm.rewrite_title(content)
 
 
 @app.get("/improve-summary")
-def improve_summary(original_title: str, new_title: str, original_summary: str):
+def improve_summary(
+    original_title: str, new_title: str, original_summary: str, llm: Llm
+):
     o = Original(
         title=original_title, summary=original_summary, link="", date=datetime.now()
     )
     return llm.rewrite_summary(o, new_title)
 
 
-# TODO: Switch to lifecycle events to avoid deprecated method
-@app.on_event("startup")
-@repeat_every(seconds=REFRESH_PERIOD)
-async def refresh_articles():
-    _ = await fetch_update()
-    truncate_to(NUM_ARTICLES_TO_KEEP)
+def _sse_message(event: str, text: str) -> str:
+    data = "".join(f"data: {line}\n" for line in text.split("\n"))
+    return f"event: {event}\n{data}\n"
+
+
+def _sse(stages: Iterator[tuple[str, str]]) -> Iterator[str]:
+    """Server-sent events carrying the text so far of each stage, so htmx can
+    swap in every message as is. Ends with a "done" event holding the final
+    stage's cleaned-up text."""
+    texts: dict[str, str] = {}
+    last = ""
+    for stage, piece in stages:
+        texts[stage] = texts.get(stage, "") + piece
+        last = stage
+        yield _sse_message(stage, texts[stage])
+    yield _sse_message("done", texts.get(last, "").strip(" \"'"))
+
+
+@app.get("/improve-title/stream")
+def improve_headline_stream(content: str, llm: Llm):
+    return StreamingResponse(
+        _sse(llm.stream_title(content)), media_type="text/event-stream"
+    )
+
+
+@app.get("/improve-summary/stream")
+def improve_summary_stream(
+    original_title: str, new_title: str, original_summary: str, llm: Llm
+):
+    o = Original(
+        title=original_title, summary=original_summary, link="", date=datetime.now()
+    )
+    return StreamingResponse(
+        _sse(llm.stream_summary(o, new_title)), media_type="text/event-stream"
+    )
 
 
-def truncate_to(max_num: int = 50):
-    all = repo.get_all()
-    if len(all) > max_num:
-        to_delete = all[max_num:]
-        to_delete_ids = [a.id for a in to_delete]
-        try:
-            _ = repo.remove_all(to_delete_ids)
-        except ValueError:
-            print(f"Error deleting articles with IDs: {id}")
+async def truncate_to(max_num: int = 50) -> int:
+    try:
+        deleted = await container.repo.retain_newest(max_num)
+    except ValueError as e:
+        print(f"Error truncating articles to {max_num}: {e}")
+        return 0
+    if deleted:
+        print(f"Truncated articles. Deleted {deleted} old ones.")
+    return deleted
 
 
 @app.get("/update")
 async def fetch_update(debug_print: bool = True):
-    adding = keep_only_new_originals(grab_latest_originals())
-    improved = improve_originals(adding)
-    repo.add_all(improved)
+    """Refreshes all feeds right away, outside their schedule. Responds with
+    the new improvements in the codec's versioned JSON."""
+    improved = await scheduler.run_once()
     if debug_print:
         print(f"Updated articles. Added {len(improved)} new ones.")
-    return json.dumps(improved)
+    return Response(codec.dumps(improved), media_type="application/json")
 
 
 def start() -> None:
@@ -145,12 +268,10 @@ if __name__ == "__main__":
     # start()
 
     ## ADD MANUALLY
-    # adding = keep_only_new_originals(grab_latest_originals())
-    # improved = improve_originals(adding)
-    # save_new_improvements(improved)
+    # improved = asyncio.run(fetch_update())
 
     ## SHOW ALL
-    improved = repo.get_all()
+    improved = asyncio.run(container.repo.get_all())
     for imp in improved:
         imp.original.__post_init__()
         print(f"Old Title: {imp.original.title}")
@@ -164,4 +285,4 @@ if __name__ == "__main__":
     # repo.add_all(improved)
 
     ## DELETE TOO_MANY
-    # truncate_to(48)
+    # asyncio.run(truncate_to(48))
@@ -1,7 +1,7 @@
 import os
 
 # Load environment variables from .env
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from dotenv import load_dotenv
 
@@ -16,15 +16,39 @@ class AppConfig:
     @classmethod
     def from_env(cls) -> "AppConfig":
         PORT = os.getenv("BEES_PORT", os.getenv("PORT", "8000"))
-        return cls(
-            PORT=int(PORT),
-            DEVMODE=bool(os.getenv("BEES_DEVMODE", False))
-        )
+        return cls(PORT=int(PORT), DEVMODE=bool(os.getenv("BEES_DEVMODE", "")))
+
+
+def _parse_budgets(value: str) -> dict[str, float]:
+    """Parses comma-separated `stage=seconds` entries, e.g. `title=5,summary=8`."""
+    budgets: dict[str, float] = {}
+    for entry in value.split(","):
+        match [part.strip() for part in entry.split("=")]:
+            case [""]:
+                continue
+            case [stage, seconds] if stage:
+                budgets[stage] = float(seconds)
+            case _:
+                raise ValueError(f"Malformed GROQ_STAGE_BUDGETS entry: {entry!r}")
+    return budgets
+
+
+DEFAULT_STAGE_BUDGETS = "batch=30,suggestions=8,title=5,summary=8"
 
 
 @dataclass
 class AiConfig:
     API_KEY: str
+    REQUESTS_PER_MINUTE: int = 30
+    TOKENS_PER_MINUTE: int = 12000
+    CACHE_PATH: str | None = "/tmp/pollenprophet/completions.sqlite"
+    MODEL: str = "llama-3.3-70b-versatile"
+    # answers stages whose latency budget is at risk, None to only hedge
+    FALLBACK_MODEL: str | None = "llama-3.1-8b-instant"
+    # seconds per completion stage, see `Hedger`
+    STAGE_BUDGETS: dict[str, float] = field(
+        default_factory=lambda: _parse_budgets(DEFAULT_STAGE_BUDGETS)
+    )
 
     @classmethod
     def from_env(cls) -> "AiConfig":
@@ -33,7 +57,23 @@ class AiConfig:
         if not API_KEY:
             raise ValueError(f"{API_KEY} cannot be empty")
 
-        return cls(**{"API_KEY": API_KEY})
+        return cls(
+            API_KEY=API_KEY,
+            REQUESTS_PER_MINUTE=int(os.getenv("GROQ_RPM", "30")),
+            TOKENS_PER_MINUTE=int(os.getenv("GROQ_TPM", "12000")),
+            # empty value keeps the completion cache in memory only
+            CACHE_PATH=os.getenv(
+                "GROQ_CACHE_PATH", "/tmp/pollenprophet/completions.sqlite"
+            )
+            or None,
+            MODEL=os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile"),
+            # empty value disables the fallback
+            FALLBACK_MODEL=os.getenv("GROQ_FALLBACK_MODEL", "llama-3.1-8b-instant")
+            or None,
+            STAGE_BUDGETS=_parse_budgets(
+                os.getenv("GROQ_STAGE_BUDGETS", DEFAULT_STAGE_BUDGETS)
+            ),
+        )
 
 
 @dataclass
@@ -55,3 +95,30 @@ class SupaConfig:
                 raise ValueError(f"SUPABASE_{name} cannot be empty")
 
         return cls(**values)
+
+
+@dataclass
+class FeedConfig:
+    URL: str
+    INTERVAL: float = 3600  # between fetches, in seconds
+
+    @classmethod
+    def list_from_env(cls) -> list["FeedConfig"]:
+        """Reads `BEES_FEEDS`, comma-separated entries of a url optionally
+        followed by a space and its interval, e.g. `https://a/feed 1800`."""
+        FEEDS = os.getenv("BEES_FEEDS", "https://babylonbee.com/feed")
+
+        feeds: list[FeedConfig] = []
+        for entry in FEEDS.split(","):
+            match entry.split():
+                case [url]:
+                    feeds.append(cls(URL=url))
+                case [url, interval]:
+                    feeds.append(cls(URL=url, INTERVAL=float(interval)))
+                case []:
+                    continue
+                case _:
+                    raise ValueError(f"Malformed BEES_FEEDS entry: {entry!r}")
+        if not feeds:
+            raise ValueError("BEES_FEEDS cannot be empty")
+        return feeds
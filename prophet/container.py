@@ -0,0 +1,159 @@
+import asyncio
+from functools import cached_property
+from typing import TYPE_CHECKING
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.improvement_repo import IAsyncImprovementRepo
+from prophet.domain.llm import LLMClient
+from prophet.domain.votes import IVoteRepo
+from prophet.infra.image_cache import ImageCache
+from prophet.infra.improvement_cached_repo import CachedImprovementRepo
+from prophet.infra.improvement_indexed_repo import IndexedImprovementRepo
+from prophet.infra.improvement_instrumented_repo import InstrumentedImprovementRepo
+from prophet.infra.improvement_tiered_repo import TieredImprovementRepo
+from prophet.infra.snapshot_store import SnapshotStore
+from prophet.infra.vote_sqlite_repo import VoteSqliteRepo
+from prophet.votes import VoteCounter
+
+if TYPE_CHECKING:
+    from prophet.infra.headline_index import HeadlineIndex
+    from prophet.infra.search_index import SearchIndex
+
+REPO_CACHE_TTL = 3600  # seconds, bounds staleness when other workers write
+
+
+class Container:
+    """The process-wide services, each built on first use.
+
+    Importing the app needs neither credentials nor a network round-trip, and
+    every route, the scheduler and `/update` share one repo and LLM client.
+    The SDKs are only imported once their service is built. Assign to an
+    attribute to swap a service out, e.g. for benchmarks.
+    """
+
+    @cached_property
+    def llm(self) -> LLMClient:
+        from prophet.infra.llm_groq import GroqClient
+
+        return GroqClient()
+
+    @cached_property
+    def store(self) -> IAsyncImprovementRepo:
+        """The backing store, without caching."""
+        from prophet.infra.improvement_supa_async_repo import AsyncImprovementSupaRepo
+
+        return InstrumentedImprovementRepo(AsyncImprovementSupaRepo())
+
+    @cached_property
+    def tier(self) -> TieredImprovementRepo:
+        """All improvements in process memory, written through to the store."""
+        return TieredImprovementRepo(self.store, ttl=REPO_CACHE_TTL)
+
+    @cached_property
+    def repo(self) -> CachedImprovementRepo:
+        return CachedImprovementRepo(
+            IndexedImprovementRepo(self.tier, self.search, self.headlines),
+            ttl=REPO_CACHE_TTL,
+        )
+
+    @cached_property
+    def snapshots(self) -> SnapshotStore:
+        return SnapshotStore()
+
+    @cached_property
+    def images(self) -> ImageCache:
+        return ImageCache()
+
+    @cached_property
+    def vote_store(self) -> IVoteRepo:
+        return VoteSqliteRepo()
+
+    @cached_property
+    def votes(self) -> VoteCounter:
+        """Buffers votes in memory, see `VoteCounter`; `on_promote` is set by
+        the app."""
+        return VoteCounter(self.vote_store)
+
+    @cached_property
+    def headlines(self) -> "HeadlineIndex":
+        """Title similarity over the stored originals, filled by `warm_up`
+        and kept in step with the repo."""
+        from prophet.infra.headline_index import HeadlineIndex
+
+        return HeadlineIndex()
+
+    @cached_property
+    def search(self) -> "SearchIndex":
+        """Full-text search over the improvements, kept in step with the repo
+        and saved to disk; `warm_up` loads it and syncs it with the store."""
+        from prophet.infra.search_index import SearchIndex
+
+        return SearchIndex()
+
+    async def warm_up(self) -> None:
+        """Builds all services and loads the memory tier, the headline index
+        and the search index now rather than on the first request. Without a
+        loaded tier, reads go to the store."""
+        _ = self.llm, self.repo, self.headlines, self.search
+        try:
+            if "tier" in self.__dict__:
+                await self.tier.warm()
+            stored = await self.repo.get_all()
+        except Exception as e:  # noqa: BLE001
+            print(f"Could not load improvements, reading from the store: {e}")
+        else:
+            await asyncio.to_thread(self.headlines.add_all, stored)
+            await asyncio.to_thread(self._load_search, stored)
+
+    def _load_search(self, stored: list[Improvement]) -> None:
+        """Loads the saved search index, which misses what other workers
+        wrote since it was saved, and catches it up with the store."""
+        loaded = self.search.load()
+        self.search.sync(stored)
+        print(
+            f"{'Loaded' if loaded else 'Built'} the search index of "
+            + f"{len(self.search)} improvements."
+        )
+
+    async def aclose(self) -> None:
+        search = self.__dict__.pop("search", None)
+        if search is not None:
+            _ = await asyncio.to_thread(search.save)
+        images = self.__dict__.pop("images", None)
+        if images is not None:
+            await images.aclose()
+        store = self.__dict__.pop("store", None)
+        for name in ("tier", "repo"):
+            _ = self.__dict__.pop(name, None)
+        while isinstance(store, InstrumentedImprovementRepo):
+            store = store.repo
+        aclose = getattr(store, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+container = Container()
+
+
+async def get_repo() -> CachedImprovementRepo:
+    return container.repo
+
+
+async def get_llm() -> LLMClient:
+    return container.llm
+
+
+async def get_snapshots() -> SnapshotStore:
+    return container.snapshots
+
+
+async def get_images() -> ImageCache:
+    return container.images
+
+
+async def get_votes() -> VoteCounter:
+    return container.votes
+
+
+async def get_search() -> "SearchIndex":
+    return container.search
@@ -1,12 +1,48 @@
+import re
 from dataclasses import dataclass, field
 from uuid import uuid4
 
 from prophet.domain.original import Original
 
+MAX_SUGGESTIONS = 8
 
-@dataclass
+
+@dataclass(slots=True)
 class Improvement:  # GoodJoke: Queen
     original: Original
     title: str
     summary: str
     id: str = field(default_factory=lambda: str(uuid4()))
+    # headline candidates to vote on, the first is the chosen `title`
+    suggestions: list[str] = field(default_factory=list)
+
+    @classmethod
+    def restore(
+        cls,
+        original: Original,
+        title: str,
+        summary: str,
+        id: str,
+        suggestions: list[str],
+    ) -> "Improvement":
+        """A stored improvement, built without running `__init__`."""
+        improvement = object.__new__(cls)
+        improvement.original = original
+        improvement.title = title
+        improvement.summary = summary
+        improvement.id = id
+        improvement.suggestions = suggestions
+        return improvement
+
+    @staticmethod
+    def candidates(title: str, suggestions: str | list[str]) -> list[str]:
+        """The chosen title followed by the other distinct suggestions, from
+        a list or the LLM's one-per-line answer with list markers or quotes."""
+        if isinstance(suggestions, str):
+            suggestions = suggestions.splitlines()
+        result = [title]
+        for line in suggestions:
+            line = re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line).strip(" \"'*")
+            if line and line not in result:
+                result.append(line)
+        return result[:MAX_SUGGESTIONS]
@@ -0,0 +1,25 @@
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Protocol
+
+from prophet.domain.improvement import Improvement
+
+
+class IImprovementIndex(Protocol):
+    """An in-memory index over the stored improvements, kept in step with
+    the repo's writes, including its retention."""
+
+    def add_all(self, improvements: Iterable[Improvement]) -> None:
+        """Indexes the improvements, replacing those indexed before"""
+        raise NotImplementedError
+
+    def remove_all(self, ids: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    def retain_newest(self, n: int) -> None:
+        """Removes all but the n newest improvements, keeping all of the
+        n-th newest original date, as the repos do"""
+        raise NotImplementedError
+
+    def delete_older_than(self, ts: datetime) -> None:
+        raise NotImplementedError
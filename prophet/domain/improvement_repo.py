@@ -1,12 +1,45 @@
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from typing import Protocol
 
 from prophet.domain.improvement import Improvement
 
+# ids are uuid4s, or sha256 hex digests like `Original.id`
+_ID = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{64}"
+)
+
 
 class ImprovementNotFoundError(Exception):
     pass
 
 
+@dataclass(frozen=True)
+class PageCursor:
+    """Position in the newest-first listing, ordered by (date_ts, id)."""
+
+    date_ts: int
+    id: str
+
+    @classmethod
+    def after(cls, improvement: Improvement) -> "PageCursor":
+        date = improvement.original.date.astimezone(timezone.utc)
+        return cls(date_ts=int(date.timestamp()), id=improvement.id)
+
+    def encode(self) -> str:
+        return f"{self.date_ts}_{self.id}"
+
+    @classmethod
+    def decode(cls, s: str) -> "PageCursor":
+        """Raises ValueError unless `s` came from `encode`. The id ends up in
+        store queries, so nothing but an id's characters gets through."""
+        ts, sep, id = s.partition("_")
+        if not sep or not ts.isdigit() or not _ID.fullmatch(id):
+            raise ValueError(f"Invalid page cursor: {s}")
+        return cls(date_ts=int(ts), id=id)
+
+
 class IImprovementRepo(Protocol):
     def add(self, improvement: Improvement) -> None:
         raise NotImplementedError
@@ -20,6 +53,17 @@ class IImprovementRepo(Protocol):
     def get_all(self, last_n: int | None = None) -> list[Improvement]:
         raise NotImplementedError
 
+    def get_page(
+        self, limit: int, after: PageCursor | None = None
+    ) -> list[Improvement]:
+        """Returns up to limit improvements, newest first, which come
+        strictly after the cursor"""
+        raise NotImplementedError
+
+    def existing_links(self, links: list[str]) -> set[str]:
+        """Returns the subset of original links which are already stored"""
+        raise NotImplementedError
+
     def remove(self, id: str) -> Improvement:
         """Returns single deleted improvement"""
         raise NotImplementedError
@@ -27,3 +71,50 @@ class IImprovementRepo(Protocol):
     def remove_all(self, ids: list[str]) -> list[Improvement]:
         """Returns list of deleted improvements"""
         raise NotImplementedError
+
+    def retain_newest(self, n: int) -> int:
+        """Deletes all but the n improvements with the newest original date,
+        keeping all of those as old as the n-th newest.
+        Returns number of deleted improvements"""
+        raise NotImplementedError
+
+    def delete_older_than(self, ts: datetime) -> int:
+        """Deletes improvements whose original is older than ts.
+        Returns number of deleted improvements"""
+        raise NotImplementedError
+
+
+class IAsyncImprovementRepo(Protocol):
+    """Awaitable counterpart of IImprovementRepo, for use on the event loop"""
+
+    async def add(self, improvement: Improvement) -> None:
+        raise NotImplementedError
+
+    async def add_all(self, improvements: list[Improvement]) -> None:
+        raise NotImplementedError
+
+    async def get(self, id: str) -> Improvement:
+        raise NotImplementedError
+
+    async def get_all(self, last_n: int | None = None) -> list[Improvement]:
+        raise NotImplementedError
+
+    async def get_page(
+        self, limit: int, after: PageCursor | None = None
+    ) -> list[Improvement]:
+        raise NotImplementedError
+
+    async def existing_links(self, links: list[str]) -> set[str]:
+        raise NotImplementedError
+
+    async def remove(self, id: str) -> Improvement:
+        raise NotImplementedError
+
+    async def remove_all(self, ids: list[str]) -> list[Improvement]:
+        raise NotImplementedError
+
+    async def retain_newest(self, n: int) -> int:
+        raise NotImplementedError
+
+    async def delete_older_than(self, ts: datetime) -> int:
+        raise NotImplementedError
@@ -0,0 +1,29 @@
+from typing import Protocol
+
+
+class IRefreshLease(Protocol):
+    """Coordinates refreshes between the worker processes of one deployment.
+
+    Only the holder of the lease runs scheduled refreshes. Independently of
+    that, every process claims the originals it is about to rewrite, so no
+    two processes pay for the same rewrite. Leases and claims expire unless
+    renewed, so a crashed process neither blocks the others nor loses work.
+    """
+
+    ttl: float  # seconds until an unrenewed lease or claim expires
+
+    def try_acquire(self) -> bool:
+        """Takes or renews the lease, along with this holder's claims.
+        Returns whether this process holds it now."""
+        raise NotImplementedError
+
+    def release(self) -> None:
+        raise NotImplementedError
+
+    def claim(self, ids: list[str]) -> set[str]:
+        """Claims the given original ids, returning those claimed by this
+        process. Ids claimed by another live process are left out."""
+        raise NotImplementedError
+
+    def release_claims(self, ids: list[str]) -> None:
+        raise NotImplementedError
@@ -1,3 +1,4 @@
+from collections.abc import Iterator
 from typing import Protocol
 
 from prophet.domain.improvement import Improvement
@@ -10,6 +11,12 @@ class LLMClient(Protocol):
     ) -> Improvement:
         raise NotImplementedError
 
+    def rewrite_batch(
+        self, originals: list[Original], previous_titles: list[list[str]] | None = None
+    ) -> list[Improvement]:
+        """`previous_titles` holds, per original, headlines not to repeat"""
+        raise NotImplementedError
+
     def rewrite_title(
         self, original_content: str, suggestions: str | None = None
     ) -> str:
@@ -20,5 +27,18 @@ class LLMClient(Protocol):
     ) -> str:
         raise NotImplementedError
 
-    def get_alternative_title_suggestions(self, original_content: str) -> str:
+    def get_alternative_title_suggestions(
+        self, original_content: str, previous_titles: list[str] | None = None
+    ) -> str:
+        raise NotImplementedError
+
+    def stream_title(self, original_content: str) -> Iterator[tuple[str, str]]:
+        """Yields (stage, text piece) while rewriting, first the "suggestions"
+        and then the final "title" stage"""
+        raise NotImplementedError
+
+    def stream_summary(
+        self, original: Original, improved_title: str
+    ) -> Iterator[tuple[str, str]]:
+        """Yields ("summary", text piece) while rewriting"""
         raise NotImplementedError
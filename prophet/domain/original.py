@@ -4,7 +4,7 @@ from dataclasses import dataclass, field
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class Original:  # BadJoke: Sting
     title: str
     summary: str
@@ -13,6 +13,31 @@ class Original:  # BadJoke: Sting
     image_link: str | None = None
     id: str = field(init=False)
 
+    @classmethod
+    def restore(
+        cls,
+        title: str,
+        summary: str,
+        link: str,
+        date: datetime,
+        image_link: str | None,
+        id: str,
+    ) -> "Original":
+        """A stored original as it was stored. Skips `__post_init__`, whose
+        id and image extraction already happened before storing."""
+        original = object.__new__(cls)
+        original.title = title
+        original.summary = summary
+        original.link = link
+        original.date = date
+        original.image_link = image_link
+        original.id = id
+        return original
+
+    @staticmethod
+    def id_from_link(link: str) -> str:
+        return hashlib.sha256(link.encode()).hexdigest()
+
     def _extract_img(self, s: str) -> tuple[str, str]:  # [img_link, rest of string]
         img: str
         m = re.match(r'<img src="(?P<img>.+?)"', s)
@@ -30,7 +55,7 @@ class Original:  # BadJoke: Sting
         return re.sub(r"<.*?>", "", s)
 
     def __post_init__(self):
-        self.id = hashlib.sha256(self.link.encode()).hexdigest()
+        self.id = Original.id_from_link(self.link)
 
         extracted = self._extract_img(self.summary)
         if extracted[0]:
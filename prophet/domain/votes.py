@@ -0,0 +1,16 @@
+from typing import Protocol
+
+type VoteKey = tuple[str, int]  # (improvement id, index into its suggestions)
+
+
+class IVoteRepo(Protocol):
+    """Vote counts per headline suggestion of an improvement"""
+
+    def add_votes(self, counts: dict[VoteKey, int]) -> None:
+        """Adds the counts to the stored ones, all in one atomic write"""
+        raise NotImplementedError
+
+    def get_votes(self, ids: list[str]) -> dict[str, dict[int, int]]:
+        """Returns the vote count by suggestion index for the improvements
+        with any votes"""
+        raise NotImplementedError
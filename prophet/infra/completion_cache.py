@@ -0,0 +1,160 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+EVICT_MARGIN = 0.1  # share of max_disk_entries written beyond it before evicting
+
+
+class CompletionCache:
+    """Two-tier cache for LLM completions, keyed by model and messages.
+
+    Lookups hit an in-memory LRU first and fall back to a SQLite file, which
+    keeps completions across restarts. Both tiers evict entries older than
+    `ttl` seconds and drop the least recently used ones beyond their size.
+    The file is pruned in batches, once it holds `EVICT_MARGIN` more entries
+    than allowed. It has its own lock, so memory hits never wait for disk.
+    Pass `path=None` for a memory-only cache.
+    """
+
+    ttl: float
+    max_memory_entries: int
+    max_disk_entries: int
+    hits_memory: int
+    hits_disk: int
+    misses: int
+
+    def __init__(
+        self,
+        path: str | Path | None = "/tmp/pollenprophet/completions.sqlite",
+        max_memory_entries: int = 1024,
+        max_disk_entries: int = 50_000,
+        ttl: float = 7 * 24 * 3600,
+    ) -> None:
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self._memory: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._disk_entries = 0  # at least, replaced keys count again
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            _ = self._db.execute("PRAGMA journal_mode=WAL")
+            _ = self._db.execute(
+                """CREATE TABLE IF NOT EXISTS completions (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )"""
+            )
+            _ = self._db.execute(
+                "CREATE INDEX IF NOT EXISTS completions_accessed ON completions(accessed)"
+            )
+            self._db.commit()
+            self._disk_entries = self._count(self._db)
+
+    @staticmethod
+    def _count(db: sqlite3.Connection) -> int:
+        return int(db.execute("SELECT COUNT(*) FROM completions").fetchone()[0])
+
+    @staticmethod
+    def key(model: str, messages: list[dict[str, str]]) -> str:
+        payload = json.dumps([model, messages], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                value, created = cached
+                if now - created < self.ttl:
+                    self._memory.move_to_end(key)
+                    self.hits_memory += 1
+                    return value
+                del self._memory[key]
+
+        row = None
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value, created FROM completions WHERE key = ? AND created > ?",
+                    (key, now - self.ttl),
+                ).fetchone()
+                if row is not None:
+                    _ = self._db.execute(
+                        "UPDATE completions SET accessed = ? WHERE key = ?", (now, key)
+                    )
+                    self._db.commit()
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            value, created = str(row[0]), float(row[1])
+            self._remember(key, value, created)
+            self.hits_disk += 1
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+        if self._db is None:
+            return
+        with self._db_lock:
+            _ = self._db.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._disk_entries += 1
+            margin = max(1, int(self.max_disk_entries * EVICT_MARGIN))
+            if self._disk_entries > self.max_disk_entries + margin:
+                self._evict(self._db, now)
+            self._db.commit()
+
+    def _evict(self, db: sqlite3.Connection, now: float) -> None:
+        """Deletes expired entries, then the least recently used beyond the
+        size."""
+        _ = db.execute("DELETE FROM completions WHERE created <= ?", (now - self.ttl,))
+        _ = db.execute(
+            """DELETE FROM completions WHERE key IN (
+                SELECT key FROM completions ORDER BY accessed DESC
+                LIMIT -1 OFFSET ?
+            )""",
+            (self.max_disk_entries,),
+        )
+        self._disk_entries = self._count(db)
+
+    def _remember(self, key: str, value: str, created: float) -> None:
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            _ = self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                _ = self._db.execute("DELETE FROM completions")
+                self._db.commit()
+                self._disk_entries = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "entries_memory": len(self._memory),
+        }
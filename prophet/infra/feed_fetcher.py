@@ -0,0 +1,141 @@
+import asyncio
+import json
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from pathlib import Path
+
+import feedparser
+
+from prophet.domain.original import Original
+from prophet.metrics import FEED_ENTRIES_NEW, FEED_FETCH_BYTES, FEED_FETCH_SECONDS
+
+
+def _entry_date(entry: feedparser.FeedParserDict) -> datetime:
+    try:
+        return datetime.strptime(entry.published, "%a, %d %b %Y %H:%M:%S %z")
+    except (AttributeError, ValueError):
+        # other sources use other formats, feedparser normalises them to UTC
+        parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+        if parsed is None:
+            raise ValueError(f"Feed entry {entry.get('link')} has no date") from None
+        return datetime(*parsed[:6], tzinfo=timezone.utc)
+
+
+class FeedFetchError(Exception):
+    pass
+
+
+class FeedFetcher:
+    """Fetches a newest-first feed incrementally.
+
+    Sends the ETag and Last-Modified validators of the previous fetch, so an
+    unchanged feed costs a single 304. Validators only move forward on
+    `commit`, which the caller invokes once the fetched originals are safely
+    stored; a failed refresh therefore re-downloads the same feed next time.
+    A feed which cannot be downloaded raises `FeedFetchError` and keeps the
+    validators as they were.
+    """
+
+    url: str
+    state_file: Path | None
+    etag: str | None
+    modified: str | None
+
+    def __init__(
+        self,
+        url: str,
+        state_file: str | Path | None = "/tmp/pollenprophet/feed_state.json",
+    ) -> None:
+        self.url = url
+        self.state_file = Path(state_file) if state_file else None
+        self.etag = None
+        self.modified = None
+        self._pending: tuple[str | None, str | None] | None = None
+        self._load()
+
+    def _load(self) -> None:
+        if not self.state_file or not self.state_file.exists():
+            return
+        try:
+            state = json.loads(self.state_file.read_text()).get(self.url, {})
+        except (OSError, ValueError):
+            print(f"Could not read feed state from {self.state_file}")
+            return
+        self.etag = state.get("etag")
+        self.modified = state.get("modified")
+
+    def commit(self) -> None:
+        """Persists the validators of the last successful fetch."""
+        if self._pending is None:
+            return
+        self.etag, self.modified = self._pending
+        self._pending = None
+        if not self.state_file:
+            return
+
+        state: dict[str, dict[str, str | None]] = {}
+        if self.state_file.exists():
+            try:
+                state = json.loads(self.state_file.read_text())
+            except (OSError, ValueError):
+                pass
+        state[self.url] = {"etag": self.etag, "modified": self.modified}
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_file.with_suffix(".tmp")
+        _ = tmp.write_text(json.dumps(state))
+        _ = tmp.replace(self.state_file)
+
+    async def fetch(
+        self, known_links: Callable[[list[str]], Awaitable[set[str]]] | None = None
+    ) -> list[Original]:
+        """Returns the feed entries which are not stored yet.
+
+        `known_links` receives the links of all entries in the feed and
+        returns those which are already stored. Only the other entries are
+        turned into `Original`s. Older entries are checked too, not just
+        those up to the first known one, so an entry whose rewrite failed
+        is offered again even after newer ones were stored.
+        """
+        start = time.perf_counter()
+        feed: feedparser.FeedParserDict = await asyncio.to_thread(
+            feedparser.parse, self.url, etag=self.etag, modified=self.modified
+        )
+        FEED_FETCH_SECONDS.observe(time.perf_counter() - start)
+        FEED_FETCH_BYTES.inc(self._size(feed))
+        status = feed.get("status")
+        if status == 304:
+            return []
+        # feedparser reports network and HTTP errors instead of raising them
+        if (feed.get("bozo") and status is None) or (status or 0) >= 400:
+            error = feed.get("bozo_exception") or f"HTTP {status}"
+            raise FeedFetchError(f"Could not fetch {self.url}: {error}")
+
+        self._pending = (feed.get("etag"), feed.get("modified"))
+
+        links = [entry.link for entry in feed.entries]
+        known = await known_links(links) if known_links and links else set()
+
+        results: list[Original] = []
+        for entry in feed.entries:
+            if entry.link in known:
+                continue
+            results.append(
+                Original(
+                    title=entry.title,
+                    summary=entry.summary,
+                    link=entry.link,
+                    date=_entry_date(entry),
+                )
+            )
+        FEED_ENTRIES_NEW.inc(len(results))
+        return results
+
+    def _size(self, feed: feedparser.FeedParserDict) -> int:
+        length = feed.get("headers", {}).get("content-length")
+        if length is not None:
+            return int(length)
+        path = Path(self.url)
+        return (
+            path.stat().st_size if feed.get("status") is None and path.is_file() else 0
+        )
@@ -0,0 +1,123 @@
+import fcntl
+import json
+import os
+import socket
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import override
+
+from prophet.domain.lease import IRefreshLease
+
+
+class FileLease(IRefreshLease):
+    """Refresh lease for the worker processes on one host.
+
+    The lease is a small JSON file naming its holder and expiry, and every
+    claim a file named after the original's id whose modification time is
+    its last renewal. All reads and writes happen under an exclusive `flock`
+    on a separate lock file, held only for the few file operations, so a
+    stuck or killed worker never blocks the others for longer than `ttl`.
+    """
+
+    path: Path
+    claims_dir: Path
+    ttl: float
+    owner: str
+
+    def __init__(
+        self,
+        path: str | Path = "/tmp/pollenprophet/refresh.lease",
+        ttl: float = 90.0,
+        owner: str | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path)
+        self.claims_dir = self.path.with_suffix(".claims")
+        self.ttl = ttl
+        self.owner = owner if owner else f"{socket.gethostname()}:{os.getpid()}"
+        self._clock = clock
+        self._claimed: set[str] = set()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.claims_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _holder(self) -> str | None:
+        """The current, unexpired holder of the lease."""
+        try:
+            lease = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return None
+        return lease["owner"] if lease.get("expires", 0) > self._clock() else None
+
+    @override
+    def try_acquire(self) -> bool:
+        """Also renews this process's claims, whether or not it gets the lease."""
+        with self._locked():
+            self._renew_claims()
+            holder = self._holder()
+            if holder not in (None, self.owner):
+                return False
+            tmp = self.path.with_suffix(".tmp")
+            _ = tmp.write_text(
+                json.dumps({"owner": self.owner, "expires": self._clock() + self.ttl})
+            )
+            _ = tmp.replace(self.path)
+            return True
+
+    @override
+    def release(self) -> None:
+        with self._locked():
+            if self._holder() == self.owner:
+                self.path.unlink(missing_ok=True)
+
+    def _renew_claims(self) -> None:
+        now = self._clock()
+        for id in self._claimed:
+            try:
+                os.utime(self.claims_dir / id, (now, now))
+            except FileNotFoundError:
+                pass
+
+    @override
+    def claim(self, ids: list[str]) -> set[str]:
+        claimed: set[str] = set()
+        now = self._clock()
+        with self._locked():
+            for id in ids:
+                path = self.claims_dir / id
+                try:
+                    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+                except FileExistsError:
+                    try:
+                        owner = path.read_text()
+                        expired = path.stat().st_mtime + self.ttl <= now
+                    except FileNotFoundError:
+                        owner, expired = "", True
+                    if owner != self.owner and not expired:
+                        continue
+                    _ = path.write_text(self.owner)
+                else:
+                    _ = os.write(fd, self.owner.encode())
+                    os.close(fd)
+                os.utime(path, (now, now))
+                claimed.add(id)
+        self._claimed |= claimed
+        return claimed
+
+    @override
+    def release_claims(self, ids: list[str]) -> None:
+        with self._locked():
+            for id in ids:
+                if id not in self._claimed:
+                    continue
+                self._claimed.discard(id)
+                (self.claims_dir / id).unlink(missing_ok=True)
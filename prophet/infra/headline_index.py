@@ -0,0 +1,194 @@
+import re
+import threading
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from itertools import compress, islice
+from typing import override
+
+import numpy as np
+import numpy.typing as npt
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.improvement_index import IImprovementIndex
+from prophet.domain.original import Original
+
+NUM_HASHES = 64  # MinHash signature length, one bit each when comparing
+# b-bit MinHash: only the lowest byte of every minimum is kept, which makes
+# the index a quarter of the size and the scan faster. Unrelated minima then
+# agree by chance in 1/256 of the hashes, which the estimate corrects for.
+_CHANCE = 1 / 256
+SHINGLE = 3  # bytes per shingle, packed into one integer
+NEAR_DUPLICATE = 0.75  # estimated Jaccard similarity from which a title is a repeat
+CAPACITY = 100_000  # titles kept, the oldest are dropped beyond that
+CHUNK = 256  # titles hashed at once, keeps the (shingles x hashes) array small
+SEED = 20250601  # fixed, so signatures are comparable between processes
+
+# multiply-shift hashing: the upper half of (a * x + b) mod 2**64, for odd a
+_rng = np.random.default_rng(SEED)
+_A = _rng.integers(0, 1 << 64, NUM_HASHES, dtype=np.uint64, endpoint=False) | 1
+_B = _rng.integers(0, 1 << 64, NUM_HASHES, dtype=np.uint64, endpoint=False)
+
+type Signatures = npt.NDArray[np.uint8]
+
+
+def _normalize(title: str) -> bytes:
+    words = re.sub(r"[\W_]+", " ", title.lower()).split()
+    return " ".join(words).encode().ljust(SHINGLE)
+
+
+def _shingles(text: bytes) -> npt.NDArray[np.uint64]:
+    """Every run of SHINGLE bytes packed into one integer."""
+    b = np.frombuffer(text, dtype=np.uint8).astype(np.uint64)
+    return (b[:-2] << 16) | (b[1:-1] << 8) | b[2:]
+
+
+def signatures(titles: list[str]) -> Signatures:
+    """MinHash signatures of the titles' character shingles, one row each.
+
+    The shingles of a chunk of titles are hashed by all permutations in one
+    array operation and reduced to their per-title minimum with `reduceat`.
+    """
+    out = np.empty((len(titles), NUM_HASHES), dtype=np.uint8)
+    for start in range(0, len(titles), CHUNK):
+        shingles = [_shingles(_normalize(t)) for t in titles[start : start + CHUNK]]
+        offsets = np.cumsum([0] + [len(s) for s in shingles[:-1]])
+        hashed = (np.concatenate(shingles)[:, None] * _A + _B) >> np.uint64(32)
+        minima = np.minimum.reduceat(hashed, offsets)
+        out[start : start + len(shingles)] = minima & np.uint64(0xFF)
+    return out
+
+
+class HeadlineIndex(IImprovementIndex):
+    """Similarity index over the titles of stored originals.
+
+    Keeps a MinHash signature per original in one matrix, so comparing a
+    title against every stored one is a single vectorized comparison. It
+    finds the stored story an incoming original only repeats under a new
+    link, and the headlines written for the most similar stories, which the
+    LLM is asked not to repeat. Like the search index, it follows the
+    repo's writes, so every match is still stored.
+    """
+
+    capacity: int
+    threshold: float
+
+    def __init__(
+        self, capacity: int = CAPACITY, threshold: float = NEAR_DUPLICATE
+    ) -> None:
+        self.capacity = capacity
+        self.threshold = threshold
+        self._signatures: Signatures = np.empty((0, NUM_HASHES), dtype=np.uint8)
+        self._ids: list[str] = []  # original ids, oldest first
+        self._improvement_ids: list[str] = []
+        self._titles: list[str] = []  # the improved titles
+        self._dates: list[int] = []  # date_orig_ts, for retention
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @override
+    def add_all(self, improvements: Iterable[Improvement]) -> None:
+        improvements = list(improvements)
+        if not improvements:
+            return
+        added = signatures([imp.original.title for imp in improvements])
+        with self._lock:
+            self._remove({imp.id for imp in improvements})
+            needed = self._size + len(improvements)
+            if needed > len(self._signatures):
+                grown = np.empty(
+                    (max(needed, 2 * len(self._signatures)), NUM_HASHES),
+                    dtype=np.uint8,
+                )
+                grown[: self._size] = self._signatures[: self._size]
+                self._signatures = grown
+            self._signatures[self._size : needed] = added
+            self._ids.extend(imp.original.id for imp in improvements)
+            self._improvement_ids.extend(imp.id for imp in improvements)
+            self._titles.extend(imp.title for imp in improvements)
+            self._dates.extend(
+                int(imp.original.date.astimezone(timezone.utc).timestamp())
+                for imp in improvements
+            )
+            self._size = needed
+            if self._size > self.capacity:
+                self._drop_oldest(self._size - self.capacity)
+
+    def _drop_oldest(self, count: int) -> None:
+        self._signatures[: self._size - count] = self._signatures[count : self._size]
+        del self._ids[:count], self._improvement_ids[:count]
+        del self._titles[:count], self._dates[:count]
+        self._size -= count
+
+    def _keep(self, keep: list[bool]) -> None:
+        """Drops the titles whose entry in `keep` is False."""
+        if all(keep):
+            return
+        kept = self._signatures[: self._size][np.array(keep, dtype=np.bool_)]
+        self._signatures[: len(kept)] = kept
+        self._ids = list(compress(self._ids, keep))
+        self._improvement_ids = list(compress(self._improvement_ids, keep))
+        self._titles = list(compress(self._titles, keep))
+        self._dates = list(compress(self._dates, keep))
+        self._size = len(kept)
+
+    def _remove(self, ids: set[str]) -> None:
+        if self._size and ids:
+            self._keep([id not in ids for id in self._improvement_ids])
+
+    @override
+    def remove_all(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            self._remove(set(ids))
+
+    @override
+    def retain_newest(self, n: int) -> None:
+        with self._lock:
+            if self._size <= n:
+                return
+            cutoff = sorted(self._dates)[-n]
+            self._keep([date >= cutoff for date in self._dates])
+
+    @override
+    def delete_older_than(self, ts: datetime) -> None:
+        cutoff = int(ts.astimezone(timezone.utc).timestamp())
+        with self._lock:
+            self._keep([date >= cutoff for date in self._dates])
+
+    def _similarities(self, title: str) -> npt.NDArray[np.float64]:
+        """Estimated Jaccard similarity of the title to every stored one."""
+        signature = signatures([title])[0]
+        matches = np.packbits(self._signatures[: self._size] == signature, axis=1)
+        # one bit per hash, so a row is one 64-bit word and its set bits count
+        # the matching hashes, which is faster than summing bools
+        matching = np.bitwise_count(matches.view(np.uint64)[:, 0]) / NUM_HASHES
+        return np.maximum(0.0, (matching - _CHANCE) / (1 - _CHANCE))
+
+    def near_duplicate(self, original: Original) -> str | None:
+        """The id of the improvement of a different stored original with
+        nearly the same title."""
+        with self._lock:
+            if not self._size:
+                return None
+            similarity = self._similarities(original.title)
+            best = int(np.argmax(similarity))
+            if similarity[best] < self.threshold or self._ids[best] == original.id:
+                return None
+            return self._improvement_ids[best]
+
+    def previous_titles(self, original: Original, k: int = 5) -> list[str]:
+        """The headlines written for the k stored stories most similar to the
+        original, topped up with the newest headlines."""
+        with self._lock:
+            if not self._size:
+                return []
+            similarity = self._similarities(original.title)
+            k = min(k, self._size)
+            nearest = np.argpartition(-similarity, k - 1)[:k]
+            nearest = nearest[np.argsort(-similarity[nearest], kind="stable")]
+            picked = [int(i) for i in nearest if similarity[i] > 0]
+            newest = (i for i in range(self._size - 1, -1, -1) if i not in picked)
+            picked += islice(newest, k - len(picked))
+            return [self._titles[i] for i in picked if self._ids[i] != original.id]
@@ -0,0 +1,188 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import httpx
+
+MEDIA_TYPES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "image/avif": ".avif",
+}
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+TOUCH_AFTER = 3600  # seconds, hits refresh a file's recency at most this often
+
+
+class ImageFetchError(Exception):
+    pass
+
+
+class ImageCache:
+    """Size-bounded, least recently used cache of article images on disk.
+
+    Every image is stored once under its original's id, with the extension
+    of its media type. A file's modification time is its last use, so all
+    worker processes share one cache and one recency order. Once the cache
+    outgrows `max_bytes`, the least recently used files are deleted.
+    Concurrent fetches of the same image share one download.
+    """
+
+    root: Path
+    max_bytes: int
+
+    def __init__(
+        self,
+        root: str | Path = "/tmp/pollenprophet/images",
+        max_bytes: int = 256 * 1024 * 1024,
+        timeout: float = 10.0,
+    ) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._timeout = timeout
+        self._client: httpx.AsyncClient | None = None
+        self._fetching: dict[str, asyncio.Future[Path]] = {}
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        import httpx  # only once images are fetched, it is slow to import
+
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self._timeout, follow_redirects=True
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get(self, id: str) -> tuple[Path, str] | None:
+        """The cached image's path and media type, marking it as used."""
+        if not id.isalnum():
+            return None
+        for media_type, suffix in MEDIA_TYPES.items():
+            path = self.root / f"{id}{suffix}"
+            try:
+                used = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if time.time() - used > TOUCH_AFTER:
+                try:
+                    os.utime(path)
+                except FileNotFoundError:  # evicted meanwhile
+                    return None
+            return path, media_type
+        return None
+
+    async def fetch(self, id: str, url: str) -> tuple[Path, str]:
+        """The cached image, downloading it from `url` on a miss."""
+        cached = self.get(id)
+        if cached:
+            return cached
+        if id in self._fetching:
+            path = await asyncio.shield(self._fetching[id])
+            return path, _media_type(path)
+
+        future: asyncio.Future[Path] = asyncio.get_running_loop().create_future()
+        self._fetching[id] = future
+        try:
+            path = await self._download(id, url)
+        except Exception as e:
+            future.set_exception(e)
+            _ = future.exception()  # mark retrieved for lone callers
+            raise
+        else:
+            future.set_result(path)
+            return path, _media_type(path)
+        finally:
+            del self._fetching[id]
+
+    async def _download(self, id: str, url: str) -> Path:
+        import httpx
+
+        if not id.isalnum():
+            raise ImageFetchError(f"Invalid image id {id!r}")
+        if not url.startswith(("https://", "http://")):
+            raise ImageFetchError(f"Not an image URL: {url!r}")
+        chunks: list[bytes] = []
+        try:
+            async with self.client.stream("GET", url) as response:
+                if response.status_code != 200:
+                    raise ImageFetchError(f"{url} answered {response.status_code}")
+                media_type = response.headers.get("content-type", "").split(";")[0]
+                suffix = MEDIA_TYPES.get(media_type.strip().lower())
+                if suffix is None:
+                    raise ImageFetchError(f"{url} is no image but {media_type!r}")
+                size = 0
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > MAX_IMAGE_BYTES:
+                        raise ImageFetchError(
+                            f"{url} is larger than {MAX_IMAGE_BYTES}B"
+                        )
+                    chunks.append(chunk)
+        except httpx.HTTPError as e:
+            raise ImageFetchError(f"Could not download {url}: {e!r}") from e
+        return await asyncio.to_thread(self._store, id, suffix, b"".join(chunks))
+
+    def _store(self, id: str, suffix: str, content: bytes) -> Path:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / f"{id}{suffix}"
+        tmp = self.root / f".tmp-{id}-{os.getpid()}"
+        _ = tmp.write_bytes(content)
+        _ = tmp.replace(path)
+        self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: Path) -> None:
+        """Deletes the least recently used files until the cache fits."""
+        files: list[tuple[float, int, Path]] = []
+        for entry in os.scandir(self.root):
+            if entry.name.startswith(".") or not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+    async def prefetch(self, images: dict[str, str], concurrency: int = 4) -> int:
+        """Caches the images by id which are missing, returning how many were
+        downloaded. Failures are reported and skipped."""
+        missing = {id: url for id, url in images.items() if url and not self.get(id)}
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(id: str, url: str) -> None:
+            async with semaphore:
+                _ = await self.fetch(id, url)
+
+        results = await asyncio.gather(
+            *(bounded(id, url) for id, url in missing.items()), return_exceptions=True
+        )
+        fetched = 0
+        for url, res in zip(missing.values(), results, strict=True):
+            if isinstance(res, BaseException):
+                if not isinstance(res, Exception):
+                    raise res
+                print(f"Error caching image {url}: {res!r}")
+                continue
+            fetched += 1
+        return fetched
+
+
+def _media_type(path: Path) -> str:
+    return next(t for t, suffix in MEDIA_TYPES.items() if suffix == path.suffix)
@@ -0,0 +1,62 @@
+import asyncio
+from datetime import datetime
+from typing import override
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.improvement_repo import (
+    IAsyncImprovementRepo,
+    IImprovementRepo,
+    PageCursor,
+)
+
+
+class AsyncImprovementRepoAdapter(IAsyncImprovementRepo):
+    """Exposes a blocking repo, such as the local SQLite or pickle stores,
+    as an async one by running each call in a worker thread."""
+
+    repo: IImprovementRepo
+
+    def __init__(self, repo: IImprovementRepo) -> None:
+        self.repo = repo
+
+    @override
+    async def add(self, improvement: Improvement) -> None:
+        await asyncio.to_thread(self.repo.add, improvement)
+
+    @override
+    async def add_all(self, improvements: list[Improvement]) -> None:
+        await asyncio.to_thread(self.repo.add_all, improvements)
+
+    @override
+    async def get(self, id: str) -> Improvement:
+        return await asyncio.to_thread(self.repo.get, id)
+
+    @override
+    async def get_all(self, last_n: int | None = None) -> list[Improvement]:
+        return await asyncio.to_thread(self.repo.get_all, last_n)
+
+    @override
+    async def get_page(
+        self, limit: int, after: PageCursor | None = None
+    ) -> list[Improvement]:
+        return await asyncio.to_thread(self.repo.get_page, limit, after)
+
+    @override
+    async def existing_links(self, links: list[str]) -> set[str]:
+        return await asyncio.to_thread(self.repo.existing_links, links)
+
+    @override
+    async def remove(self, id: str) -> Improvement:
+        return await asyncio.to_thread(self.repo.remove, id)
+
+    @override
+    async def remove_all(self, ids: list[str]) -> list[Improvement]:
+        return await asyncio.to_thread(self.repo.remove_all, ids)
+
+    @override
+    async def retain_newest(self, n: int) -> int:
+        return await asyncio.to_thread(self.repo.retain_newest, n)
+
+    @override
+    async def delete_older_than(self, ts: datetime) -> int:
+        return await asyncio.to_thread(self.repo.delete_older_than, ts)
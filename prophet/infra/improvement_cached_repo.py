@@ -0,0 +1,152 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from datetime import datetime, timezone
+from typing import Any, override
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.improvement_repo import IAsyncImprovementRepo, PageCursor
+
+
+class CachedImprovementRepo(IAsyncImprovementRepo):
+    """Read-through cache in front of another repo.
+
+    Listings and single lookups are served from memory until the next write
+    through this repo, which drops the whole cache. Concurrent misses for the
+    same query share one load. With a `ttl`, entries also expire, which
+    bounds staleness when another process writes to the same store.
+    """
+
+    repo: IAsyncImprovementRepo
+    ttl: float | None
+    hits: int
+    misses: int
+    invalidations: int
+    last_modified: datetime
+
+    def __init__(self, repo: IAsyncImprovementRepo, ttl: float | None = None) -> None:
+        self.repo = repo
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        self._cache: dict[Hashable, tuple[float, Any]] = {}
+        self._loading: dict[Hashable, asyncio.Future[Any]] = {}
+
+    async def _cached[T](self, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        cached = self._cache.get(key)
+        if cached is not None and (
+            self.ttl is None or time.monotonic() - cached[0] < self.ttl
+        ):
+            self.hits += 1
+            return cached[1]
+
+        if key in self._loading:
+            self.hits += 1
+            return await asyncio.shield(self._loading[key])
+
+        self.misses += 1
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        generation = self.invalidations
+        try:
+            value = await load()
+        except Exception as e:
+            future.set_exception(e)
+            _ = future.exception()  # mark retrieved for lone callers
+            raise
+        else:
+            future.set_result(value)
+            if generation == self.invalidations:
+                self._cache[key] = (time.monotonic(), value)
+            return value
+        finally:
+            if self._loading.get(key) is future:
+                del self._loading[key]
+
+    def invalidate(self) -> None:
+        self._cache.clear()
+        self._loading.clear()
+        self.invalidations += 1
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "entries": len(self._cache),
+        }
+
+    @override
+    async def add(self, improvement: Improvement) -> None:
+        await self.repo.add(improvement)
+        self.invalidate()
+
+    @override
+    async def add_all(self, improvements: list[Improvement]) -> None:
+        await self.repo.add_all(improvements)
+        self.invalidate()
+
+    @override
+    async def get(self, id: str) -> Improvement:
+        return await self._cached(("get", id), lambda: self.repo.get(id))
+
+    @override
+    async def get_all(self, last_n: int | None = None) -> list[Improvement]:
+        return list(
+            await self._cached(("get_all", last_n), lambda: self.repo.get_all(last_n))
+        )
+
+    async def image_link(self, original_id: str) -> str | None:
+        """The image of the original with this id, looked up in a map built
+        from the cached listing."""
+
+        async def load() -> dict[str, str | None]:
+            return {a.original.id: a.original.image_link for a in await self.get_all()}
+
+        return (await self._cached(("image_links",), load)).get(original_id)
+
+    @override
+    async def get_page(
+        self, limit: int, after: PageCursor | None = None
+    ) -> list[Improvement]:
+        return list(
+            await self._cached(
+                ("get_page", limit, after), lambda: self.repo.get_page(limit, after)
+            )
+        )
+
+    @override
+    async def existing_links(self, links: list[str]) -> set[str]:
+        # used for deduplication right before writing, always ask the store
+        return await self.repo.existing_links(links)
+
+    @override
+    async def remove(self, id: str) -> Improvement:
+        try:
+            return await self.repo.remove(id)
+        finally:
+            self.invalidate()
+
+    @override
+    async def remove_all(self, ids: list[str]) -> list[Improvement]:
+        try:
+            return await self.repo.remove_all(ids)
+        finally:
+            self.invalidate()
+
+    @override
+    async def retain_newest(self, n: int) -> int:
+        deleted = await self.repo.retain_newest(n)
+        if deleted:
+            self.invalidate()
+        return deleted
+
+    @override
+    async def delete_older_than(self, ts: datetime) -> int:
+        deleted = await self.repo.delete_older_than(ts)
+        if deleted:
+            self.invalidate()
+        return deleted
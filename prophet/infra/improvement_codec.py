@@ -0,0 +1,125 @@
+"""The one serialized form of improvements, shared by every repo and endpoint.
+
+An improvement is flattened to the columns of the stores, see `FIELDS`:
+as a tuple for SQLite and the memory tier, as a record (a dict) for
+Supabase rows and JSON. `dumps` wraps records in a versioned document for
+files and responses. Decoding rebuilds the models with `restore`, which
+skips the image extraction and HTML stripping done before storing.
+"""
+
+import json
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from typing import Any
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.original import Original
+
+VERSION = 1  # of the document written by `dumps`
+FIELDS = (
+    "uuid",
+    "title",
+    "summary",
+    "title_orig",
+    "summary_orig",
+    "link_orig",
+    "image_link_orig",
+    "date_orig_ts",
+    "suggestions",
+)
+
+type Values = tuple[str, str, str, str, str, str, str, int, list[str]]
+type Record = dict[str, Any]
+
+
+class CodecVersionError(ValueError):
+    pass
+
+
+def to_values(imp: Improvement) -> Values:
+    """The improvement's fields in the order of `FIELDS`."""
+    original = imp.original
+    return (
+        imp.id,
+        imp.title,
+        imp.summary,
+        original.title,
+        original.summary,
+        original.link,
+        original.image_link or "",
+        int(original.date.astimezone(timezone.utc).timestamp()),
+        imp.suggestions,
+    )
+
+
+def from_values(
+    uuid: str,
+    title: str,
+    summary: str,
+    title_orig: str,
+    summary_orig: str,
+    link_orig: str,
+    image_link_orig: str,
+    date_orig_ts: int,
+    suggestions: list[str],
+) -> Improvement:
+    original = Original.restore(
+        title=title_orig,
+        summary=summary_orig,
+        link=link_orig,
+        date=datetime.fromtimestamp(date_orig_ts, tz=timezone.utc),
+        image_link=image_link_orig,
+        id=Original.id_from_link(link_orig),
+    )
+    return Improvement.restore(
+        original=original,
+        title=title,
+        summary=summary,
+        id=uuid,
+        suggestions=suggestions,
+    )
+
+
+def to_record(imp: Improvement) -> Record:
+    return dict(zip(FIELDS, to_values(imp), strict=True))
+
+
+def to_row(imp: Improvement, suggestions: bool = True) -> Record:
+    """A record to insert into a table. Empty suggestions, or all of them
+    without `suggestions`, are left out for tables which predate that column
+    and default it."""
+    record = to_record(imp)
+    if not suggestions or not imp.suggestions:
+        del record["suggestions"]
+    return record
+
+
+def from_record(record: Record) -> Improvement:
+    """Rebuilds an improvement from a record, also one stored before it had
+    suggestions."""
+    suggestions = record.get("suggestions")
+    return from_values(
+        str(record["uuid"]),
+        str(record["title"]),
+        str(record["summary"]),
+        str(record["title_orig"]),
+        str(record["summary_orig"]),
+        str(record["link_orig"]),
+        str(record["image_link_orig"]),
+        int(record["date_orig_ts"]),
+        list(suggestions) if isinstance(suggestions, list) else [],
+    )
+
+
+def dumps(improvements: Iterable[Improvement]) -> bytes:
+    """A JSON document of the improvements, tagged with the codec version."""
+    document = {"version": VERSION, "improvements": list(map(to_record, improvements))}
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def loads(data: bytes | str) -> list[Improvement]:
+    document = json.loads(data)
+    version = document.get("version") if isinstance(document, dict) else None
+    if version != VERSION:
+        raise CodecVersionError(f"Unsupported improvements version {version!r}")
+    return [from_record(record) for record in document["improvements"]]
@@ -0,0 +1,85 @@
+import asyncio
+from collections.abc import Callable
+from datetime import datetime
+from typing import override
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.improvement_index import IImprovementIndex
+from prophet.domain.improvement_repo import IAsyncImprovementRepo, PageCursor
+
+
+class IndexedImprovementRepo(IAsyncImprovementRepo):
+    """Keeps indexes, such as the `SearchIndex`, in step with every write to
+    another repo.
+
+    Writes update the indexes once the repo accepted them; reads pass
+    through untouched.
+    """
+
+    repo: IAsyncImprovementRepo
+    indexes: tuple[IImprovementIndex, ...]
+
+    def __init__(
+        self, repo: IAsyncImprovementRepo, *indexes: IImprovementIndex
+    ) -> None:
+        self.repo = repo
+        self.indexes = indexes
+
+    async def _update(self, update: Callable[[IImprovementIndex], None]) -> None:
+        def run() -> None:
+            for index in self.indexes:
+                update(index)
+
+        await asyncio.to_thread(run)
+
+    @override
+    async def add(self, improvement: Improvement) -> None:
+        await self.repo.add(improvement)
+        await self._update(lambda index: index.add_all([improvement]))
+
+    @override
+    async def add_all(self, improvements: list[Improvement]) -> None:
+        await self.repo.add_all(improvements)
+        await self._update(lambda index: index.add_all(improvements))
+
+    @override
+    async def get(self, id: str) -> Improvement:
+        return await self.repo.get(id)
+
+    @override
+    async def get_all(self, last_n: int | None = None) -> list[Improvement]:
+        return await self.repo.get_all(last_n)
+
+    @override
+    async def get_page(
+        self, limit: int, after: PageCursor | None = None
+    ) -> list[Improvement]:
+        return await self.repo.get_page(limit, after)
+
+    @override
+    async def existing_links(self, links: list[str]) -> set[str]:
+        return await self.repo.existing_links(links)
+
+    @override
+    async def remove(self, id: str) -> Improvement:
+        removed = await self.repo.remove(id)
+        await self._update(lambda index: index.remove_all([id]))
+        return removed
+
+    @override
+    async def remove_all(self, ids: list[str]) -> list[Improvement]:
+        removed = await self.repo.remove_all(ids)
+        await self._update(lambda index: index.remove_all(ids))
+        return removed
+
+    @override
+    async def retain_newest(self, n: int) -> int:
+        deleted = await self.repo.retain_newest(n)
+        await self._update(lambda index: index.retain_newest(n))
+        return deleted
+
+    @override
+    async def delete_older_than(self, ts: datetime) -> int:
+        deleted = await self.repo.delete_older_than(ts)
+        await self._update(lambda index: index.delete_older_than(ts))
+        return deleted
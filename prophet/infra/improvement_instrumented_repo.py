@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import override
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.improvement_repo import IAsyncImprovementRepo, PageCursor
+from prophet.metrics import REPO_CALL_SECONDS
+
+
+class InstrumentedImprovementRepo(IAsyncImprovementRepo):
+    """Records the latency of every call into another repo.
+
+    Sits below any cache, so it measures what the backing store costs.
+    """
+
+    repo: IAsyncImprovementRepo
+
+    def __init__(self, repo: IAsyncImprovementRepo) -> None:
+        self.repo = repo
+
+    @override
+    async def add(self, improvement: Improvement) -> None:
+        with REPO_CALL_SECONDS.time(method="add"):
+            await self.repo.add(improvement)
+
+    @override
+    async def add_all(self, improvements: list[Improvement]) -> None:
+        with REPO_CALL_SECONDS.time(method="add_all"):
+            await self.repo.add_all(improvements)
+
+    @override
+    async def get(self, id: str) -> Improvement:
+        with REPO_CALL_SECONDS.time(method="get"):
+            return await self.repo.get(id)
+
+    @override
+    async def get_all(self, last_n: int | None = None) -> list[Improvement]:
+        with REPO_CALL_SECONDS.time(method="get_all"):
+            return await self.repo.get_all(last_n)
+
+    @override
+    async def get_page(
+        self, limit: int, after: PageCursor | None = None
+    ) -> list[Improvement]:
+        with REPO_CALL_SECONDS.time(method="get_page"):
+            return await self.repo.get_page(limit, after)
+
+    @override
+    async def existing_links(self, links: list[str]) -> set[str]:
+        with REPO_CALL_SECONDS.time(method="existing_links"):
+            return await self.repo.existing_links(links)
+
+    @override
+    async def remove(self, id: str) -> Improvement:
+        with REPO_CALL_SECONDS.time(method="remove"):
+            return await self.repo.remove(id)
+
+    @override
+    async def remove_all(self, ids: list[str]) -> list[Improvement]:
+        with REPO_CALL_SECONDS.time(method="remove_all"):
+            return await self.repo.remove_all(ids)
+
+    @override
+    async def retain_newest(self, n: int) -> int:
+        with REPO_CALL_SECONDS.time(method="retain_newest"):
+            return await self.repo.retain_newest(n)
+
+    @override
+    async def delete_older_than(self, ts: datetime) -> int:
+        with REPO_CALL_SECONDS.time(method="delete_older_than"):
+            return await self.repo.delete_older_than(ts)
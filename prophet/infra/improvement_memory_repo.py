@@ -0,0 +1,190 @@
+import bisect
+import threading
+from datetime import datetime, timezone
+from typing import override
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.improvement_repo import (
+    IImprovementRepo,
+    ImprovementNotFoundError,
+    PageCursor,
+)
+from prophet.infra import improvement_codec as codec
+
+BULK_INSERT = 64  # from this batch size on, append and re-sort instead of insort
+
+type Key = tuple[int, str]  # (date_orig_ts, id), the listing order
+
+
+class _Record:
+    """One stored improvement, flattened to the codec's fields."""
+
+    __slots__ = (
+        "date_ts",
+        "id",
+        "image_link",
+        "link",
+        "suggestions",
+        "summary",
+        "summary_orig",
+        "title",
+        "title_orig",
+    )
+
+    def __init__(self, imp: Improvement) -> None:
+        (
+            self.id,
+            self.title,
+            self.summary,
+            self.title_orig,
+            self.summary_orig,
+            self.link,
+            self.image_link,
+            self.date_ts,
+            suggestions,
+        ) = codec.to_values(imp)
+        self.suggestions = tuple(suggestions)
+
+    @property
+    def key(self) -> Key:
+        return (self.date_ts, self.id)
+
+    def to_improvement(self) -> Improvement:
+        return codec.from_values(
+            self.id,
+            self.title,
+            self.summary,
+            self.title_orig,
+            self.summary_orig,
+            self.link,
+            self.image_link,
+            self.date_ts,
+            list(self.suggestions),
+        )
+
+
+class ImprovementMemoryRepo(IImprovementRepo):
+    """Keeps all improvements in process memory.
+
+    Records live in a hash index by id, next to a list of (date_orig_ts, id)
+    keys kept in ascending order. Lookups by id are O(1), placing a key is
+    a binary search, and the newest k records are the last k keys, so
+    `get_all(k)` and `get_page` cost O(log n + k). Large batches are
+    appended and re-sorted in one go.
+    """
+
+    def __init__(self) -> None:
+        self._by_id: dict[str, _Record] = {}
+        self._by_link: dict[str, str] = {}
+        self._order: list[Key] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def _unlink(self, record: _Record) -> None:
+        del self._by_id[record.id]
+        if self._by_link.get(record.link) == record.id:
+            del self._by_link[record.link]
+
+    def _drop_key(self, key: Key) -> None:
+        i = bisect.bisect_left(self._order, key)
+        del self._order[i]
+
+    @override
+    def add(self, improvement: Improvement) -> None:
+        self.add_all([improvement])
+
+    @override
+    def add_all(self, improvements: list[Improvement]) -> None:
+        # the last of several improvements with the same id wins
+        records = list({imp.id: _Record(imp) for imp in improvements}.values())
+        with self._lock:
+            for record in records:
+                replaced = self._by_id.get(record.id)
+                if replaced is not None:
+                    self._unlink(replaced)
+                    self._drop_key(replaced.key)
+                self._by_id[record.id] = record
+                self._by_link[record.link] = record.id
+            if len(records) >= BULK_INSERT:
+                self._order.extend(r.key for r in records)
+                self._order.sort()
+            else:
+                for record in records:
+                    bisect.insort(self._order, record.key)
+
+    @override
+    def get(self, id: str) -> Improvement:
+        record = self._by_id.get(id)
+        if record is None:
+            raise ImprovementNotFoundError
+        return record.to_improvement()
+
+    def _newest(self, keys: list[Key]) -> list[Improvement]:
+        return [self._by_id[id].to_improvement() for _, id in reversed(keys)]
+
+    @override
+    def get_all(self, last_n: int | None = None) -> list[Improvement]:
+        with self._lock:
+            keys = self._order[-last_n:] if last_n else self._order[:]
+            return self._newest(keys)
+
+    @override
+    def get_page(
+        self, limit: int, after: PageCursor | None = None
+    ) -> list[Improvement]:
+        with self._lock:
+            end = (
+                bisect.bisect_left(self._order, (after.date_ts, after.id))
+                if after
+                else len(self._order)
+            )
+            return self._newest(self._order[max(0, end - limit) : end])
+
+    @override
+    def existing_links(self, links: list[str]) -> set[str]:
+        return {link for link in links if link in self._by_link}
+
+    @override
+    def remove(self, id: str) -> Improvement:
+        removed = self.remove_all([id])
+        if not removed:
+            raise ImprovementNotFoundError
+        return removed[0]
+
+    @override
+    def remove_all(self, ids: list[str]) -> list[Improvement]:
+        removed: list[Improvement] = []
+        with self._lock:
+            for id in ids:
+                record = self._by_id.get(id)
+                if record is None:
+                    continue
+                self._unlink(record)
+                self._drop_key(record.key)
+                removed.append(record.to_improvement())
+        return removed
+
+    def _drop_oldest(self, count: int) -> int:
+        for _, id in self._order[:count]:
+            self._unlink(self._by_id[id])
+        del self._order[:count]
+        return count
+
+    @override
+    def retain_newest(self, n: int) -> int:
+        if n < 1:
+            raise ValueError("Need to retain at least one improvement")
+        with self._lock:
+            if len(self._order) <= n:
+                return 0
+            # like the stores, keeps all improvements as old as the n-th newest
+            cutoff = self._order[-n][0]
+            return self._drop_oldest(bisect.bisect_left(self._order, (cutoff, "")))
+
+    @override
+    def delete_older_than(self, ts: datetime) -> int:
+        cutoff = int(ts.astimezone(timezone.utc).timestamp())
+        with self._lock:
+            return self._drop_oldest(bisect.bisect_left(self._order, (cutoff, "")))
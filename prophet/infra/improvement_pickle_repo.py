@@ -1,12 +1,65 @@
+import io
 import pickle
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import override
+from typing import Any, override
 
 from prophet.domain.improvement import Improvement
-from prophet.domain.improvement_repo import IImprovementRepo, ImprovementNotFoundError
+from prophet.domain.improvement_repo import (
+    IImprovementRepo,
+    ImprovementNotFoundError,
+    PageCursor,
+)
+from prophet.domain.original import Original
+from prophet.infra import improvement_codec as codec
+
+
+class _Pickled:
+    """Stands in for a model pickled before the models had slots."""
+
+    state: dict[str, Any]
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.state = state
+
+
+class _LegacyUnpickler(pickle.Unpickler):
+    @override
+    def find_class(self, module: str, name: str) -> Any:
+        if module in ("prophet.domain.improvement", "prophet.domain.original"):
+            return _Pickled
+        return super().find_class(module, name)
+
+
+def _unpickle(data: bytes) -> Improvement:
+    imp = _LegacyUnpickler(io.BytesIO(data)).load().state
+    orig = imp["original"].state
+    return Improvement.restore(
+        original=Original.restore(
+            title=orig["title"],
+            summary=orig["summary"],
+            link=orig["link"],
+            date=orig["date"],
+            image_link=orig.get("image_link"),
+            id=orig["id"],
+        ),
+        title=imp["title"],
+        summary=imp["summary"],
+        id=imp["id"],
+        suggestions=imp.get("suggestions", []),
+    )
+
+
+def _date_ts(imp: Improvement) -> int:
+    """The original date in UTC seconds, comparable whether the date is
+    naive or not, as the stores compare date_orig_ts."""
+    return PageCursor.after(imp).date_ts
 
 
 class ImprovementPickleRepo(IImprovementRepo):
+    """One file per improvement, named by its id, in the codec's format.
+    Files pickled by earlier versions are still read."""
+
     pickle_dir: Path
 
     def __init__(self, pickle_dir: str | Path = "/tmp/pollenprophet") -> None:
@@ -18,7 +71,7 @@ class ImprovementPickleRepo(IImprovementRepo):
         fname = self.pickle_dir / improvement.id
         try:
             with open(fname, "wb") as f:
-                pickle.dump(improvement, f)
+                _ = f.write(codec.dumps([improvement]))
                 print(f"Saved {fname}")
         except FileExistsError:
             print(f"Error saving file {fname}")
@@ -31,19 +84,81 @@ class ImprovementPickleRepo(IImprovementRepo):
     @override
     def get(self, id: str) -> Improvement:
         try:
-            with open(self.pickle_dir / id, "rb") as f:
-                improvement: Improvement = pickle.load(f)
-        except FileNotFoundError:
-            raise ImprovementNotFoundError
-
-        return improvement
+            data = (self.pickle_dir / id).read_bytes()
+            if data.startswith(b"{"):
+                return codec.loads(data)[0]
+            return _unpickle(data)
+        except FileNotFoundError as e:
+            raise ImprovementNotFoundError from e
+        except (pickle.UnpicklingError, ValueError, KeyError, EOFError) as e:
+            raise ImprovementNotFoundError from e
 
     @override
-    def get_all(self) -> list[Improvement]:
+    def get_all(self, last_n: int | None = None) -> list[Improvement]:
         improvements: list[Improvement] = []
         for fname in Path(self.pickle_dir).iterdir():
             try:
                 improvements.append(self.get(fname.name))
             except ImprovementNotFoundError:
                 print(f"File {fname.absolute()} is not a valid Improvement.")
-        return improvements
+        improvements.sort(key=_date_ts, reverse=True)
+        return improvements[:last_n] if last_n else improvements
+
+    @override
+    def remove(self, id: str) -> Improvement:
+        improvement = self.get(id)
+        (self.pickle_dir / id).unlink()
+        return improvement
+
+    @override
+    def remove_all(self, ids: list[str]) -> list[Improvement]:
+        removed: list[Improvement] = []
+        for id in ids:
+            try:
+                removed.append(self.remove(id))
+            except ImprovementNotFoundError:
+                pass
+        return removed
+
+    @override
+    def get_page(
+        self, limit: int, after: PageCursor | None = None
+    ) -> list[Improvement]:
+        keyed = sorted(
+            ((PageCursor.after(imp), imp) for imp in self.get_all()),
+            key=lambda k: (k[0].date_ts, k[0].id),
+            reverse=True,
+        )
+        if after:
+            keyed = [
+                k for k in keyed if (k[0].date_ts, k[0].id) < (after.date_ts, after.id)
+            ]
+        return [imp for _, imp in keyed[:limit]]
+
+    @override
+    def existing_links(self, links: list[str]) -> set[str]:
+        stored = {imp.original.link for imp in self.get_all()}
+        return stored.intersection(links)
+
+    @override
+    def retain_newest(self, n: int) -> int:
+        if n < 1:
+            raise ValueError("Need to retain at least one improvement")
+        improvements = self.get_all()
+        if len(improvements) <= n:
+            return 0
+        # like the other stores, keeps all improvements as old as the n-th
+        return self._delete_before(improvements, _date_ts(improvements[n - 1]))
+
+    @override
+    def delete_older_than(self, ts: datetime) -> int:
+        cutoff = int(ts.astimezone(timezone.utc).timestamp())
+        return self._delete_before(self.get_all(), cutoff)
+
+    def _delete_before(self, improvements: list[Improvement], cutoff: int) -> int:
+        deleted = 0
+        for imp in improvements:
+            if _date_ts(imp) < cutoff:
+                (self.pickle_dir / imp.id).unlink(missing_ok=True)
+                deleted += 1
+        return deleted
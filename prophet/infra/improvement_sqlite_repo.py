@@ -0,0 +1,186 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import override
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.improvement_repo import (
+    IImprovementRepo,
+    ImprovementNotFoundError,
+    PageCursor,
+)
+from prophet.infra import improvement_codec as codec
+
+COLUMNS = codec.FIELDS
+SELECT = f"SELECT {', '.join(COLUMNS)} FROM improvements"
+
+type Row = tuple[str, str, str, str, str, str, str, int, str]
+
+
+class ImprovementSqliteRepo(IImprovementRepo):
+    """Local store keeping all improvements in a single SQLite file.
+
+    Uses the same columns as the Supabase table, with an index on
+    (date_orig_ts, uuid) for ordered listing, paging and retention and one
+    on link_orig for deduplication.
+    """
+
+    db_path: Path
+    conn: sqlite3.Connection
+
+    def __init__(
+        self, db_path: str | Path = "/tmp/pollenprophet/improvements.sqlite"
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            _ = self.conn.execute("PRAGMA journal_mode=WAL")
+            _ = self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS improvements (
+                    uuid TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    title_orig TEXT NOT NULL,
+                    summary_orig TEXT NOT NULL,
+                    link_orig TEXT NOT NULL,
+                    image_link_orig TEXT NOT NULL,
+                    date_orig_ts INTEGER NOT NULL,
+                    suggestions TEXT NOT NULL DEFAULT '[]'
+                )"""
+            )
+            columns = {
+                row[1] for row in self.conn.execute("PRAGMA table_info(improvements)")
+            }
+            if "suggestions" not in columns:  # created before vote mode
+                _ = self.conn.execute(
+                    "ALTER TABLE improvements "
+                    + "ADD COLUMN suggestions TEXT NOT NULL DEFAULT '[]'"
+                )
+            _ = self.conn.execute(
+                """CREATE INDEX IF NOT EXISTS improvements_date
+                ON improvements(date_orig_ts, uuid)"""
+            )
+            _ = self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS improvements_link ON improvements(link_orig)"
+            )
+
+    @override
+    def add(self, improvement: Improvement) -> None:
+        self.add_all([improvement])
+
+    @override
+    def add_all(self, improvements: list[Improvement]) -> None:
+        with self._lock, self.conn:
+            _ = self.conn.executemany(
+                f"INSERT OR REPLACE INTO improvements ({', '.join(COLUMNS)}) "
+                + f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                [self._to_row(imp) for imp in improvements],
+            )
+
+    @override
+    def get(self, id: str) -> Improvement:
+        with self._lock:
+            row = self.conn.execute(f"{SELECT} WHERE uuid = ?", (id,)).fetchone()
+        if row is None:
+            raise ImprovementNotFoundError
+        return self._from_row(row)
+
+    @override
+    def get_all(self, last_n: int | None = None) -> list[Improvement]:
+        with self._lock:
+            rows = self.conn.execute(
+                f"{SELECT} ORDER BY date_orig_ts DESC, uuid DESC LIMIT ?",
+                (last_n if last_n else -1,),
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    @override
+    def get_page(
+        self, limit: int, after: PageCursor | None = None
+    ) -> list[Improvement]:
+        with self._lock:
+            if after:
+                rows = self.conn.execute(
+                    f"""{SELECT} WHERE (date_orig_ts, uuid) < (?, ?)
+                    ORDER BY date_orig_ts DESC, uuid DESC LIMIT ?""",
+                    (after.date_ts, after.id, limit),
+                ).fetchall()
+            else:
+                rows = self.conn.execute(
+                    f"{SELECT} ORDER BY date_orig_ts DESC, uuid DESC LIMIT ?",
+                    (limit,),
+                ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    @override
+    def existing_links(self, links: list[str]) -> set[str]:
+        if not links:
+            return set()
+        with self._lock:
+            rows = self.conn.execute(
+                f"""SELECT link_orig FROM improvements
+                WHERE link_orig IN ({", ".join("?" * len(links))})""",
+                links,
+            ).fetchall()
+        return {str(row[0]) for row in rows}
+
+    @override
+    def remove(self, id: str) -> Improvement:
+        removed = self.remove_all([id])
+        if not removed:
+            raise ImprovementNotFoundError
+        return removed[0]
+
+    @override
+    def remove_all(self, ids: list[str]) -> list[Improvement]:
+        if not ids:
+            return []
+        with self._lock, self.conn:
+            rows = self.conn.execute(
+                f"""DELETE FROM improvements WHERE uuid IN ({", ".join("?" * len(ids))})
+                RETURNING {", ".join(COLUMNS)}""",
+                ids,
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    @override
+    def retain_newest(self, n: int) -> int:
+        if n < 1:
+            raise ValueError("Need to retain at least one improvement")
+        with self._lock, self.conn:
+            cutoff = self.conn.execute(
+                """SELECT date_orig_ts FROM improvements
+                ORDER BY date_orig_ts DESC LIMIT 1 OFFSET ?""",
+                (n - 1,),
+            ).fetchone()
+            if cutoff is None:
+                return 0
+            # like the other stores, keeps all improvements as old as the n-th
+            return self.conn.execute(
+                "DELETE FROM improvements WHERE date_orig_ts < ?", cutoff
+            ).rowcount
+
+    @override
+    def delete_older_than(self, ts: datetime) -> int:
+        with self._lock, self.conn:
+            return self.conn.execute(
+                "DELETE FROM improvements WHERE date_orig_ts < ?",
+                (int(ts.astimezone(timezone.utc).timestamp()),),
+            ).rowcount
+
+    def compact(self) -> None:
+        """Reclaims the space of deleted rows and refreshes index statistics."""
+        with self._lock:
+            _ = self.conn.execute("VACUUM")
+            _ = self.conn.execute("PRAGMA optimize")
+
+    def _to_row(self, imp: Improvement) -> Row:
+        values = codec.to_values(imp)
+        return values[:-1] + (json.dumps(values[-1]),)
+
+    def _from_row(self, row: Row) -> Improvement:
+        return codec.from_values(*row[:-1], json.loads(row[-1]))
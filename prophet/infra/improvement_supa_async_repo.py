@@ -0,0 +1,150 @@
+from datetime import datetime, timezone
+from typing import override
+
+from postgrest import APIError, CountMethod, ReturnMethod
+from supabase import AsyncClient
+
+from prophet.config import SupaConfig
+from prophet.domain.improvement import Improvement
+from prophet.domain.improvement_repo import (
+    IAsyncImprovementRepo,
+    ImprovementNotFoundError,
+    PageCursor,
+)
+from prophet.infra import improvement_codec as codec
+from prophet.infra.improvement_supa_repo import (
+    MISSING_SUGGESTIONS,
+    missing_suggestions,
+    page_filter,
+)
+
+
+class AsyncImprovementSupaRepo(IAsyncImprovementRepo):
+    """Supabase repo which awaits its queries instead of blocking the loop.
+
+    All queries share the client's single PostgREST session, so HTTP
+    connections are kept alive and reused between requests.
+    """
+
+    config: SupaConfig
+    client: AsyncClient
+
+    def __init__(self, config: SupaConfig | None = None) -> None:
+        self.config = config if config else SupaConfig.from_env()
+        self.client = AsyncClient(self.config.URL, self.config.KEY)
+
+    async def aclose(self) -> None:
+        await self.client.postgrest.aclose()
+
+    @override
+    async def add(self, improvement: Improvement) -> None:
+        await self.add_all([improvement])
+
+    @override
+    async def add_all(self, improvements: list[Improvement]) -> None:
+        table = self.client.table(self.config.TABLE)
+        try:
+            # rows left without suggestions take the column default, not null
+            _ = await table.insert(
+                [codec.to_row(i) for i in improvements], default_to_null=False
+            ).execute()
+        except APIError as e:
+            if not missing_suggestions(e):
+                raise
+            print(MISSING_SUGGESTIONS)
+            rows = [codec.to_row(i, suggestions=False) for i in improvements]
+            _ = await table.insert(rows).execute()
+
+    @override
+    async def get(self, id: str) -> Improvement:
+        resp = (
+            await self.client.table(self.config.TABLE)
+            .select("*")
+            .eq("uuid", id)
+            .execute()
+        )
+        if not resp.data:
+            raise ImprovementNotFoundError
+        return codec.from_record(resp.data[0])
+
+    @override
+    async def get_all(self, last_n: int | None = None) -> list[Improvement]:
+        sql = (
+            self.client.table(self.config.TABLE)
+            .select("*")
+            .order("date_orig_ts", desc=True)
+        )
+        if last_n:
+            sql = sql.limit(last_n)
+        return [codec.from_record(row) for row in (await sql.execute()).data]
+
+    @override
+    async def get_page(
+        self, limit: int, after: PageCursor | None = None
+    ) -> list[Improvement]:
+        sql = self.client.table(self.config.TABLE).select("*")
+        if after:
+            sql = sql.or_(page_filter(after))
+        sql = sql.order("date_orig_ts", desc=True).order("uuid", desc=True).limit(limit)
+        return [codec.from_record(row) for row in (await sql.execute()).data]
+
+    @override
+    async def existing_links(self, links: list[str]) -> set[str]:
+        if not links:
+            return set()
+        resp = (
+            await self.client.table(self.config.TABLE)
+            .select("link_orig")
+            .in_("link_orig", links)
+            .execute()
+        )
+        return {str(row["link_orig"]) for row in resp.data}
+
+    @override
+    async def remove(self, id: str) -> Improvement:
+        resp = (
+            await self.client.table(self.config.TABLE).delete().eq("uuid", id).execute()
+        )
+        if not resp.data:
+            raise ValueError
+        return codec.from_record(resp.data[0])
+
+    @override
+    async def remove_all(self, ids: list[str]) -> list[Improvement]:
+        resp = (
+            await self.client.table(self.config.TABLE)
+            .delete()
+            .in_("uuid", ids)
+            .execute()
+        )
+        if not resp.data:
+            raise ValueError
+        return [codec.from_record(item) for item in resp.data]
+
+    @override
+    async def retain_newest(self, n: int) -> int:
+        if n < 1:
+            raise ValueError("Need to retain at least one improvement")
+        resp = (
+            await self.client.table(self.config.TABLE)
+            .select("date_orig_ts")
+            .order("date_orig_ts", desc=True)
+            .range(n - 1, n - 1)
+            .execute()
+        )
+        if not resp.data:
+            return 0
+        return await self._delete_before(int(resp.data[0]["date_orig_ts"]))
+
+    @override
+    async def delete_older_than(self, ts: datetime) -> int:
+        return await self._delete_before(int(ts.astimezone(timezone.utc).timestamp()))
+
+    async def _delete_before(self, ts: int) -> int:
+        resp = (
+            await self.client.table(self.config.TABLE)
+            .delete(count=CountMethod.exact, returning=ReturnMethod.minimal)
+            .lt("date_orig_ts", ts)
+            .execute()
+        )
+        return resp.count or 0
@@ -1,12 +1,33 @@
 from datetime import datetime, timezone
 from typing import override
 
+from postgrest import APIError, CountMethod, ReturnMethod
 from supabase import Client
 
 from prophet.config import SupaConfig
 from prophet.domain.improvement import Improvement
-from prophet.domain.improvement_repo import IImprovementRepo
-from prophet.domain.original import Original
+from prophet.domain.improvement_repo import IImprovementRepo, PageCursor
+from prophet.infra import improvement_codec as codec
+
+
+def page_filter(after: PageCursor) -> str:
+    """PostgREST or_ filter for rows after the cursor in newest-first order."""
+    return (
+        f"date_orig_ts.lt.{after.date_ts},"
+        f"and(date_orig_ts.eq.{after.date_ts},uuid.lt.{after.id})"
+    )
+
+
+def missing_suggestions(e: APIError) -> bool:
+    """Whether an insert failed as the table has no `suggestions` column yet,
+    see supabase/migrations."""
+    return e.code == "PGRST204" and "'suggestions'" in (e.message or "")
+
+
+MISSING_SUGGESTIONS = (
+    "The improvements table has no suggestions column, storing without them. "
+    + "Apply supabase/migrations to keep them."
+)
 
 
 class ImprovementSupaRepo(IImprovementRepo):
@@ -23,23 +44,26 @@ class ImprovementSupaRepo(IImprovementRepo):
 
     @override
     def add(self, improvement: Improvement) -> None:
-        _ = (
-            self.client.table(self.config.TABLE)
-            .insert(self._to_tbl_row(improvement))
-            .execute()
-        )
+        self.add_all([improvement])
 
     @override
     def add_all(self, improvements: list[Improvement]) -> None:
-        _ = (
-            self.client.table(self.config.TABLE)
-            .insert([self._to_tbl_row(i) for i in improvements])
-            .execute()
-        )
+        table = self.client.table(self.config.TABLE)
+        try:
+            # rows left without suggestions take the column default, not null
+            _ = table.insert(
+                [codec.to_row(i) for i in improvements], default_to_null=False
+            ).execute()
+        except APIError as e:
+            if not missing_suggestions(e):
+                raise
+            print(MISSING_SUGGESTIONS)
+            rows = [codec.to_row(i, suggestions=False) for i in improvements]
+            _ = table.insert(rows).execute()
 
     @override
     def get(self, id: str) -> Improvement:
-        return self._from_tbl_row(
+        return codec.from_record(
             self.client.table(self.config.TABLE)
             .select("*")
             .eq("uuid", id)
@@ -63,7 +87,29 @@ class ImprovementSupaRepo(IImprovementRepo):
                 .limit(last_n)
             )
 
-        return [self._from_tbl_row(row) for row in sql.execute().data]
+        return [codec.from_record(row) for row in sql.execute().data]
+
+    @override
+    def get_page(
+        self, limit: int, after: PageCursor | None = None
+    ) -> list[Improvement]:
+        sql = self.client.table(self.config.TABLE).select("*")
+        if after:
+            sql = sql.or_(page_filter(after))
+        sql = sql.order("date_orig_ts", desc=True).order("uuid", desc=True).limit(limit)
+        return [codec.from_record(row) for row in sql.execute().data]
+
+    @override
+    def existing_links(self, links: list[str]) -> set[str]:
+        if not links:
+            return set()
+        resp = (
+            self.client.table(self.config.TABLE)
+            .select("link_orig")
+            .in_("link_orig", links)
+            .execute()
+        )
+        return {str(row["link_orig"]) for row in resp.data}
 
     @override
     def remove(self, id: str) -> Improvement:
@@ -72,7 +118,7 @@ class ImprovementSupaRepo(IImprovementRepo):
         )
         if not resp:
             raise ValueError
-        return self._from_tbl_row(resp[0])
+        return codec.from_record(resp[0])
 
     @override
     def remove_all(self, ids: list[str]) -> list[Improvement]:
@@ -85,33 +131,37 @@ class ImprovementSupaRepo(IImprovementRepo):
         )
         if not resp:
             raise ValueError
-        return [self._from_tbl_row(item) for item in resp]
-
-    def _to_tbl_row(self, imp: Improvement) -> dict[str, str | int]:
-        return {
-            "uuid": imp.id,
-            "title": imp.title,
-            "summary": imp.summary,
-            "title_orig": imp.original.title,
-            "summary_orig": imp.original.summary,
-            "link_orig": imp.original.link,
-            "image_link_orig": imp.original.image_link or "",
-            "date_orig_ts": int(imp.original.date.astimezone(timezone.utc).timestamp()),
-        }
-
-    def _from_tbl_row(self, row: dict[str, str | int]) -> Improvement:
-        return Improvement(
-            id=str(row["uuid"]),
-            title=str(row["title"]),
-            summary=str(row["summary"]),
-            original=Original(
-                title=str(row["title_orig"]),
-                summary=str(row["summary_orig"]),
-                link=str(row["link_orig"]),
-                date=datetime.fromtimestamp(int(row["date_orig_ts"]), tz=timezone.utc),
-                image_link=str(row["image_link_orig"]),
-            ),
+        return [codec.from_record(item) for item in resp]
+
+    @override
+    def retain_newest(self, n: int) -> int:
+        if n < 1:
+            raise ValueError("Need to retain at least one improvement")
+        rows = (
+            self.client.table(self.config.TABLE)
+            .select("date_orig_ts")
+            .order("date_orig_ts", desc=True)
+            .range(n - 1, n - 1)
+            .execute()
+            .data
+        )
+        if not rows:
+            return 0
+        return self._delete_before(int(rows[0]["date_orig_ts"]))
+
+    @override
+    def delete_older_than(self, ts: datetime) -> int:
+        return self._delete_before(int(ts.astimezone(timezone.utc).timestamp()))
+
+    def _delete_before(self, ts: int) -> int:
+        """Single ranged delete, only the affected row count travels back."""
+        resp = (
+            self.client.table(self.config.TABLE)
+            .delete(count=CountMethod.exact, returning=ReturnMethod.minimal)
+            .lt("date_orig_ts", ts)
+            .execute()
         )
+        return resp.count or 0
 
 
 if __name__ == "__main__":
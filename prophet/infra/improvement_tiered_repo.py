@@ -0,0 +1,168 @@
+import asyncio
+import time
+from collections.abc import Callable
+from datetime import datetime
+from typing import override
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.improvement_repo import (
+    IAsyncImprovementRepo,
+    IImprovementRepo,
+    PageCursor,
+)
+from prophet.infra.improvement_memory_repo import ImprovementMemoryRepo
+
+RETRY_AFTER = 60  # seconds between attempts to load a cold tier
+
+
+class TieredImprovementRepo(IAsyncImprovementRepo):
+    """Write-through memory tier in front of a backing store.
+
+    Once warm, every read is answered from an `ImprovementMemoryRepo` and
+    never leaves the process. Writes go to the backing store first and are
+    mirrored into memory once they succeeded. Until the first load finishes,
+    reads fall through to the backing store. Other processes may write to
+    the same store, so after `ttl` seconds the whole tier is reloaded in the
+    background while reads keep being served from the old copy.
+    """
+
+    backing: IAsyncImprovementRepo
+    ttl: float | None
+    memory: ImprovementMemoryRepo | None
+    loaded_at: float | None
+
+    def __init__(
+        self, backing: IAsyncImprovementRepo, ttl: float | None = None
+    ) -> None:
+        self.backing = backing
+        self.ttl = ttl
+        self.memory = None
+        self.loaded_at = None
+        self._failed_at: float | None = None
+        self._loading: asyncio.Task[None] | None = None
+        # writes landing while a reload is under way, replayed onto its result
+        self._missed: list[Callable[[IImprovementRepo], object]] = []
+
+    async def warm(self) -> None:
+        """Loads the tier, or waits for the load already under way."""
+        if self._loading is None:
+            self._loading = asyncio.create_task(self._load())
+        await asyncio.shield(self._loading)
+
+    async def _load(self) -> None:
+        self._missed = []
+        try:
+            improvements = await self.backing.get_all()
+            memory = ImprovementMemoryRepo()
+            await asyncio.to_thread(memory.add_all, improvements)
+        except Exception:
+            self._failed_at = time.monotonic()
+            raise
+        finally:
+            self._loading = None
+        for write in self._missed:
+            _ = write(memory)
+        self._missed = []
+        self.memory = memory
+        self.loaded_at = time.monotonic()
+        self._failed_at = None
+
+    def _reload_in_background(self) -> None:
+        if self._loading is not None:
+            return
+        self._loading = asyncio.create_task(self._load())
+        self._loading.add_done_callback(self._report)
+
+    @staticmethod
+    def _report(task: asyncio.Task[None]) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Could not reload improvements: {task.exception()}")
+
+    async def _warm_memory(self) -> ImprovementMemoryRepo | None:
+        """The memory tier if it can answer reads, loading it when cold."""
+        now = time.monotonic()
+        if self.memory is not None and self.loaded_at is not None:
+            if self.ttl is not None and now - self.loaded_at >= self.ttl:
+                self._reload_in_background()
+            return self.memory
+        if self._failed_at is not None and now - self._failed_at < RETRY_AFTER:
+            return None
+        try:
+            await self.warm()
+        except Exception as e:  # noqa: BLE001
+            print(f"Could not load improvements, reading from the store: {e}")
+        return self.memory
+
+    def _mirror(self, write: Callable[[IImprovementRepo], object]) -> None:
+        if self.memory is not None:
+            _ = write(self.memory)
+        if self._loading is not None:
+            self._missed.append(write)
+
+    @override
+    async def add(self, improvement: Improvement) -> None:
+        await self.backing.add(improvement)
+        self._mirror(lambda repo: repo.add(improvement))
+
+    @override
+    async def add_all(self, improvements: list[Improvement]) -> None:
+        await self.backing.add_all(improvements)
+        self._mirror(lambda repo: repo.add_all(improvements))
+
+    @override
+    async def get(self, id: str) -> Improvement:
+        memory = await self._warm_memory()
+        if memory is None:
+            return await self.backing.get(id)
+        return memory.get(id)
+
+    @override
+    async def get_all(self, last_n: int | None = None) -> list[Improvement]:
+        memory = await self._warm_memory()
+        if memory is None:
+            return await self.backing.get_all(last_n)
+        return memory.get_all(last_n)
+
+    @override
+    async def get_page(
+        self, limit: int, after: PageCursor | None = None
+    ) -> list[Improvement]:
+        memory = await self._warm_memory()
+        if memory is None:
+            return await self.backing.get_page(limit, after)
+        return memory.get_page(limit, after)
+
+    @override
+    async def existing_links(self, links: list[str]) -> set[str]:
+        # used for deduplication right before writing, so links unknown here
+        # are confirmed with the store, in case another process stored them
+        memory = await self._warm_memory()
+        known = memory.existing_links(links) if memory is not None else set[str]()
+        unknown = [link for link in links if link not in known]
+        if unknown:
+            known |= await self.backing.existing_links(unknown)
+        return known
+
+    @override
+    async def remove(self, id: str) -> Improvement:
+        removed = await self.backing.remove(id)
+        self._mirror(lambda repo: repo.remove_all([id]))
+        return removed
+
+    @override
+    async def remove_all(self, ids: list[str]) -> list[Improvement]:
+        removed = await self.backing.remove_all(ids)
+        self._mirror(lambda repo: repo.remove_all(ids))
+        return removed
+
+    @override
+    async def retain_newest(self, n: int) -> int:
+        deleted = await self.backing.retain_newest(n)
+        self._mirror(lambda repo: repo.retain_newest(n))
+        return deleted
+
+    @override
+    async def delete_older_than(self, ts: datetime) -> int:
+        deleted = await self.backing.delete_older_than(ts)
+        self._mirror(lambda repo: repo.delete_older_than(ts))
+        return deleted
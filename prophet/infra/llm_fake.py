@@ -0,0 +1,106 @@
+import time
+from collections.abc import Iterator
+from typing import override
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.llm import LLMClient
+from prophet.domain.original import Original
+
+
+class FakeLLMClient(LLMClient):
+    """Offline stand-in for GroqClient.
+
+    Produces deterministic rewrites and sleeps for `latency` seconds per call,
+    imitating a blocking network round-trip.
+    """
+
+    latency: float
+    calls: int
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls = 0
+
+    def _wait(self) -> None:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @override
+    def rewrite(
+        self, original: Original, previous_titles: list[str] | None = None
+    ) -> Improvement:
+        suggestions = self.get_alternative_title_suggestions(
+            original.title, previous_titles
+        )
+        new_title = self.rewrite_title(original.title, suggestions)
+        new_summary = self.rewrite_summary(original, new_title)
+
+        return Improvement(
+            original=original,
+            title=new_title,
+            summary=new_summary,
+            suggestions=Improvement.candidates(new_title, suggestions),
+        )
+
+    @override
+    def rewrite_batch(
+        self, originals: list[Original], previous_titles: list[list[str]] | None = None
+    ) -> list[Improvement]:
+        self._wait()
+        return [
+            Improvement(
+                original=o,
+                title=f"{o.title} (1)",
+                summary=f"{o.title} (1): {o.summary}",
+                suggestions=[f"{o.title} ({i})" for i in range(1, 4)],
+            )
+            for o in originals
+        ]
+
+    def _stream_words(self, stage: str, text: str) -> Iterator[tuple[str, str]]:
+        self.calls += 1
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if self.latency:
+                time.sleep(self.latency / len(words))
+            yield (stage, word if i == 0 else f" {word}")
+
+    @override
+    def stream_title(self, original_content: str) -> Iterator[tuple[str, str]]:
+        suggestions = "\n".join(f"{original_content} ({i})" for i in range(1, 4))
+        yield from self._stream_words("suggestions", suggestions)
+        yield from self._stream_words("title", suggestions.splitlines()[0])
+
+    @override
+    def stream_summary(
+        self, original: Original, improved_title: str
+    ) -> Iterator[tuple[str, str]]:
+        yield from self._stream_words(
+            "summary", f"{improved_title}: {original.summary}"
+        )
+
+    @override
+    def get_alternative_title_suggestions(
+        self, original_content: str, previous_titles: list[str] | None = None
+    ) -> str:
+        self._wait()
+        return "\n".join(f"{original_content} ({i})" for i in range(1, 4))
+
+    @override
+    def rewrite_title(
+        self, original_content: str, suggestions: str | None = None
+    ) -> str:
+        if not suggestions:
+            suggestions = self.get_alternative_title_suggestions(original_content)
+        self._wait()
+        return suggestions.splitlines()[0]
+
+    @override
+    def rewrite_summary(
+        self, original: Original, improved_title: str | None = None
+    ) -> str:
+        if not improved_title:
+            improved_title = self.rewrite_title(original.title)
+        self._wait()
+        return f"{improved_title}: {original.summary}"
@@ -1,34 +1,588 @@
-from typing import override
+import json
+import random
+import re
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, override
 
-from groq import Groq
+import httpx
+from groq import (
+    APIConnectionError,
+    APIStatusError,
+    Groq,
+    InternalServerError,
+    RateLimitError,
+    Stream,
+)
+from groq.types.chat import ChatCompletion, ChatCompletionChunk
 
 from prophet.config import AiConfig
 from prophet.domain.improvement import Improvement
 from prophet.domain.llm import LLMClient
 from prophet.domain.original import Original
+from prophet.infra.completion_cache import CompletionCache
+from prophet.infra.llm_hedging import PRIMARY, Hedger
+from prophet.metrics import LLM_COMPLETIONS, LLM_STAGE_SECONDS, LLM_TOKENS
 
 AVOID_SHOCKING_TURN_OF_EVENTS: bool = True
 
+MAX_ATTEMPTS = 5  # per completion, including the first try
+BACKOFF_BASE = 1.0  # seconds, doubled on every retry
+BACKOFF_MAX = 60.0
+EXPECTED_COMPLETION_TOKENS = 256  # reserved up front, corrected from `usage`
+
+BATCH_PROMPT = f"""
+Political context: We are in the year 2025, Donald Trump is President of the
+United States again. There has been a crackdown on 'illegal' immigration, with
+controversial disappearings happening almost every day by masked ICE agents.
+Many view the United States as an increasingly fascist state, and the
+disappearings fueled by racism.
+
+You are a comedy writer and editor at a left-leaning satirical newspaper. You
+receive a JSON list of satirical articles, each with an id, a title and a
+summary. For every article:
+
+1. Write a few new headlines which are funny, can involve current political
+   events and have an edge to them. They should be roughly the length of the
+   original headline and stick close to its topic.
+2. Evaluate your suggestions: whether they are funny, follow a clear satirical
+   goal, have sufficient substance and bite and are roughly the length of the
+   original. Pick your favorite and make targeted revisions to it.
+3. Write an improved summary based on the original summary which fits the
+   revised headline.
+   {"Do not use the phrase: 'in a surprising turn of events' or 'in a shocking turn of events.'" if AVOID_SHOCKING_TURN_OF_EVENTS else ""}
+
+Do not name Trump in more than a third of the headlines unless he is
+referenced in the original, and do not repeat wording between articles. Some
+articles come with "previous_titles", headlines you wrote before for similar
+stories; do not repeat their wording either.
+
+Answer with a JSON object of the form
+{{"articles": [{{"id": <id>, "suggestions": [<str>, ...], "title": <str>, "summary": <str>}}]}}
+containing exactly one entry per given article.
+"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilling continuously up to `capacity`.
+
+    `acquire` blocks until enough tokens are available. The level may go
+    negative through `debit`, when a request turns out more expensive than
+    reserved, which delays subsequent callers accordingly.
+    """
+
+    capacity: float
+    rate: float  # tokens per second
+
+    def __init__(
+        self,
+        capacity: float,
+        per_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        self._clock = clock
+        self._sleep = sleep
+        self._level = capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._level = min(
+            self.capacity, self._level + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def acquire(
+        self, amount: float = 1.0, cancelled: threading.Event | None = None
+    ) -> bool:
+        """Takes `amount` tokens once available. Returns False without taking
+        any if `cancelled` is set while waiting."""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now >= self._paused_until and self._level >= amount:
+                    self._level -= amount
+                    return True
+                wait = max(self._paused_until - now, (amount - self._level) / self.rate)
+            if cancelled is None:
+                self._sleep(wait)
+            elif cancelled.wait(wait):
+                return False
+
+    def available(self) -> float:
+        """Tokens which can be acquired right now."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            return self._level if now >= self._paused_until else 0.0
+
+    def debit(self, amount: float) -> None:
+        """Takes (or, if negative, returns) tokens without waiting."""
+        with self._lock:
+            self._refill(self._clock())
+            self._level = min(self.capacity, self._level - amount)
+
+    def sync(self, remaining: float, reset_after: float | None = None) -> None:
+        """Aligns the bucket with the quota reported by the provider."""
+        with self._lock:
+            self._refill(self._clock())
+            self._level = min(self._level, remaining)
+        if remaining <= 0 and reset_after:
+            self.pause(reset_after)
+
+    def pause(self, seconds: float) -> None:
+        """Blocks all acquisitions for `seconds`."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def _parse_duration(value: str | None) -> float | None:
+    """Parses `retry-after` seconds or Groq reset durations like `2m59.56s`."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+def _record_usage(prompt_tokens: int, completion_tokens: int) -> None:
+    LLM_TOKENS.inc(prompt_tokens, kind="prompt")
+    LLM_TOKENS.inc(completion_tokens, kind="completion")
+
+
+def _estimate_tokens(messages: Iterable[dict[str, str]]) -> int:
+    chars = sum(len(m["content"]) for m in messages)
+    return chars // 4 + EXPECTED_COMPLETION_TOKENS
+
+
+class RateLimiter:
+    """Client-side requests- and tokens-per-minute budget for one API key.
+
+    Keeps the buckets in line with Groq's `x-ratelimit-*` response headers and
+    decides how long to back off after a failed request.
+    """
+
+    requests: TokenBucket
+    tokens: TokenBucket
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.requests = TokenBucket(requests_per_minute, sleep=sleep)
+        self.tokens = TokenBucket(tokens_per_minute, sleep=sleep)
+        self.sleep = sleep
+
+    def acquire(
+        self, estimated_tokens: int, cancelled: threading.Event | None = None
+    ) -> bool:
+        """Waits until a request may be sent. Returns False, leaving the
+        budget untouched, if `cancelled` is set first."""
+        if not self.requests.acquire(1, cancelled):
+            return False
+        if not self.tokens.acquire(estimated_tokens, cancelled):
+            self.requests.debit(-1)
+            return False
+        return True
+
+    def has_room(self, estimated_tokens: int) -> bool:
+        """Whether another request would be sent right away."""
+        return (
+            self.requests.available() >= 1
+            and self.tokens.available() >= estimated_tokens
+        )
+
+    def settle(self, estimated_tokens: int, used_tokens: int | None) -> None:
+        if used_tokens is not None:
+            self.tokens.debit(used_tokens - estimated_tokens)
+
+    def observe(self, headers: httpx.Headers) -> None:
+        remaining_req = headers.get("x-ratelimit-remaining-requests")
+        if remaining_req is not None:
+            self.requests.sync(
+                float(remaining_req),
+                _parse_duration(headers.get("x-ratelimit-reset-requests")),
+            )
+        remaining_tok = headers.get("x-ratelimit-remaining-tokens")
+        if remaining_tok is not None:
+            self.tokens.sync(
+                float(remaining_tok),
+                _parse_duration(headers.get("x-ratelimit-reset-tokens")),
+            )
+
+    def backoff(self, attempt: int, response: httpx.Response | None) -> float:
+        """Seconds to wait before retry number `attempt` (starting at 1).
+
+        Groq sends its reset durations with every response, and the one for
+        requests is the daily window, so they only count on a 429 and only
+        for the quota which actually ran out. Everything else backs off
+        exponentially."""
+        if response is not None and response.status_code == 429:
+            headers = response.headers
+            retry_after = _parse_duration(headers.get("retry-after"))
+            if retry_after:
+                # everyone sharing the quota waits, not just this request
+                self.requests.pause(retry_after)
+            hinted = retry_after or 0.0
+            for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                reset = _parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if remaining is not None and float(remaining) <= 0 and reset:
+                    bucket.pause(reset)
+                    hinted = max(hinted, reset)
+            if hinted:
+                return hinted
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+
+def parse_batch_response(
+    content: str, count: int
+) -> dict[int, tuple[str, str, list[str]]]:
+    """Maps article index to (title, summary, suggestions) for every
+    well-formed entry. Suggestions which are no strings are dropped.
+
+    Tolerates code fences, a bare list instead of the wrapping object and
+    entries without ids, but skips entries with unknown or duplicate ids
+    and missing or empty fields.
+    """
+    text = content.strip()
+    if text.startswith("```"):
+        text = text.strip("`").removeprefix("json").strip()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {}
+    items = data.get("articles") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return {}
+
+    results: dict[int, tuple[str, str, list[str]]] = {}
+    for pos, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        try:
+            idx = int(item.get("id", pos))
+        except (TypeError, ValueError):
+            continue
+        title, summary = item.get("title"), item.get("summary")
+        if not (isinstance(title, str) and isinstance(summary, str)):
+            continue
+        title, summary = title.strip(" \"'"), summary.strip(" \"'")
+        suggestions = item.get("suggestions")
+        if not isinstance(suggestions, list):
+            suggestions = []
+        suggestions = [s for s in suggestions if isinstance(s, str)]
+        if 0 <= idx < count and idx not in results and title and summary:
+            results[idx] = (title, summary, suggestions)
+    return results
+
 
 class GroqClient(LLMClient):
+    """Completions from Groq within the rate limits, cached, and hedged or
+    answered by a faster model per the stage's latency budget, see `Hedger`."""
+
     config_ai: AiConfig
     client: Groq
+    limiter: RateLimiter
+    cache: CompletionCache | None
+    hedger: Hedger
 
     def __init__(
-        self, config_ai: AiConfig | None = None, client: Groq | None = None
+        self,
+        config_ai: AiConfig | None = None,
+        client: Groq | None = None,
+        limiter: RateLimiter | None = None,
+        cache: CompletionCache | None = None,
+        hedger: Hedger | None = None,
     ) -> None:
         self.config_ai = config_ai if config_ai else AiConfig.from_env()
-        self.client = client if client else Groq(api_key=self.config_ai.API_KEY)
+        # retries are scheduled by our limiter, not the SDK
+        self.client = (
+            client if client else Groq(api_key=self.config_ai.API_KEY, max_retries=0)
+        )
+        self.limiter = (
+            limiter
+            if limiter
+            else RateLimiter(
+                self.config_ai.REQUESTS_PER_MINUTE, self.config_ai.TOKENS_PER_MINUTE
+            )
+        )
+        self.cache = cache if cache else CompletionCache(self.config_ai.CACHE_PATH)
+        self.hedger = (
+            hedger
+            if hedger
+            else Hedger(
+                self.config_ai.MODEL,
+                self.config_ai.FALLBACK_MODEL,
+                self.config_ai.STAGE_BUDGETS,
+            )
+        )
+
+    def _complete(
+        self,
+        messages: list[dict[str, str]],
+        json_mode: bool = False,
+        stage: str = "other",
+    ) -> str:
+        """Runs one chat completion, see `_send`, through the hedger.
+
+        Identical requests are answered from the completion cache. Every
+        answer is counted by the model and path which produced it."""
+        with LLM_STAGE_SECONDS.time(stage=stage):
+            cached = self._cached(messages, self.hedger.model, json_mode)
+            if cached is not None:
+                LLM_COMPLETIONS.inc(stage=stage, model=self.hedger.model, path="cache")
+                return cached
+
+            estimated = _estimate_tokens(messages)
+            content, route = self.hedger.run(
+                stage,
+                lambda model: self._complete_uncounted(
+                    messages, model, json_mode, admitted=True
+                ),
+                admit=lambda cancelled: self.limiter.acquire(estimated, cancelled),
+                can_hedge=lambda: self.limiter.has_room(estimated),
+            )
+        LLM_COMPLETIONS.inc(stage=stage, model=route.model, path=route.path)
+        if route.path != PRIMARY:
+            print(
+                f"{stage} answered by {route.model} ({route.path}) "
+                + f"after {route.seconds:.2f}s"
+            )
+        return content
+
+    @staticmethod
+    def _cache_key(messages: list[dict[str, str]], model: str, json_mode: bool) -> str:
+        return CompletionCache.key(f"{model}#json" if json_mode else model, messages)
+
+    def _cached(
+        self, messages: list[dict[str, str]], model: str, json_mode: bool
+    ) -> str | None:
+        if self.cache is None:
+            return None
+        return self.cache.get(self._cache_key(messages, model, json_mode))
+
+    def _complete_uncounted(
+        self,
+        messages: list[dict[str, str]],
+        model: str,
+        json_mode: bool,
+        admitted: bool = False,
+    ) -> str:
+        cache_key = self._cache_key(messages, model, json_mode)
+        extra_args: dict[str, Any] = (
+            {"response_format": {"type": "json_object"}} if json_mode else {}
+        )
+        estimated = _estimate_tokens(messages)
+        completion: ChatCompletion = self._send(
+            estimated, admitted, messages=messages, model=model, **extra_args
+        ).parse()
+        usage = completion.usage
+        self.limiter.settle(estimated, usage.total_tokens if usage else None)
+        if usage:
+            _record_usage(usage.prompt_tokens, usage.completion_tokens)
+        content: str | None = completion.choices[0].message.content
+        if not content:
+            raise ValueError
+        if self.cache is not None:
+            self.cache.put(cache_key, content)
+        return content
+
+    def _stream(
+        self, messages: list[dict[str, str]], stage: str = "other"
+    ) -> Iterator[str]:
+        """Yields the completion piece by piece as the model produces it.
+
+        Shares the cache with `_complete`; a cached completion is yielded
+        whole. Retries only happen before the first piece arrives. Streams
+        are not hedged, their pieces already reach the client as they come."""
+        # timed until the last piece, excluding the time the consumer holds us
+        start = time.perf_counter()
+        held = 0.0
+        for piece in self._stream_uncounted(messages, self.hedger.model):
+            paused = time.perf_counter()
+            yield piece
+            held += time.perf_counter() - paused
+        LLM_STAGE_SECONDS.observe(time.perf_counter() - start - held, stage=stage)
+        LLM_COMPLETIONS.inc(stage=stage, model=self.hedger.model, path=PRIMARY)
+
+    def _stream_uncounted(
+        self, messages: list[dict[str, str]], model: str
+    ) -> Iterator[str]:
+        cache_key = self._cache_key(messages, model, json_mode=False)
+        cached = self._cached(messages, model, json_mode=False)
+        if cached is not None:
+            yield cached
+            return
+
+        estimated = _estimate_tokens(messages)
+        stream: Stream[ChatCompletionChunk] = self._send(
+            estimated, messages=messages, model=model, stream=True
+        ).parse()
+        parts: list[str] = []
+        used_tokens: int | None = None
+        for chunk in stream:
+            if chunk.x_groq and chunk.x_groq.usage:
+                used_tokens = chunk.x_groq.usage.total_tokens
+                _record_usage(
+                    chunk.x_groq.usage.prompt_tokens,
+                    chunk.x_groq.usage.completion_tokens,
+                )
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
+        self.limiter.settle(estimated, used_tokens)
+
+        content = "".join(parts)
+        if not content:
+            raise ValueError
+        if self.cache is not None:
+            self.cache.put(cache_key, content)
+
+    def _send(
+        self, estimated_tokens: int, admitted: bool = False, **create_args: Any
+    ) -> Any:
+        """Sends one request within the rate limits, retrying on 429s, server
+        errors and dropped connections. Returns the raw response.
+
+        `admitted` means the rate limiter was already passed for the first
+        attempt, as the hedger does to time requests from then on."""
+        attempt = 0
+        while True:
+            attempt += 1
+            if attempt > 1 or not admitted:
+                _ = self.limiter.acquire(estimated_tokens)
+            try:
+                raw = self.client.chat.completions.with_raw_response.create(
+                    **create_args
+                )
+            except (RateLimitError, InternalServerError, APIConnectionError) as e:
+                self.limiter.settle(estimated_tokens, 0)
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                response = e.response if isinstance(e, APIStatusError) else None
+                delay = self.limiter.backoff(attempt, response)
+                print(f"LLM request failed ({type(e).__name__}), retry in {delay:.1f}s")
+                self.limiter.sleep(delay)
+                continue
+
+            self.limiter.observe(raw.headers)
+            return raw
 
     @override
     def rewrite(
         self, original: Original, previous_titles: list[str] | None = None
     ) -> Improvement:
-        suggestions = self.get_alternative_title_suggestions(original.title)
+        suggestions = self.get_alternative_title_suggestions(
+            original.title, previous_titles
+        )
         new_title = self.rewrite_title(original.title, suggestions)
         new_summary = self.rewrite_summary(original, new_title)
 
-        return Improvement(original=original, title=new_title, summary=new_summary)
+        return Improvement(
+            original=original,
+            title=new_title,
+            summary=new_summary,
+            suggestions=Improvement.candidates(new_title, suggestions),
+        )
+
+    @override
+    def rewrite_batch(
+        self, originals: list[Original], previous_titles: list[list[str]] | None = None
+    ) -> list[Improvement]:
+        """Rewrites all originals with a single JSON-structured completion.
+
+        Articles missing from a malformed or incomplete answer are rewritten
+        one by one instead. Articles which fail even then are left out.
+        """
+        if not originals:
+            return []
+        articles: list[dict[str, object]] = [
+            {"id": i, "title": o.title, "summary": o.summary}
+            for i, o in enumerate(originals)
+        ]
+        if previous_titles:
+            for article, titles in zip(articles, previous_titles, strict=True):
+                if titles:
+                    article["previous_titles"] = titles
+        try:
+            content = self._complete(
+                messages=[
+                    {"role": "system", "content": BATCH_PROMPT},
+                    {"role": "user", "content": json.dumps(articles)},
+                ],
+                json_mode=True,
+                stage="batch",
+            )
+            parsed = parse_batch_response(content, len(originals))
+        except (APIStatusError, APIConnectionError, ValueError) as e:
+            print(f"Batch rewrite failed ({type(e).__name__}), rewriting one by one")
+            parsed = {}
+
+        improvements: list[Improvement] = []
+        for i, original in enumerate(originals):
+            if i in parsed:
+                title, summary, suggestions = parsed[i]
+                improvements.append(
+                    Improvement(
+                        original=original,
+                        title=title,
+                        summary=summary,
+                        suggestions=Improvement.candidates(title, suggestions),
+                    )
+                )
+                continue
+            try:
+                improvements.append(
+                    self.rewrite(
+                        original, previous_titles[i] if previous_titles else None
+                    )
+                )
+            except (APIStatusError, APIConnectionError, ValueError) as e:
+                print(f"Error improving article {original.link}: {e!r}")
+        return improvements
+
+    @override
+    def stream_title(self, original_content: str) -> Iterator[tuple[str, str]]:
+        suggestions: list[str] = []
+        for piece in self._stream(
+            self._suggestion_messages(original_content), stage="suggestions"
+        ):
+            suggestions.append(piece)
+            yield ("suggestions", piece)
+        for piece in self._stream(
+            self._title_messages("".join(suggestions)), stage="title"
+        ):
+            yield ("title", piece)
+
+    @override
+    def stream_summary(
+        self, original: Original, improved_title: str
+    ) -> Iterator[tuple[str, str]]:
+        for piece in self._stream(
+            self._summary_messages(original, improved_title), stage="summary"
+        ):
+            yield ("summary", piece)
 
     @override
     def get_alternative_title_suggestions(
@@ -37,6 +591,17 @@ class GroqClient(LLMClient):
         previous_titles: list[str] | None = None,
         custom_prompt: str | None = None,
     ) -> str:
+        return self._complete(
+            self._suggestion_messages(original_content, previous_titles, custom_prompt),
+            stage="suggestions",
+        )
+
+    def _suggestion_messages(
+        self,
+        original_content: str,
+        previous_titles: list[str] | None = None,
+        custom_prompt: str | None = None,
+    ) -> list[dict[str, str]]:
         prompt = (
             custom_prompt
             if custom_prompt
@@ -59,30 +624,23 @@ class GroqClient(LLMClient):
             referenced in the original headline. Ensure you do not repeat too
             much wording from your previous headlines.
 
-            {"The previous 5 headlines you created were the following:\n- " if previous_titles else ""}
+            {"Previous headlines you created, for the most similar stories first, were the following:\n- " if previous_titles else ""}
             {"\n- ".join(previous_titles) if previous_titles else ""}
 
             When creating the new headline, try to stick close to the topic of
             the original headline.
             """
         )
-        suggestions = self.client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": prompt,
-                },
-                {
-                    "role": "user",
-                    "content": f"The headline to rewrite is the following: {original_content}",
-                },
-            ],
-            model="llama-3.3-70b-versatile",
-        )
-        suggestions_str = suggestions.choices[0].message.content
-        if not suggestions_str:
-            raise ValueError
-        return suggestions_str
+        return [
+            {
+                "role": "system",
+                "content": prompt,
+            },
+            {
+                "role": "user",
+                "content": f"The headline to rewrite is the following: {original_content}",
+            },
+        ]
 
     @override
     def rewrite_title(
@@ -91,6 +649,17 @@ class GroqClient(LLMClient):
         suggestions: str | None = None,
         custom_prompt: str | None = None,
     ) -> str:
+        if not suggestions:
+            suggestions = self.get_alternative_title_suggestions(original_content)
+        winner_str = self._complete(
+            self._title_messages(suggestions, custom_prompt), stage="title"
+        )
+        print("Winner: ", winner_str)
+        return winner_str.strip(" \"'")
+
+    def _title_messages(
+        self, suggestions: str, custom_prompt: str | None = None
+    ) -> list[dict[str, str]]:
         prompt = (
             custom_prompt
             if custom_prompt
@@ -105,26 +674,16 @@ class GroqClient(LLMClient):
         revisions to it. Your output consists solely of the revised headline.
         """
         )
-        if not suggestions:
-            suggestions = self.get_alternative_title_suggestions(original_content)
-        winner = self.client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": prompt,
-                },
-                {
-                    "role": "user",
-                    "content": suggestions,
-                },
-            ],
-            model="llama-3.3-70b-versatile",
-        )
-        print("Winner: ", winner.choices[0].message.content)
-        winner_str = winner.choices[0].message.content
-        if not winner_str:
-            raise ValueError
-        return winner_str.strip(" \"'")
+        return [
+            {
+                "role": "system",
+                "content": prompt,
+            },
+            {
+                "role": "user",
+                "content": suggestions,
+            },
+        ]
 
     @override
     def rewrite_summary(
@@ -133,29 +692,31 @@ class GroqClient(LLMClient):
         improved_title: str | None = None,
         custom_prompt: str | None = None,
     ) -> str:
-        prompt = (
-            custom_prompt
-            if custom_prompt
-            else f""" Below there is an original title and an original summary. Then follows an improved title. Write an improved summary based on the original summary which fits to the improved title. {"Do not use the phrase: 'in a surprising turn of events' or 'in a shocking turn of events.'" if AVOID_SHOCKING_TURN_OF_EVENTS else ""} Only output the improved summary.\n\nTitle:{original.title}\nSummary:{original.summary}\n---\nTitle:{improved_title}\nSummary:"""
-        )
         if not improved_title:
             improved_title = self.rewrite_title(original.title)
 
-        summary = self.client.chat.completions.create(
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                }
-            ],
-            model="llama-3.3-70b-versatile",
+        summary_str = self._complete(
+            self._summary_messages(original, improved_title, custom_prompt),
+            stage="summary",
         )
-        summary_str = summary.choices[0].message.content
-        if not summary_str:
-            raise ValueError
         print("Improved summary", summary_str)
         return summary_str.strip(" \"'")
 
+    def _summary_messages(
+        self, original: Original, improved_title: str, custom_prompt: str | None = None
+    ) -> list[dict[str, str]]:
+        prompt = (
+            custom_prompt
+            if custom_prompt
+            else f""" Below there is an original title and an original summary. Then follows an improved title. Write an improved summary based on the original summary which fits to the improved title. {"Do not use the phrase: 'in a surprising turn of events' or 'in a shocking turn of events.'" if AVOID_SHOCKING_TURN_OF_EVENTS else ""} Only output the improved summary.\n\nTitle:{original.title}\nSummary:{original.summary}\n---\nTitle:{improved_title}\nSummary:"""
+        )
+        return [
+            {
+                "role": "user",
+                "content": prompt,
+            }
+        ]
+
 
 if __name__ == "__main__":
     from datetime import datetime
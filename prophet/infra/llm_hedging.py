@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    CancelledError,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass
+
+PRIMARY = "primary"  # the first request, to the configured model
+HEDGE = "hedge"  # a duplicate to the same model, sent once the first is slow
+FALLBACK = "fallback"  # a request to the faster model, sent to keep the budget
+
+HEDGE_QUANTILE = 0.95  # of the primary's latencies, after which a hedge is sent
+MIN_SAMPLES = 20  # latencies of a stage and model before their quantiles count
+WINDOW = 200  # latest latencies kept per stage and model
+MAX_WORKERS = 32  # requests in flight, hedges and abandoned ones included
+
+
+class LatencyWindow:
+    """The latest latencies per (stage, model), thread-safe."""
+
+    size: int
+
+    def __init__(self, size: int = WINDOW) -> None:
+        self.size = size
+        self._seconds: dict[tuple[str, str], deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, model: str, seconds: float) -> None:
+        with self._lock:
+            window = self._seconds.get((stage, model))
+            if window is None:
+                window = self._seconds[(stage, model)] = deque(maxlen=self.size)
+            window.append(seconds)
+
+    def quantile(self, stage: str, model: str, q: float) -> float | None:
+        """The `q` quantile of the window, None until it has `MIN_SAMPLES`."""
+        with self._lock:
+            window = self._seconds.get((stage, model))
+            if window is None or len(window) < MIN_SAMPLES:
+                return None
+            ordered = sorted(window)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+@dataclass(frozen=True, slots=True)
+class Route:
+    """Which request produced a result."""
+
+    model: str
+    path: str  # PRIMARY, HEDGE or FALLBACK
+    seconds: float  # from admitting the primary until the result
+
+
+class Hedger:
+    """Runs a completion against a latency budget per stage.
+
+    The primary request goes to `model`. If it has not answered once the
+    stage's `hedge_quantile` latency passed (but at the latest after half
+    the budget), a second request is sent: to `fallback_model` if a fresh
+    request to `model` is not expected to finish within the budget, else a
+    hedge to `model` itself. If nothing answered when the budget ran out,
+    the fallback is sent too. The first answer wins. Requests still waiting
+    for `admit` then are dropped, those already sent finish in the
+    background, still counting towards the latencies.
+
+    Latencies and the budget count from when `admit` let a request through,
+    so time queued behind the rate limits is not taken for a slow model.
+    Hedges and fallbacks cost extra requests, about `1 - hedge_quantile` of
+    them, so they are only sent while `can_hedge` says the rate limits have
+    room. Stages without a budget are only hedged, and not at all before
+    `MIN_SAMPLES` latencies are known.
+    """
+
+    model: str
+    fallback_model: str | None
+    budgets: dict[str, float]  # seconds per stage
+    hedge_quantile: float | None  # None never hedges
+    latencies: LatencyWindow
+
+    def __init__(
+        self,
+        model: str,
+        fallback_model: str | None = None,
+        budgets: dict[str, float] | None = None,
+        hedge_quantile: float | None = HEDGE_QUANTILE,
+        max_workers: int = MAX_WORKERS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.model = model
+        self.fallback_model = fallback_model if fallback_model != model else None
+        self.budgets = budgets if budgets is not None else {}
+        self.hedge_quantile = hedge_quantile
+        self.latencies = LatencyWindow()
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="llm")
+
+    def hedge_delay(self, stage: str) -> float | None:
+        """Seconds after which the primary request is hedged, None for never."""
+        if self.hedge_quantile is None:
+            return None
+        budget = self.budgets.get(stage)
+        slow = self.latencies.quantile(stage, self.model, self.hedge_quantile)
+        if budget is None:
+            return slow
+        return budget / 2 if slow is None else min(slow, budget / 2)
+
+    def _budget_at_risk(self, stage: str, deadline: float | None) -> bool:
+        if deadline is None or self.fallback_model is None:
+            return False
+        typical = self.latencies.quantile(stage, self.model, 0.5)
+        return typical is not None and self._clock() + typical > deadline
+
+    def run[T](
+        self,
+        stage: str,
+        complete: Callable[[str], T],
+        admit: Callable[[threading.Event], bool] = lambda _: True,
+        can_hedge: Callable[[], bool] = lambda: True,
+    ) -> tuple[T, Route]:
+        """Calls `complete` with a model name as described above, returns the
+        first result and where it came from. Raises the first error once
+        every request sent failed.
+
+        `admit` blocks until a request may be sent and returns False if the
+        given event is set first; `complete` must not wait for it again."""
+        dropped = threading.Event()
+        _ = admit(dropped)
+        start = self._clock()
+        budget = self.budgets.get(stage)
+        deadline = start + budget if budget is not None else None
+        hedge_at = self.hedge_delay(stage)
+        pending: dict[Future[T], tuple[str, str]] = {}
+
+        def send(model: str, path: str, admitted: bool = False) -> None:
+            def timed() -> T:
+                if not admitted and not admit(dropped):
+                    raise CancelledError
+                sent = self._clock()
+                result = complete(model)
+                self.latencies.observe(stage, model, self._clock() - sent)
+                return result
+
+            pending[self._executor.submit(timed)] = (model, path)
+
+        send(self.model, PRIMARY, admitted=True)
+        errors: list[Exception] = []
+        hedged = fell_back = False
+        try:
+            while pending:
+                timeout = None
+                if not hedged and hedge_at is not None:
+                    timeout = start + hedge_at - self._clock()
+                elif not fell_back and deadline is not None and self.fallback_model:
+                    timeout = deadline - self._clock()
+                done, _ = wait(
+                    pending,
+                    None if timeout is None else max(0.0, timeout),
+                    FIRST_COMPLETED,
+                )
+                for future in done:
+                    model, path = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:  # noqa: BLE001
+                        errors.append(e)
+                        continue
+                    return result, Route(model, path, self._clock() - start)
+                if done:
+                    continue
+
+                if not hedged and hedge_at is not None:
+                    hedged = True
+                    if not can_hedge():
+                        continue
+                    if self._budget_at_risk(stage, deadline):
+                        fell_back = True
+                        send(self.fallback_model or self.model, FALLBACK)
+                    else:
+                        send(self.model, HEDGE)
+                elif self.fallback_model:
+                    fell_back = True
+                    if can_hedge():
+                        send(self.fallback_model, FALLBACK)
+            raise errors[0]
+        finally:
+            dropped.set()
+            for future in pending:
+                _ = future.cancel()
@@ -0,0 +1,313 @@
+import math
+import os
+import re
+import threading
+from array import array
+from collections import Counter
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import override
+
+import numpy as np
+import numpy.typing as npt
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.improvement_index import IImprovementIndex
+
+K1 = 1.2  # BM25 term frequency saturation
+B = 0.75  # BM25 document length normalization
+TITLE_WEIGHT = 2  # title words count as this many occurrences
+MAX_TF = 0xFFFF  # term frequencies are stored in 16 bits
+COMPACT_AT = 0.25  # share of removed documents from which postings are rebuilt
+FORMAT = 1  # of the saved index
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his i in is it its of on or she that the their they this to was were will with you".split()  # noqa: SIM905
+)
+_WORD = re.compile(r"\w+")
+
+type Postings = tuple[array[int], array[int]]  # (documents, term frequencies)
+
+
+def terms(text: str) -> list[str]:
+    return [t for t in _WORD.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _document_terms(imp: Improvement) -> Counter[str]:
+    counts = Counter(terms(f"{imp.title} {imp.original.title}") * TITLE_WEIGHT)
+    counts.update(terms(f"{imp.summary} {imp.original.summary}"))
+    return counts
+
+
+class SearchIndex(IImprovementIndex):
+    """BM25-ranked full-text index over improved and original titles and
+    summaries.
+
+    Every improvement is one document with a dense number. The inverted
+    index maps each term to growable arrays of the documents containing it
+    and how often, appended to as improvements are added, so a query only
+    touches the postings of its own terms and scores them vectorized.
+    Removed documents are masked out and their postings dropped once they
+    make up `COMPACT_AT` of the index. Term document frequencies include
+    masked documents until then.
+
+    The index is saved to `path` as flat arrays and loaded from there
+    instead of being rebuilt; `sync` reconciles it with the stored
+    improvements afterwards.
+    """
+
+    path: Path | None
+
+    def __init__(self, path: str | Path | None = "/tmp/pollenprophet/search.npz"):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._postings: dict[str, Postings] = {}
+        self._ids: list[str] = []  # improvement id by document, "" once removed
+        self._docs: dict[str, int] = {}  # document by improvement id
+        self._lengths = np.zeros(0, dtype=np.float32)
+        self._dates = np.zeros(0, dtype=np.int64)  # date_orig_ts, for retention
+        self._alive = np.zeros(0, dtype=np.bool_)
+        self._total_length = 0  # of all live documents
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._docs
+
+    def _grow(self, needed: int) -> None:
+        if needed <= len(self._alive):
+            return
+        size = max(needed, 2 * len(self._alive), 1024)
+        self._lengths = np.resize(self._lengths, size)
+        self._dates = np.resize(self._dates, size)
+        alive = np.zeros(size, dtype=np.bool_)
+        alive[: len(self._alive)] = self._alive
+        self._alive = alive
+
+    @override
+    def add_all(self, improvements: Iterable[Improvement]) -> None:
+        documents = [(imp, _document_terms(imp)) for imp in improvements]
+        with self._lock:
+            self._remove(imp.id for imp, _ in documents)
+            self._grow(len(self._ids) + len(documents))
+            for imp, counts in documents:
+                doc = len(self._ids)
+                self._ids.append(imp.id)
+                self._docs[imp.id] = doc
+                for term, count in counts.items():
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        postings = self._postings[term] = (array("i"), array("H"))
+                    postings[0].append(doc)
+                    postings[1].append(min(count, MAX_TF))
+                length = sum(counts.values())
+                self._lengths[doc] = length
+                self._dates[doc] = int(
+                    imp.original.date.astimezone(timezone.utc).timestamp()
+                )
+                self._alive[doc] = True
+                self._total_length += length
+            self.dirty = self.dirty or bool(documents)
+
+    @override
+    def remove_all(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            self._remove(ids)
+
+    def _remove(self, ids: Iterable[str]) -> None:
+        for id in ids:
+            doc = self._docs.pop(id, None)
+            if doc is None:
+                continue
+            self._ids[doc] = ""
+            self._alive[doc] = False
+            self._total_length -= int(self._lengths[doc])
+            self.dirty = True
+        if len(self._ids) - len(self._docs) > COMPACT_AT * max(len(self._ids), 1):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Drops removed documents and renumbers the others."""
+        size = len(self._ids)
+        alive = self._alive[:size]
+        renumbered = np.cumsum(alive, dtype=np.intc) - 1
+        postings: dict[str, Postings] = {}
+        for term, (docs, tfs) in self._postings.items():
+            d = np.frombuffer(docs, dtype=np.intc)
+            keep = alive[d]
+            if keep.any():
+                postings[term] = (
+                    array("i", renumbered[d[keep]].tobytes()),
+                    array("H", np.frombuffer(tfs, dtype=np.uint16)[keep].tobytes()),
+                )
+            del d
+        self._postings = postings
+        self._ids = [id for id in self._ids if id]
+        self._docs = {id: doc for doc, id in enumerate(self._ids)}
+        self._lengths = self._lengths[:size][alive]
+        self._dates = self._dates[:size][alive]
+        self._alive = np.ones(len(self._ids), dtype=np.bool_)
+
+    @override
+    def retain_newest(self, n: int) -> None:
+        with self._lock:
+            if len(self._docs) <= n:
+                return
+            dates = self._dates[: len(self._ids)][self._alive[: len(self._ids)]]
+            self._remove_older_than(int(np.partition(dates, len(dates) - n)[-n]))
+
+    @override
+    def delete_older_than(self, ts: datetime) -> None:
+        cutoff = int(ts.astimezone(timezone.utc).timestamp())
+        with self._lock:
+            self._remove_older_than(cutoff)
+
+    def _remove_older_than(self, cutoff: int) -> None:
+        self._remove(
+            [id for id, doc in self._docs.items() if self._dates[doc] < cutoff]
+        )
+
+    def sync(self, improvements: list[Improvement]) -> None:
+        """Makes the index hold exactly the improvements, e.g. after loading
+        it from disk, indexing only what is missing."""
+        stored = {imp.id for imp in improvements}
+        self.remove_all([id for id in list(self._docs) if id not in stored])
+        self.add_all(imp for imp in improvements if imp.id not in self._docs)
+
+    def search(self, query: str, limit: int = 10, offset: int = 0) -> list[str]:
+        """Ids of the best matching improvements, best first, newer first
+        among equally good ones."""
+        wanted = offset + limit
+        with self._lock:
+            if not self._docs or limit < 1:
+                return []
+            num_docs = len(self._docs)
+            average_length = self._total_length / num_docs
+            matches: list[tuple[npt.NDArray[np.intc], npt.NDArray[np.float32]]] = []
+            for term in set(terms(query)):
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                # np.take, as it is several times faster than fancy indexing
+                docs = np.frombuffer(postings[0], dtype=np.intc)
+                tfs = np.frombuffer(postings[1], dtype=np.uint16).astype(np.float32)
+                lengths = np.take(self._lengths, docs)
+                df = min(len(docs), num_docs)
+                idf = math.log(1 + (num_docs - df + 0.5) / (df + 0.5))
+                score = (idf * (K1 + 1)) * tfs
+                score /= tfs + K1 * (1 - B + B * lengths / average_length)
+                score *= np.take(self._alive, docs)
+                matches.append((docs, score))
+            if not matches:
+                return []
+
+            if len(matches) == 1:
+                docs, scores = matches[0]
+            else:
+                # a document scores at least as much as for any one term, so
+                # the `wanted`-th best score of one term bounds the results
+                _, longest = max(matches, key=lambda m: len(m[0]))
+                # (negated, as partitioning near the end is slow with ties)
+                bound = (
+                    -np.partition(-longest, wanted - 1)[wanted - 1]
+                    if len(longest) >= wanted
+                    else 0
+                )
+                summed = np.bincount(
+                    np.concatenate([docs for docs, _ in matches]),
+                    weights=np.concatenate([score for _, score in matches]),
+                )
+                docs = np.flatnonzero(summed >= bound) if bound else summed.nonzero()[0]
+                scores = summed[docs]
+            found = scores > 0
+            docs, scores = docs[found], scores[found]
+            if len(docs) > wanted:
+                best = np.argpartition(-scores, wanted - 1)[:wanted]
+                docs, scores = docs[best], scores[best]
+            ranked = docs[np.lexsort((-np.take(self._dates, docs), -scores))]
+            return [self._ids[doc] for doc in ranked[offset:wanted].tolist()]
+
+    def save(self) -> bool:
+        """Writes the index to `path` if it changed, returns whether it did."""
+        if self.path is None:
+            return False
+        with self._lock:
+            if not self.dirty:
+                return False
+            size = len(self._ids)
+            postings = list(self._postings.items())
+            lengths = np.fromiter(
+                (len(docs) for _, (docs, _) in postings), dtype=np.int64
+            )
+            arrays = {
+                "format": np.array(FORMAT),
+                "terms": np.array([term for term, _ in postings], dtype=np.str_),
+                "offsets": np.concatenate(([0], np.cumsum(lengths))),
+                "docs": np.frombuffer(
+                    b"".join(docs.tobytes() for _, (docs, _) in postings),
+                    dtype=np.intc,
+                ),
+                "tfs": np.frombuffer(
+                    b"".join(tfs.tobytes() for _, (_, tfs) in postings),
+                    dtype=np.uint16,
+                ),
+                "ids": np.array(self._ids, dtype=np.str_),
+                "lengths": self._lengths[:size],
+                "dates": self._dates[:size],
+                "alive": self._alive[:size],
+            }
+            self.dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}-{os.getpid()}.npz")
+        with open(tmp, "wb") as f:
+            np.savez(f, allow_pickle=False, **arrays)
+        _ = tmp.replace(self.path)
+        return True
+
+    def load(self) -> bool:
+        """Replaces the index with the one saved at `path`, returns whether
+        there was a readable one."""
+        if self.path is None:
+            return False
+        try:
+            with np.load(self.path, allow_pickle=False) as saved:
+                if int(saved["format"]) != FORMAT:
+                    return False
+                arrays = {name: saved[name] for name in saved.files}
+        except (OSError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"Could not load the search index {self.path}: {e!r}")
+            return False
+
+        offsets: npt.NDArray[np.int64] = arrays["offsets"]
+        docs = arrays["docs"].astype(np.intc, copy=False)
+        tfs = arrays["tfs"].astype(np.uint16, copy=False)
+        postings: dict[str, Postings] = {}
+        for term, start, end in zip(
+            arrays["terms"].tolist(),
+            offsets[:-1].tolist(),
+            offsets[1:].tolist(),
+            strict=True,
+        ):
+            postings[term] = (
+                array("i", docs[start:end].tobytes()),
+                array("H", tfs[start:end].tobytes()),
+            )
+        ids: list[str] = arrays["ids"].tolist()
+        alive = arrays["alive"]
+        with self._lock:
+            self._clear()
+            self._postings = postings
+            self._ids = ids
+            self._docs = {id: doc for doc, id in enumerate(ids) if id}
+            self._grow(len(ids))
+            self._lengths[: len(ids)] = arrays["lengths"]
+            self._dates[: len(ids)] = arrays["dates"]
+            self._alive[: len(ids)] = alive
+            self._total_length = int(arrays["lengths"][alive].sum())
+        return True
@@ -0,0 +1,149 @@
+import gzip
+import json
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+
+try:
+    import brotli  # pyright: ignore[reportMissingImports]
+except ImportError:  # optional, without it only gzip variants are written
+    brotli = None
+
+MANIFEST = "manifest.json"
+
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: str
+    path: Path
+    files: frozenset[str]
+    encodings: frozenset[str]
+    _contents: dict[str, bytes] = field(default_factory=dict, compare=False)
+
+    def file(self, name: str, accept_encoding: str = "") -> tuple[Path, str | None]:
+        """The best variant of `name` for the client, and its encoding."""
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding, suffix in ENCODINGS.items():
+            if encoding in accepted and encoding in self.encodings:
+                return self.path / f"{name}{suffix}", encoding
+        return self.path / name, None
+
+    def read(self, path: Path) -> bytes:
+        """The file's content, kept in memory after the first read. Snapshots
+        are small and never change, so this spares a thread hop per send."""
+        content = self._contents.get(path.name)
+        if content is None:
+            content = self._contents[path.name] = path.read_bytes()
+        return content
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    accepted: set[str] = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class SnapshotStore:
+    """Versioned directories of pre-rendered, precompressed files.
+
+    Publishing writes a complete version into a temporary directory, renames
+    it into place and then swaps the `current` symlink, so readers in any
+    worker process see either the old or the new version, never a mix. The
+    newest `keep` versions stay available for clients still navigating them.
+    Only the current and the previous version are held in memory.
+    """
+
+    root: Path
+    keep: int
+
+    def __init__(
+        self, root: str | Path = "/tmp/pollenprophet/snapshots", keep: int = 5
+    ) -> None:
+        self.root = Path(root)
+        self.keep = keep
+        # the current and the previous version, kept with their read files
+        self._current: Snapshot | None = None
+        self._previous: Snapshot | None = None
+
+    def get(self, version: str) -> Snapshot | None:
+        for snapshot in (self._current, self._previous):
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+        if not version.isalnum():
+            return None
+        try:
+            manifest = json.loads((self.root / version / MANIFEST).read_text())
+        except (OSError, ValueError):
+            return None
+        return Snapshot(
+            version=version,
+            path=self.root / version,
+            files=frozenset(manifest["files"]),
+            encodings=frozenset(manifest["encodings"]),
+        )
+
+    def current(self) -> Snapshot | None:
+        try:
+            version = os.readlink(self.root / "current")
+        except OSError:
+            return None
+        if self._current is not None and self._current.version == version:
+            return self._current
+        snapshot = self.get(version)
+        if snapshot is not None:
+            self._current, self._previous = snapshot, self._current
+        return snapshot
+
+    def publish(self, version: str, files: dict[str, bytes]) -> Snapshot:
+        target = self.root / version
+        if target.exists():
+            os.utime(target)  # newest again, for pruning
+        else:
+            tmp = self.root / f".tmp-{version}-{os.getpid()}"
+            shutil.rmtree(tmp, ignore_errors=True)  # left over from a crash
+            tmp.mkdir(parents=True)
+            encodings = ["gzip"] + (["br"] if brotli else [])
+            for name, content in files.items():
+                _ = (tmp / name).write_bytes(content)
+                _ = (tmp / f"{name}.gz").write_bytes(
+                    gzip.compress(content, compresslevel=9, mtime=0)
+                )
+                if brotli:
+                    _ = (tmp / f"{name}.br").write_bytes(brotli.compress(content))
+            _ = (tmp / MANIFEST).write_text(
+                json.dumps({"files": sorted(files), "encodings": encodings})
+            )
+            try:
+                tmp.rename(target)
+            except OSError:  # published concurrently by another worker
+                shutil.rmtree(tmp, ignore_errors=True)
+
+        link = self.root / f".current-{os.getpid()}"
+        link.unlink(missing_ok=True)
+        link.symlink_to(version)
+        _ = link.replace(self.root / "current")
+        self._prune(version)
+
+        snapshot = self.current()
+        if snapshot is None or snapshot.version != version:
+            snapshot = self.get(version)  # published again by another worker
+        if snapshot is None:
+            raise OSError(f"Snapshot {version} missing after publishing")
+        return snapshot
+
+    def _prune(self, current: str) -> None:
+        versions = sorted(
+            (p for p in self.root.iterdir() if p.is_dir() and p.name.isalnum()),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for path in versions[self.keep :]:
+            if path.name != current:
+                shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,59 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import override
+
+from prophet.domain.votes import IVoteRepo, VoteKey
+
+
+class VoteSqliteRepo(IVoteRepo):
+    """Vote counts in a local SQLite file, one row per suggestion.
+
+    Counts are added with an upsert, so concurrent writers, e.g. several
+    worker processes, never lose each other's votes. The file is local to
+    the host; other instances keep counts of their own.
+    """
+
+    db_path: Path
+    conn: sqlite3.Connection
+
+    def __init__(self, db_path: str | Path = "/tmp/pollenprophet/votes.sqlite") -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            _ = self.conn.execute("PRAGMA journal_mode=WAL")
+            _ = self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS votes (
+                    uuid TEXT NOT NULL,
+                    suggestion INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (uuid, suggestion)
+                ) WITHOUT ROWID"""
+            )
+
+    @override
+    def add_votes(self, counts: dict[VoteKey, int]) -> None:
+        with self._lock, self.conn:
+            _ = self.conn.executemany(
+                """INSERT INTO votes VALUES (?, ?, ?)
+                ON CONFLICT (uuid, suggestion) DO UPDATE
+                SET count = count + excluded.count""",
+                [(id, index, count) for (id, index), count in counts.items()],
+            )
+
+    @override
+    def get_votes(self, ids: list[str]) -> dict[str, dict[int, int]]:
+        votes: dict[str, dict[int, int]] = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):  # below SQLite's variable limit
+                chunk = ids[start : start + 500]
+                rows = self.conn.execute(
+                    "SELECT uuid, suggestion, count FROM votes "
+                    + f"WHERE uuid IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for id, index, count in rows:
+                    votes.setdefault(id, {})[index] = count
+        return votes
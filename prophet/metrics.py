@@ -0,0 +1,225 @@
+"""Minimal Prometheus-style metrics.
+
+Recording is a lock and a few additions per observation; the text exposition
+is only built when `/metrics` is scraped.
+"""
+
+import bisect
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+type LabelValues = tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], **extra: str) -> str:
+    pairs = [*zip(names, values, strict=True), *extra.items()]
+    if not pairs:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+class Counter:
+    name: str
+    help: str
+    labelnames: tuple[str, ...]
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(labels[n] for n in self.labelnames), 0)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+
+class Histogram:
+    name: str
+    help: str
+    labelnames: tuple[str, ...]
+    buckets: tuple[float, ...]
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket (+Inf last)], sum
+        self._values: dict[LabelValues, tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels[n] for n in self.labelnames)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[idx] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        cached = self._values.get(tuple(labels[n] for n in self.labelnames))
+        return sum(cached[0]) if cached else 0
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            values = [(k, list(c), t[0]) for k, (c, t) in self._values.items()]
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip([*self.buckets, float("inf")], counts, strict=True):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                labels = _format_labels(self.labelnames, key, le=le)
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {total}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Histogram] = {}
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics[name] = metric
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics[name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format, version 0.0.4."""
+        lines = [line for m in self._metrics.values() for line in m.render()]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+LLM_STAGE_SECONDS = REGISTRY.histogram(
+    "prophet_llm_stage_seconds",
+    "Latency of LLM completions by stage, including retries and cache hits",
+    ["stage"],
+)
+LLM_COMPLETIONS = REGISTRY.counter(
+    "prophet_llm_completions_total",
+    "LLM completions by stage, the model which answered and the path "
+    + "(primary, hedge, fallback or cache)",
+    ["stage", "model", "path"],
+)
+LLM_TOKENS = REGISTRY.counter(
+    "prophet_llm_tokens_total",
+    "Tokens reported in LLM usage, by kind (prompt or completion)",
+    ["kind"],
+)
+REPO_CALL_SECONDS = REGISTRY.histogram(
+    "prophet_repo_call_seconds", "Latency of improvement repo calls", ["method"]
+)
+FEED_FETCH_SECONDS = REGISTRY.histogram(
+    "prophet_feed_fetch_seconds", "Duration of feed fetches, including parsing"
+)
+FEED_FETCH_BYTES = REGISTRY.counter(
+    "prophet_feed_fetch_bytes_total",
+    "Feed bytes downloaded, as announced by the Content-Length header",
+)
+FEED_ENTRIES_NEW = REGISTRY.counter(
+    "prophet_feed_entries_new_total", "Feed entries found to be new"
+)
+REFRESH_SECONDS = REGISTRY.histogram(
+    "prophet_refresh_seconds",
+    "Duration of full refresh cycles (fetch, rewrite, store, truncate)",
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "prophet_http_request_seconds",
+    "Latency of HTTP requests by route",
+    ["route", "method", "status"],
+)
+
+
+class MetricsMiddleware:
+    """Times every HTTP request, labelled by route template rather than URL
+    so cursors and query strings do not multiply the series. Requests to a
+    mounted app, e.g. static files, are labelled by the mount path. Streaming
+    responses are timed until their last chunk."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        root_path = scope.get("root_path", "")
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route: Any = scope.get("route")
+            # the router extends root_path by the path of a matched mount
+            mount = scope.get("root_path", "").removeprefix(root_path)
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                route=getattr(route, "path", None) or mount or "unmatched",
+                method=scope["method"],
+                status=str(status),
+            )
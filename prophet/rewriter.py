@@ -0,0 +1,124 @@
+import asyncio
+from collections.abc import Callable
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.llm import LLMClient
+from prophet.domain.original import Original
+
+
+class Rewriter:
+    """Rewrites many originals concurrently.
+
+    Every article still runs its stages in order (suggestions, title, summary),
+    but up to `concurrency` articles are in flight at once. The LLM client is
+    synchronous, so each stage runs in a worker thread to keep the event loop
+    free.
+
+    With a `batch_size` above one, articles are instead sent in groups of that
+    size through a single batched completion each, with up to `concurrency`
+    groups in flight.
+
+    `previous_titles` returns, for an original, earlier headlines the LLM
+    should not repeat.
+    """
+
+    llm: LLMClient
+    concurrency: int
+    batch_size: int
+    previous_titles: Callable[[Original], list[str]] | None
+
+    def __init__(
+        self,
+        llm: LLMClient,
+        concurrency: int = 5,
+        batch_size: int = 1,
+        previous_titles: Callable[[Original], list[str]] | None = None,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.llm = llm
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.previous_titles = previous_titles
+
+    def _previous_titles(self, originals: list[Original]) -> list[list[str]] | None:
+        if self.previous_titles is None:
+            return None
+        return [self.previous_titles(o) for o in originals]
+
+    async def improve(self, original: Original) -> Improvement:
+        previous = await asyncio.to_thread(self._previous_titles, [original])
+        suggestions = await asyncio.to_thread(
+            self.llm.get_alternative_title_suggestions,
+            original.title,
+            previous[0] if previous else None,
+        )
+        new_title = await asyncio.to_thread(
+            self.llm.rewrite_title, original.title, suggestions
+        )
+        new_summary = await asyncio.to_thread(
+            self.llm.rewrite_summary, original, new_title
+        )
+        return Improvement(
+            original=original,
+            title=new_title,
+            summary=new_summary,
+            suggestions=Improvement.candidates(new_title, suggestions),
+        )
+
+    async def improve_all(self, originals: list[Original]) -> list[Improvement]:
+        """Returns improvements in the order of `originals`.
+
+        Articles whose rewrite fails are left out, so they will be picked up
+        again as new on the next refresh.
+        """
+        if self.batch_size > 1:
+            return await self._improve_batched(originals)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(original: Original) -> Improvement:
+            async with semaphore:
+                return await self.improve(original)
+
+        results = await asyncio.gather(
+            *(bounded(o) for o in originals), return_exceptions=True
+        )
+
+        improvements: list[Improvement] = []
+        for orig, res in zip(originals, results, strict=True):
+            if isinstance(res, BaseException):
+                if not isinstance(res, Exception):
+                    raise res
+                print(f"Error improving article {orig.link}: {res!r}")
+                continue
+            improvements.append(res)
+        return improvements
+
+    async def _improve_batched(self, originals: list[Original]) -> list[Improvement]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(batch: list[Original]) -> list[Improvement]:
+            async with semaphore:
+                previous = await asyncio.to_thread(self._previous_titles, batch)
+                return await asyncio.to_thread(self.llm.rewrite_batch, batch, previous)
+
+        batches = [
+            originals[i : i + self.batch_size]
+            for i in range(0, len(originals), self.batch_size)
+        ]
+        results = await asyncio.gather(
+            *(bounded(b) for b in batches), return_exceptions=True
+        )
+
+        improvements: list[Improvement] = []
+        for batch, res in zip(batches, results, strict=True):
+            if isinstance(res, BaseException):
+                if not isinstance(res, Exception):
+                    raise res
+                print(f"Error improving {len(batch)} articles: {res!r}")
+                continue
+            improvements.extend(res)
+        return improvements
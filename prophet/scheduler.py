@@ -0,0 +1,240 @@
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.lease import IRefreshLease
+from prophet.domain.original import Original
+from prophet.infra.feed_fetcher import FeedFetcher
+from prophet.metrics import REFRESH_SECONDS
+
+RETRY_BASE = 60.0  # seconds after the first failed fetch, doubled on every failure
+RETRY_MAX = 3600.0
+
+
+@dataclass
+class ScheduledFeed:
+    fetcher: FeedFetcher
+    interval: float  # seconds between successful fetches
+    jitter: float = 0.1  # fraction of the interval to randomly vary it by
+    failures: int = 0
+
+    def next_delay(self) -> float:
+        if self.failures:
+            delay = min(RETRY_MAX, RETRY_BASE * 2 ** (self.failures - 1))
+            return delay * random.uniform(0.5, 1.0)
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+@dataclass
+class _Job:
+    feed: ScheduledFeed
+    originals: list[Original]
+    complete: bool = True  # False if another process took some originals
+    done: asyncio.Future[None] = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+
+
+class FeedScheduler:
+    """Polls several feeds concurrently, each on its own schedule.
+
+    Every feed runs its own fetch loop and hands new originals to one shared
+    rewrite queue. The queue's consumer takes whatever has piled up, drops
+    originals (by `Original.id`) which another feed already delivered, and
+    passes them to `process` in one go, so the LLM works on all sources at
+    once. A feed's validators are only committed once everything it
+    delivered was stored, see `FeedFetcher`.
+
+    `process` rewrites and stores originals and returns the stored
+    improvements. `known_links` tells the fetchers which entries are already
+    stored, which are not rewritten again. `after_cycle` runs after every
+    processed batch.
+
+    With a `lease`, only the worker process holding it polls, so adding
+    workers does not multiply fetches and LLM calls. The others keep trying
+    to take over, which happens once the holder stops renewing. All
+    processes, including `run_once` in non-holders, claim originals before
+    rewriting them and skip those claimed elsewhere, or stored by another
+    process between the fetch and the claim.
+    """
+
+    feeds: list[ScheduledFeed]
+
+    def __init__(
+        self,
+        feeds: list[ScheduledFeed],
+        process: Callable[[list[Original]], Awaitable[list[Improvement]]],
+        known_links: Callable[[list[str]], Awaitable[set[str]]] | None = None,
+        after_cycle: Callable[[], Awaitable[object]] | None = None,
+        lease: IRefreshLease | None = None,
+    ) -> None:
+        self.feeds = feeds
+        self._process = process
+        self._known_links = known_links
+        self._after_cycle = after_cycle
+        self._lease = lease
+        self._in_flight: set[str] = set()
+        self._leader_task: asyncio.Task[None] | None = None
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def _fetch(self, feed: ScheduledFeed) -> _Job:
+        originals = await feed.fetcher.fetch(known_links=self._known_links)
+        fresh: list[Original] = []
+        for original in originals:
+            if original.id not in self._in_flight:
+                self._in_flight.add(original.id)
+                fresh.append(original)
+        if not self._lease or not fresh:
+            return _Job(feed, fresh)
+
+        claimed: set[str] = set()
+        try:
+            claimed = await asyncio.to_thread(self._lease.claim, [o.id for o in fresh])
+            # another process may have stored some between our fetch and claim
+            stored = (
+                await self._known_links([o.link for o in fresh if o.id in claimed])
+                if self._known_links and claimed
+                else set[str]()
+            )
+        except BaseException:
+            self._in_flight.difference_update(o.id for o in fresh)
+            if claimed:
+                self._lease.release_claims(list(claimed))
+            raise
+        mine = [o for o in fresh if o.id in claimed and o.link not in stored]
+        dropped = {o.id for o in fresh} - {o.id for o in mine}
+        self._in_flight.difference_update(dropped)
+        if len(mine) < len(claimed):
+            await asyncio.to_thread(self._lease.release_claims, list(dropped & claimed))
+        return _Job(feed, mine, complete=len(claimed) == len(fresh))
+
+    async def _run(self, jobs: list[_Job]) -> list[Improvement]:
+        """Processes the originals of all jobs at once and commits the feeds
+        whose originals were all stored."""
+        originals = [o for job in jobs for o in job.originals]
+        try:
+            improved = await self._process(originals) if originals else []
+            stored = {imp.original.id for imp in improved}
+            for job in jobs:
+                if job.complete and all(o.id in stored for o in job.originals):
+                    job.feed.fetcher.commit()
+            if self._after_cycle:
+                try:
+                    _ = await self._after_cycle()
+                except Exception as e:  # noqa: BLE001
+                    # the feeds were refreshed, this must not back them off
+                    print(f"Error finishing the refresh cycle: {e!r}")
+            return improved
+        finally:
+            self._in_flight.difference_update(o.id for o in originals)
+            if self._lease:
+                self._lease.release_claims([o.id for o in originals])
+
+    async def run_once(self) -> list[Improvement]:
+        """Fetches every feed concurrently and processes the results together.
+
+        Feeds which fail to fetch are reported and skipped."""
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._fetch(feed) for feed in self.feeds), return_exceptions=True
+        )
+        jobs: list[_Job] = []
+        for feed, res in zip(self.feeds, results, strict=True):
+            if isinstance(res, BaseException):
+                if not isinstance(res, Exception):
+                    raise res
+                print(f"Error fetching feed {feed.fetcher.url}: {res!r}")
+                continue
+            jobs.append(res)
+        improved = await self._run(jobs)
+        REFRESH_SECONDS.observe(time.perf_counter() - start)
+        return improved
+
+    async def _poll_forever(self, feed: ScheduledFeed, queue: asyncio.Queue[_Job]):
+        while True:
+            start = time.perf_counter()
+            try:
+                job = await self._fetch(feed)
+                queue.put_nowait(job)
+                await job.done
+            except Exception as e:  # noqa: BLE001
+                feed.failures += 1
+                print(
+                    f"Error refreshing feed {feed.fetcher.url} "
+                    + f"({feed.failures} in a row): {e!r}"
+                )
+            else:
+                feed.failures = 0
+                REFRESH_SECONDS.observe(time.perf_counter() - start)
+            await asyncio.sleep(feed.next_delay())
+
+    async def _consume_forever(self, queue: asyncio.Queue[_Job]):
+        while True:
+            jobs = [await queue.get()]
+            while not queue.empty():
+                jobs.append(queue.get_nowait())
+            try:
+                improved = await self._run(jobs)
+            except Exception as e:  # noqa: BLE001
+                for job in jobs:
+                    if not job.done.done():
+                        job.done.set_exception(e)
+                continue
+            if improved:
+                print(f"Updated articles. Added {len(improved)} new ones.")
+            for job in jobs:
+                if not job.done.done():
+                    job.done.set_result(None)
+
+    async def _lead_forever(self, lease: IRefreshLease):
+        """Polls while holding the lease, renewing it as a heartbeat."""
+        try:
+            while True:
+                try:
+                    leading = await asyncio.to_thread(lease.try_acquire)
+                except OSError as e:
+                    print(f"Could not renew the refresh lease: {e!r}")
+                    leading = False
+                if leading and not self._tasks:
+                    print("Holding the refresh lease, polling feeds")
+                    self._start_polling()
+                elif not leading and self._tasks:
+                    print("Lost the refresh lease, no longer polling feeds")
+                    await self._stop_polling()
+                await asyncio.sleep(lease.ttl / 3)
+        finally:
+            if self._tasks:
+                await self._stop_polling()
+                lease.release()
+
+    def _start_polling(self) -> None:
+        queue: asyncio.Queue[_Job] = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._consume_forever(queue))] + [
+            asyncio.create_task(self._poll_forever(feed, queue)) for feed in self.feeds
+        ]
+
+    async def _stop_polling(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            _ = task.cancel()
+        _ = await asyncio.gather(*tasks, return_exceptions=True)
+
+    def start(self) -> None:
+        """Starts one polling task per feed and the shared consumer, or with
+        a lease, the task competing for it."""
+        if self._tasks or self._leader_task:
+            return
+        if self._lease:
+            self._leader_task = asyncio.create_task(self._lead_forever(self._lease))
+        else:
+            self._start_polling()
+
+    async def stop(self) -> None:
+        if self._leader_task:
+            _ = self._leader_task.cancel()
+            _ = await asyncio.gather(self._leader_task, return_exceptions=True)
+            self._leader_task = None
+        await self._stop_polling()
@@ -1,35 +1,393 @@
 # pyright: reportUnusedFunction=false
 
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+import asyncio
+import hashlib
+import json
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import TYPE_CHECKING, Annotated
+from urllib.parse import urlencode
+
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 
-from prophet.domain.improvement_repo import IImprovementRepo
-from prophet.infra.improvement_pickle_repo import ImprovementPickleRepo
-from prophet.infra.improvement_supa_repo import ImprovementSupaRepo
+from prophet.container import (
+    get_images,
+    get_repo,
+    get_search,
+    get_snapshots,
+    get_votes,
+)
+from prophet.domain.improvement import Improvement
+from prophet.domain.improvement_repo import ImprovementNotFoundError, PageCursor
+from prophet.infra.image_cache import ImageCache, ImageFetchError
+from prophet.infra.improvement_cached_repo import CachedImprovementRepo
+from prophet.infra.snapshot_store import Snapshot, SnapshotStore
+from prophet.votes import VoteCounter
+
+if TYPE_CHECKING:
+    from prophet.infra.search_index import SearchIndex
 
-repo: IImprovementRepo = ImprovementSupaRepo()
+PAGE_SIZE = 10  # cards per htmx request
 
 templates = Jinja2Templates(directory="templates")
 
+LISTINGS = {
+    "improvements": "list_improvements.html",
+    "originals": "list_originals.html",
+}
+MEDIA_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".json": "application/feed+json",
+}
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _etag(template: str, articles: list[Improvement]) -> str:
+    # stored improvements never change, only their title is promoted by votes
+    digest = hashlib.sha1(template.encode())
+    for article in articles:
+        digest.update(article.id.encode())
+        digest.update(article.title.encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def _newest_first(articles: list[Improvement]) -> list[Improvement]:
+    """In the order pages are cut by `PageCursor`."""
+    cursors = {a.id: PageCursor.after(a) for a in articles}
+    return sorted(
+        articles,
+        key=lambda a: (cursors[a.id].date_ts, cursors[a.id].id),
+        reverse=True,
+    )
+
+
+def snapshot_version(articles: list[Improvement]) -> str:
+    """Identifies the listings' content: the templates, article ids and
+    their titles, which votes may change."""
+    digest = hashlib.sha1()
+    for name in LISTINGS.values():
+        source, _, _ = templates.env.loader.get_source(templates.env, name)  # pyright: ignore[reportOptionalMemberAccess]
+        digest.update(source.encode())
+    for id, title in sorted((a.id, a.title) for a in articles):
+        digest.update(id.encode())
+        digest.update(title.encode())
+    return digest.hexdigest()[:16]
+
+
+def render_feed(articles: list[Improvement]) -> bytes:
+    """The improvements as a JSON Feed (https://jsonfeed.org/version/1.1)."""
+    feed = {
+        "version": "https://jsonfeed.org/version/1.1",
+        "title": "The Bee's Knees",
+        "items": [
+            {
+                "id": a.id,
+                "url": a.original.link,
+                "title": a.title,
+                "content_text": a.summary,
+                "image": a.original.image_link or None,
+                "date_published": a.original.date.astimezone(timezone.utc).isoformat(),
+                "_original": {"title": a.original.title, "summary": a.original.summary},
+            }
+            for a in articles
+        ],
+    }
+    return json.dumps(feed, ensure_ascii=False).encode()
+
+
+def render_snapshot(articles: list[Improvement]) -> tuple[str, dict[str, bytes]]:
+    """Renders every page of both listings and the JSON feed.
+
+    Returns the version and the files by name. Pages link to their next page
+    within the same version, so a client keeps paging through consistent
+    content even while newer versions are published.
+    """
+    articles = _newest_first(articles)
+    version = snapshot_version(articles)
+    files: dict[str, bytes] = {"feed.json": render_feed(articles)}
+    for listing, template_name in LISTINGS.items():
+        template = templates.get_template(template_name)
+        name = f"{listing}.html"
+        for start in range(0, max(len(articles), 1), PAGE_SIZE):
+            page = articles[start : start + PAGE_SIZE]
+            cursor = (
+                PageCursor.after(page[-1]).encode()
+                if start + PAGE_SIZE < len(articles)
+                else None
+            )
+            next_name = f"{listing}-{cursor}.html" if cursor else None
+            files[name] = template.render(
+                articles=page,
+                next_url=f"/snapshots/{version}/{next_name}" if next_name else None,
+            ).encode()
+            if next_name:
+                name = next_name
+    return version, files
+
+
+def _send(
+    request: Request, snapshot: Snapshot, name: str, cache_control: str
+) -> Response | None:
+    """Sends a snapshot file as is, or None if it is not available."""
+    if name not in snapshot.files:
+        return None
+    path, encoding = snapshot.file(name, request.headers.get("accept-encoding", ""))
+    try:
+        content = snapshot.read(path)
+    except FileNotFoundError:  # pruned by another worker
+        return None
+    headers = {
+        "ETag": f'"{snapshot.version}-{name}-{encoding or "identity"}"',
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    if_none_match = request.headers.get("if-none-match", "")
+    if headers["ETag"] in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content, media_type=MEDIA_TYPES[name[name.rindex(".") :]], headers=headers
+    )
+
+
+def _is_fresh(request: Request, etag: str, repo: CachedImprovementRepo) -> bool:
+    """Whether the client's copy is still current, per RFC 9110 precedence."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag in [t.strip() for t in if_none_match.split(",")]
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return repo.last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+Repo = Annotated[CachedImprovementRepo, Depends(get_repo)]
+Snapshots = Annotated[SnapshotStore, Depends(get_snapshots)]
+Images = Annotated[ImageCache, Depends(get_images)]
+Votes = Annotated[VoteCounter, Depends(get_votes)]
+Search = Annotated["SearchIndex", Depends(get_search)]
+
 
 def define_routes(app: FastAPI):
-    @app.get("/improvements", response_class=HTMLResponse)
-    def list_improvements(request: Request):
-        improved = repo.get_all()
+    async def get_page(
+        repo: CachedImprovementRepo, after: str | None
+    ) -> tuple[list[Improvement], str | None]:
+        """Returns one page of articles and the cursor for the next page, if any."""
+        try:
+            cursor = PageCursor.decode(after) if after else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+        improved = await repo.get_page(PAGE_SIZE, after=cursor)
+        next_cursor = (
+            PageCursor.after(improved[-1]).encode()
+            if len(improved) == PAGE_SIZE
+            else None
+        )
+        return improved, next_cursor
+
+    async def render_page(
+        request: Request,
+        repo: CachedImprovementRepo,
+        snapshots: SnapshotStore,
+        votes: VoteCounter,
+        listing: str,
+        after: str | None,
+    ):
+        snapshot = snapshots.current()
+        if snapshot:
+            name = f"{listing}-{after}.html" if after else f"{listing}.html"
+            sent = _send(request, snapshot, name, "no-cache")
+            if sent:
+                return sent
+
+        template = LISTINGS[listing]
+        improved, next_cursor = await get_page(repo, after)
+        improved = await votes.promote(improved)
+        headers = {
+            "ETag": _etag(template, improved),
+            "Last-Modified": format_datetime(repo.last_modified, usegmt=True),
+            "Cache-Control": "no-cache",
+        }
+        if _is_fresh(request, headers["ETag"], repo):
+            return Response(status_code=304, headers=headers)
         return templates.TemplateResponse(
             request=request,
-            name="list_improvements.html",
-            context={"articles": improved},
+            name=template,
+            context={
+                "articles": improved,
+                "next_url": f"/{listing}?after={next_cursor}" if next_cursor else None,
+            },
+            headers=headers,
         )
 
+    @app.get("/improvements", response_class=HTMLResponse)
+    async def list_improvements(
+        request: Request,
+        repo: Repo,
+        snapshots: Snapshots,
+        votes: Votes,
+        after: str | None = None,
+    ):
+        return await render_page(request, repo, snapshots, votes, "improvements", after)
+
     @app.get("/originals", response_class=HTMLResponse)
-    def list_originals(request: Request):
-        improved = repo.get_all()
+    async def list_originals(
+        request: Request,
+        repo: Repo,
+        snapshots: Snapshots,
+        votes: Votes,
+        after: str | None = None,
+    ):
+        return await render_page(request, repo, snapshots, votes, "originals", after)
+
+    @app.get("/search", response_class=HTMLResponse)
+    async def search(
+        request: Request,
+        repo: Repo,
+        snapshots: Snapshots,
+        votes: Votes,
+        index: Search,
+        q: str = "",
+        listing: str = "improvements",
+        offset: int = 0,
+    ):
+        """The best matches for `q` as cards of the listing, an empty query
+        shows the listing itself."""
+        if listing not in LISTINGS or offset < 0:
+            raise HTTPException(status_code=400, detail="Unknown listing or offset")
+        if not q.strip():
+            return await render_page(request, repo, snapshots, votes, listing, None)
+
+        # one more than shown tells whether there is a next page
+        ids = await asyncio.to_thread(index.search, q, PAGE_SIZE + 1, offset)
+
+        async def get(id: str) -> Improvement | None:
+            try:
+                return await repo.get(id)
+            except ImprovementNotFoundError:  # removed by another worker
+                return None
+
+        hits = await asyncio.gather(*(get(id) for id in ids[:PAGE_SIZE]))
+        found = [imp for imp in hits if imp is not None]
+        next_query = {"q": q, "listing": listing, "offset": offset + PAGE_SIZE}
         return templates.TemplateResponse(
-            request=request, name="list_originals.html", context={"articles": improved}
+            request=request,
+            name=LISTINGS[listing],
+            context={
+                "articles": await votes.promote(found),
+                "next_url": f"/search?{urlencode(next_query)}"
+                if len(ids) > PAGE_SIZE
+                else None,
+            },
+            headers={"Cache-Control": "no-cache"},
+        )
+
+    @app.get("/feed.json")
+    async def json_feed(
+        request: Request, repo: Repo, snapshots: Snapshots, votes: Votes
+    ):
+        snapshot = snapshots.current()
+        sent = _send(request, snapshot, "feed.json", "no-cache") if snapshot else None
+        if sent:
+            return sent
+        return Response(
+            render_feed(_newest_first(await votes.promote(await repo.get_all()))),
+            media_type=MEDIA_TYPES[".json"],
         )
 
+    @app.get("/snapshots/{version}/{name}")
+    async def snapshot_file(
+        request: Request, version: str, name: str, snapshots: Snapshots
+    ):
+        snapshot = snapshots.get(version)
+        sent = _send(request, snapshot, name, IMMUTABLE) if snapshot else None
+        if not sent:
+            raise HTTPException(status_code=404)
+        return sent
+
+    @app.get("/img/{original_id}")
+    async def image(request: Request, original_id: str, repo: Repo, images: Images):
+        """The original's image from the local cache, fetched on a miss. The
+        file is sent with `http.response.pathsend` where the server supports
+        it, which lets it use sendfile."""
+        cached = images.get(original_id)
+        if cached is None:
+            url = await repo.image_link(original_id)
+            if not url:
+                raise HTTPException(status_code=404)
+            try:
+                cached = await images.fetch(original_id, url)
+            except (ImageFetchError, OSError) as e:
+                print(f"Error caching image {url}: {e!r}")
+                return RedirectResponse(url, status_code=307)
+
+        path, media_type = cached
+        # an original's image never changes, so its id is a strong validator
+        headers = {"ETag": f'"{original_id}"', "Cache-Control": IMMUTABLE}
+        if_none_match = request.headers.get("if-none-match", "")
+        if headers["ETag"] in [t.strip() for t in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+        return FileResponse(path, media_type=media_type, headers=headers)
+
+    async def render_suggestions(
+        request: Request, article: Improvement, counts: list[int]
+    ):
+        return templates.TemplateResponse(
+            request=request,
+            name="suggestions.html",
+            context={
+                "article": article,
+                "suggestions": list(zip(article.suggestions, counts, strict=True)),
+            },
+            headers={"Cache-Control": "no-store"},
+        )
+
+    async def get_improvement(repo: CachedImprovementRepo, id: str) -> Improvement:
+        try:
+            return await repo.get(id)
+        except ImprovementNotFoundError as e:
+            raise HTTPException(status_code=404) from e
+
+    @app.get("/suggestions/{improvement_id}", response_class=HTMLResponse)
+    async def suggestions(
+        request: Request, improvement_id: str, repo: Repo, votes: Votes
+    ):
+        """The headline suggestions with their votes, to vote on."""
+        article = await get_improvement(repo, improvement_id)
+        return await render_suggestions(request, article, await votes.counts(article))
+
+    @app.post("/vote/{improvement_id}/{index}", response_class=HTMLResponse)
+    async def vote(
+        request: Request, improvement_id: str, index: int, repo: Repo, votes: Votes
+    ):
+        """Counts a vote for a headline suggestion. It is buffered in memory
+        and stored with the next batch, see `VoteCounter`."""
+        article = await get_improvement(repo, improvement_id)
+        try:
+            counts = await votes.vote(article, index)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        return await render_suggestions(request, article, counts)
+
     @app.get("/", response_class=HTMLResponse)
-    def root_route(request: Request):
-        return templates.TemplateResponse(request=request, name="index.html")
+    async def root_route(request: Request, snapshots: Snapshots):
+        snapshot = snapshots.current()
+        urls = {
+            f"{listing}_url": f"/snapshots/{snapshot.version}/{listing}.html"
+            if snapshot
+            else f"/{listing}"
+            for listing in LISTINGS
+        }
+        return templates.TemplateResponse(
+            request=request,
+            name="index.html",
+            context=urls,
+            headers={"Cache-Control": "no-cache"},
+        )
@@ -0,0 +1,208 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import replace
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.votes import IVoteRepo, VoteKey
+
+FLUSH_INTERVAL = 2.0  # seconds between writes of the buffered votes
+FLUSH_AT = 1000  # buffered votes which trigger a write right away
+
+
+class _Tally:
+    """Vote counts of one improvement's suggestions and the leading one."""
+
+    __slots__ = ("counts", "leader")
+
+    def __init__(self, counts: dict[int, int]) -> None:
+        self.counts = counts
+        self.leader = 0
+        for index in counts:
+            _ = self._update(index)
+
+    def add(self, index: int, count: int = 1) -> bool:
+        """Counts the votes, returns whether the leader changed."""
+        self.counts[index] = self.counts.get(index, 0) + count
+        return self._update(index)
+
+    def _update(self, index: int) -> bool:
+        # counts only grow, so the leader only changes to the suggestion which
+        # just got a vote. Ties go to the earlier one, the chosen title first.
+        count, leading = self.counts.get(index, 0), self.counts.get(self.leader, 0)
+        if count > leading or (count == leading and index < self.leader):
+            changed = index != self.leader
+            self.leader = index
+            return changed
+        return False
+
+
+class VoteCounter:
+    """Counts votes on the headline suggestions in memory and writes them in
+    batches.
+
+    A vote only increments a counter, so bursts of clicks never wait for
+    the database. Every `flush_interval` seconds, or once `flush_at` votes
+    are buffered, all buffered votes go to the repo in one write, summed
+    per suggestion. The counter keeps every improvement's tally and leader
+    up to date with each vote; after a write it reloads the tallies, which
+    picks up the votes of the other workers sharing the repo. When a leader
+    changes, `on_promote` runs after the next write, e.g. to publish the
+    listings with the promoted headlines.
+
+    The container's repo is a SQLite file under /tmp, so counts are shared
+    by the workers of one host only: instances behind a load balancer each
+    count, and promote, from their own votes.
+
+    The counter is only used from the event loop, so updating it needs no
+    lock.
+    """
+
+    repo: IVoteRepo
+    flush_interval: float
+    flush_at: int
+    flushes: int  # writes to the repo
+    on_promote: Callable[[], Awaitable[object]] | None
+
+    def __init__(
+        self,
+        repo: IVoteRepo,
+        flush_interval: float = FLUSH_INTERVAL,
+        flush_at: int = FLUSH_AT,
+        on_promote: Callable[[], Awaitable[object]] | None = None,
+    ) -> None:
+        self.repo = repo
+        self.flush_interval = flush_interval
+        self.flush_at = flush_at
+        self.flushes = 0
+        self.on_promote = on_promote
+        self._pending: dict[VoteKey, int] = {}
+        self._num_pending = 0
+        self._tallies: dict[str, _Tally] = {}
+        self._promoted = False
+        self._wake = asyncio.Event()
+        self._loading = asyncio.Lock()
+        self._stopping = False
+        self._task: asyncio.Task[None] | None = None
+
+    async def _tallies_of(self, ids: list[str]) -> dict[str, _Tally]:
+        """The tallies of the improvements, loading the missing ones at once."""
+        if any(id not in self._tallies for id in ids):
+            # one load at a time, so a burst of first votes shares one query
+            async with self._loading:
+                missing = [id for id in dict.fromkeys(ids) if id not in self._tallies]
+                if missing:
+                    stored = await asyncio.to_thread(self.repo.get_votes, missing)
+                    for id in missing:
+                        self._tallies[id] = self._merged(id, stored.get(id, {}))
+        return {id: self._tallies[id] for id in ids}
+
+    def _merged(self, id: str, stored: dict[int, int]) -> _Tally:
+        """The stored counts plus the buffered votes."""
+        counts = dict(stored)
+        for (voted, index), count in self._pending.items():
+            if voted == id:
+                counts[index] = counts.get(index, 0) + count
+        return _Tally(counts)
+
+    async def vote(self, improvement: Improvement, index: int) -> list[int]:
+        """Counts a vote for the suggestion, returns the counts of all of the
+        improvement's suggestions."""
+        if not 0 <= index < len(improvement.suggestions):
+            raise ValueError(f"{improvement.id} has no suggestion {index}")
+        tally = (await self._tallies_of([improvement.id]))[improvement.id]
+        key = (improvement.id, index)
+        self._pending[key] = self._pending.get(key, 0) + 1
+        self._num_pending += 1
+        if tally.add(index):
+            self._promoted = True
+        if self._num_pending >= self.flush_at:
+            self._wake.set()
+        return [tally.counts.get(i, 0) for i in range(len(improvement.suggestions))]
+
+    async def counts(self, improvement: Improvement) -> list[int]:
+        """The votes of each of the improvement's suggestions."""
+        tally = (await self._tallies_of([improvement.id]))[improvement.id]
+        return [tally.counts.get(i, 0) for i in range(len(improvement.suggestions))]
+
+    async def promote(self, articles: list[Improvement]) -> list[Improvement]:
+        """The articles, titled with their leading suggestion."""
+        tallies = await self._tallies_of([a.id for a in articles if a.suggestions])
+        promoted: list[Improvement] = []
+        for article in articles:
+            tally = tallies.get(article.id)
+            if tally and tally.leader and tally.leader < len(article.suggestions):
+                article = replace(article, title=article.suggestions[tally.leader])
+            promoted.append(article)
+        return promoted
+
+    async def flush(self) -> int:
+        """Writes the buffered votes in one go, returns how many there were.
+
+        On failure the votes stay buffered for the next attempt."""
+        pending, self._pending = self._pending, {}
+        num_pending, self._num_pending = self._num_pending, 0
+        self._wake.clear()
+        if pending:
+            try:
+                await asyncio.to_thread(self.repo.add_votes, pending)
+            except Exception:
+                for key, count in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + count
+                self._num_pending += num_pending
+                raise
+            self.flushes += 1
+
+        if self._tallies:
+            ids = list(self._tallies)
+            stored = await asyncio.to_thread(self.repo.get_votes, ids)
+            for (id, index), count in self._pending.items():  # cast meanwhile
+                counts = stored.setdefault(id, {})
+                counts[index] = counts.get(index, 0) + count
+            for id in ids:
+                old = self._tallies.get(id)
+                self._tallies[id] = tally = _Tally(stored.get(id, {}))
+                if old is not None and old.leader != tally.leader:
+                    self._promoted = True
+
+        if self._promoted and self.on_promote:
+            self._promoted = False
+            try:
+                _ = await self.on_promote()
+            except Exception as e:  # noqa: BLE001
+                print(f"Error promoting headlines: {e!r}")
+        return num_pending
+
+    def retain(self, ids: list[str]) -> None:
+        """Drops the tallies of all other improvements, e.g. removed ones."""
+        keep = set(ids)
+        for id in [id for id in self._tallies if id not in keep]:
+            del self._tallies[id]
+
+    async def _flush_forever(self) -> None:
+        while not self._stopping:
+            try:
+                _ = await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except TimeoutError:
+                pass
+            try:
+                _ = await self.flush()
+            except Exception as e:  # noqa: BLE001
+                print(f"Error writing {self._num_pending} votes: {e!r}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_forever())
+
+    async def stop(self) -> None:
+        """Stops the background writes and writes what is still buffered."""
+        if self._task is not None:
+            # not cancelled, which could abandon a write halfway
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+            self._stopping = False
+        try:
+            _ = await self.flush()
+        except Exception as e:  # noqa: BLE001
+            print(f"Error writing {self._num_pending} votes: {e!r}")
@@ -0,0 +1,2 @@
+-- The LLM's headline suggestions of every improvement, the chosen title first.
+ALTER TABLE improvements ADD COLUMN IF NOT EXISTS suggestions jsonb NOT NULL DEFAULT '[]';
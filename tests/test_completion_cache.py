@@ -0,0 +1,47 @@
+import itertools
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+
+from prophet.infra.completion_cache import CompletionCache
+
+
+def _stored(path: Path) -> list[str]:
+    with sqlite3.connect(path) as db:
+        return sorted(key for (key,) in db.execute("SELECT key FROM completions"))
+
+
+def test_evicts_the_least_recently_used_in_batches(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    clock = itertools.count(time.time())
+    monkeypatch.setattr(time, "time", lambda: float(next(clock)))
+    path = tmp_path / "completions.sqlite"
+    cache = CompletionCache(path, max_disk_entries=10)
+
+    for i in range(11):
+        cache.put(f"k{i:02}", f"v{i}")
+    cache = CompletionCache(path, max_disk_entries=10)
+    assert cache.get("k00") == "v0"  # from disk, now used after k01
+    assert len(_stored(path)) == 11  # within the margin
+
+    cache.put("k11", "v11")
+    assert _stored(path) == ["k00", *(f"k{i:02}" for i in range(3, 12))]
+
+
+def test_disk_hits_survive_a_restart(tmp_path: Path) -> None:
+    path = tmp_path / "completions.sqlite"
+    CompletionCache(path).put("key", "value")
+
+    cache = CompletionCache(path, max_memory_entries=1)
+    assert cache.get("key") == "value"
+    assert cache.get("key") == "value"
+    assert cache.get("other") is None
+    assert cache.stats() == {
+        "hits_memory": 1,
+        "hits_disk": 1,
+        "misses": 1,
+        "entries_memory": 1,
+    }
@@ -0,0 +1,134 @@
+import asyncio
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import override
+
+import pytest
+
+from prophet.container import Container
+from prophet.domain.improvement import Improvement
+from prophet.domain.original import Original
+from prophet.infra.image_cache import ImageCache
+from prophet.infra.improvement_async_adapter import AsyncImprovementRepoAdapter
+from prophet.infra.improvement_indexed_repo import IndexedImprovementRepo
+from prophet.infra.improvement_instrumented_repo import InstrumentedImprovementRepo
+from prophet.infra.improvement_memory_repo import ImprovementMemoryRepo
+from prophet.infra.llm_fake import FakeLLMClient
+from prophet.infra.search_index import SearchIndex
+from prophet.infra.vote_sqlite_repo import VoteSqliteRepo
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class _Store(AsyncImprovementRepoAdapter):
+    """A memory store that can be closed like the Supabase one."""
+
+    closed: bool
+
+    def __init__(self, *improvements: Improvement) -> None:
+        super().__init__(ImprovementMemoryRepo())
+        self.repo.add_all(list(improvements))
+        self.closed = False
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+class _UnreachableStore(_Store):
+    @override
+    async def get_all(self, last_n: int | None = None) -> list[Improvement]:
+        raise OSError("store unreachable")
+
+
+def _improvement(i: int) -> Improvement:
+    return Improvement(
+        original=Original(
+            title=f"Pollen count rises in town {i}",
+            summary="",
+            link=f"https://example.com/{i}",
+            date=BASE + timedelta(minutes=i),
+        ),
+        title=f"Improved {i}",
+        summary="",
+    )
+
+
+def _container(tmp_path: Path, store: _Store) -> Container:
+    container = Container()
+    container.store = InstrumentedImprovementRepo(store)
+    container.llm = FakeLLMClient()
+    container.search = SearchIndex(tmp_path / "search.npz")
+    container.images = ImageCache(tmp_path / "images")
+    container.vote_store = VoteSqliteRepo(tmp_path / "votes.sqlite")
+    return container
+
+
+def test_importing_the_app_builds_no_service() -> None:
+    code = (
+        "import sys\n"
+        "from prophet.app import app\n"
+        "from prophet.container import container\n"
+        "print(sorted(vars(container)))\n"
+        "print([m for m in ('supabase', 'groq', 'numpy') if m in sys.modules])\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.splitlines() == ["[]", "[]"]
+
+
+def test_services_are_wired_on_first_use(tmp_path: Path) -> None:
+    container = _container(tmp_path, _Store())
+    assert "tier" not in vars(container)
+
+    repo = container.repo
+
+    assert repo is container.repo
+    indexed = repo.repo
+    assert isinstance(indexed, IndexedImprovementRepo)
+    assert indexed.repo is container.tier
+    assert indexed.indexes == (container.search, container.headlines)
+    assert container.tier.backing is container.store
+    assert container.votes.repo is container.vote_store
+
+
+def test_warm_up_loads_the_tier_and_the_indexes(tmp_path: Path) -> None:
+    container = _container(tmp_path, _Store(*(_improvement(i) for i in range(3))))
+
+    asyncio.run(container.warm_up())
+
+    assert container.tier.memory is not None
+    assert len(container.tier.memory.get_all()) == 3
+    assert len(container.headlines) == 3
+    assert len(container.search) == 3
+
+
+def test_warm_up_survives_an_unreachable_store(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    container = _container(tmp_path, _UnreachableStore())
+
+    asyncio.run(container.warm_up())
+
+    assert container.tier.memory is None
+    assert len(container.search) == 0
+    assert "Could not load improvements" in capsys.readouterr().out
+
+
+def test_aclose_saves_the_index_and_closes_the_store(tmp_path: Path) -> None:
+    store = _Store(_improvement(0))
+    container = _container(tmp_path, store)
+    asyncio.run(container.warm_up())
+    repo = container.repo
+
+    asyncio.run(container.aclose())
+
+    assert store.closed
+    assert (tmp_path / "search.npz").exists()
+    for name in ("store", "tier", "repo", "search", "images"):
+        assert name not in vars(container)
+    container.store = InstrumentedImprovementRepo(_Store())
+    assert container.repo is not repo
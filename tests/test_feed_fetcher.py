@@ -0,0 +1,148 @@
+import asyncio
+import http.server
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from typing import ClassVar
+
+import pytest
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.original import Original
+from prophet.infra.feed_fetcher import FeedFetcher, FeedFetchError
+from prophet.scheduler import RETRY_BASE, FeedScheduler, ScheduledFeed
+
+FEED = Path(__file__).parents[1] / "test/resources/feed_short.atom"
+ETAG = '"feed-v1"'
+
+
+class _FeedHandler(http.server.BaseHTTPRequestHandler):
+    requests: ClassVar[list[str | None]] = []  # If-None-Match of every request
+    failing: ClassVar[bool] = False  # answers 503 while set
+
+    def do_GET(self) -> None:
+        self.requests.append(self.headers.get("If-None-Match"))
+        if self.failing:
+            self.send_error(503)
+            return
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = FEED.read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", ETAG)
+        self.end_headers()
+        _ = self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def feed_url() -> Iterator[str]:
+    _FeedHandler.requests = []
+    _FeedHandler.failing = False
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _FeedHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/feed"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_unchanged_feed_costs_a_304_once_committed(feed_url: str, tmp_path: Path):
+    fetcher = FeedFetcher(feed_url, state_file=tmp_path / "state.json")
+
+    assert len(asyncio.run(fetcher.fetch())) == 3
+    # not committed, so the feed is downloaded again
+    assert len(asyncio.run(fetcher.fetch())) == 3
+    fetcher.commit()
+
+    restarted = FeedFetcher(feed_url, state_file=tmp_path / "state.json")
+    assert asyncio.run(restarted.fetch()) == []
+    assert _FeedHandler.requests == [None, None, ETAG]
+
+
+def test_unreachable_feed_raises() -> None:
+    fetcher = FeedFetcher("http://127.0.0.1:9/feed", state_file=None)
+
+    with pytest.raises(FeedFetchError):
+        _ = asyncio.run(fetcher.fetch())
+
+
+def test_failing_feed_backs_off_and_keeps_its_validators(
+    feed_url: str, tmp_path: Path
+) -> None:
+    state_file = tmp_path / "state.json"
+    fetcher = FeedFetcher(feed_url, state_file=state_file)
+    _ = asyncio.run(fetcher.fetch())
+    fetcher.commit()
+    _FeedHandler.failing = True
+    feed = ScheduledFeed(fetcher, interval=0)
+
+    async def process(originals: list[Original]) -> list[Improvement]:
+        return []
+
+    async def poll_until_failed() -> None:
+        scheduler = FeedScheduler([feed], process=process)
+        scheduler.start()
+        try:
+            async with asyncio.timeout(5):
+                while not feed.failures:
+                    await asyncio.sleep(0.01)
+        finally:
+            await scheduler.stop()
+
+    asyncio.run(poll_until_failed())
+
+    assert feed.failures == 1
+    assert feed.next_delay() >= RETRY_BASE / 2
+    assert fetcher.etag == ETAG
+    assert FeedFetcher(feed_url, state_file=state_file).etag == ETAG
+
+
+def test_skips_known_entries_but_not_older_unknown_ones():
+    fetcher = FeedFetcher(str(FEED), state_file=None)
+    titles = [o.title for o in asyncio.run(fetcher.fetch())]
+
+    async def known(links: list[str]) -> set[str]:
+        return {links[0]}  # only the newest is stored
+
+    fresh = asyncio.run(fetcher.fetch(known_links=known))
+    assert [o.title for o in fresh] == titles[1:]
+
+
+def test_failed_rewrite_is_retried_on_the_next_refresh():
+    stored: dict[str, Improvement] = {}
+    failed: list[str] = []
+
+    async def known_links(links: list[str]) -> set[str]:
+        return stored.keys() & set(links)
+
+    async def process(originals: list[Original]) -> list[Improvement]:
+        improved: list[Improvement] = []
+        for original in originals:
+            if original.title.startswith("Worship") and not failed:
+                failed.append(original.title)  # fails once
+                continue
+            improved.append(
+                Improvement(original=original, title=original.title, summary="")
+            )
+        stored.update((imp.original.link, imp) for imp in improved)
+        return improved
+
+    scheduler = FeedScheduler(
+        [ScheduledFeed(FeedFetcher(str(FEED), state_file=None), interval=0)],
+        process=process,
+        known_links=known_links,
+    )
+
+    assert len(asyncio.run(scheduler.run_once())) == 2
+    retried = asyncio.run(scheduler.run_once())
+    assert [imp.title for imp in retried] == failed
+    assert len(stored) == 3
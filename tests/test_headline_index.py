@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from prophet import app as appmod
+from prophet.container import container
+from prophet.domain.improvement import Improvement
+from prophet.domain.original import Original
+from prophet.infra.headline_index import HeadlineIndex
+from prophet.infra.improvement_async_adapter import AsyncImprovementRepoAdapter
+from prophet.infra.improvement_cached_repo import CachedImprovementRepo
+from prophet.infra.improvement_indexed_repo import IndexedImprovementRepo
+from prophet.infra.improvement_memory_repo import ImprovementMemoryRepo
+from prophet.infra.llm_fake import FakeLLMClient
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+STORY = "Local man sure the weather will finally cooperate this weekend"
+
+
+def _original(title: str, link: str, minutes: int = 0) -> Original:
+    return Original(
+        title=title, summary="", link=link, date=BASE + timedelta(minutes=minutes)
+    )
+
+
+def _improvement(title: str, link: str, minutes: int = 0) -> Improvement:
+    return Improvement(
+        original=_original(title, link, minutes),
+        title=f"Improved: {title}",
+        summary=f"About {title}",
+        suggestions=[f"Improved: {title}", "Another take"],
+    )
+
+
+def _indexed(headlines: HeadlineIndex) -> CachedImprovementRepo:
+    return CachedImprovementRepo(
+        IndexedImprovementRepo(
+            AsyncImprovementRepoAdapter(ImprovementMemoryRepo()), headlines
+        )
+    )
+
+
+def test_finds_the_improvement_of_a_republished_story() -> None:
+    headlines = HeadlineIndex()
+    stored = _improvement(STORY, "https://example.com/a")
+    headlines.add_all([stored, _improvement("Nation shrugs", "https://example.com/b")])
+
+    republished = _original(f"BREAKING: {STORY}!", "https://example.com/a2")
+
+    assert headlines.near_duplicate(republished) == stored.id
+    assert headlines.near_duplicate(stored.original) is None
+
+
+def test_follows_the_repos_truncation() -> None:
+    headlines = HeadlineIndex()
+    repo = _indexed(headlines)
+    old = _improvement(STORY, "https://example.com/a", minutes=0)
+    tied = [_improvement(f"Story {i}", f"https://example.com/{i}", 1) for i in (1, 2)]
+    asyncio.run(repo.add_all([old, *tied]))
+
+    assert asyncio.run(repo.retain_newest(1)) == 1
+
+    assert len(headlines) == 2
+    assert headlines.near_duplicate(_original(STORY, "https://example.com/a2")) is None
+
+
+def test_a_republished_story_reuses_the_stored_rewrite(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    headlines = HeadlineIndex()
+    repo = _indexed(headlines)
+    llm = FakeLLMClient()
+    monkeypatch.setitem(container.__dict__, "headlines", headlines)
+    monkeypatch.setitem(container.__dict__, "repo", repo)
+    monkeypatch.setitem(container.__dict__, "llm", llm)
+    stored = _improvement(STORY, "https://example.com/a")
+    asyncio.run(repo.add(stored))
+
+    republished = _original(f"{STORY}!", "https://example.com/a2", minutes=5)
+    unrelated = _original("Nation shrugs", "https://example.com/b", minutes=5)
+    improved = asyncio.run(appmod.store_improved([republished, unrelated]))
+
+    reused = next(i for i in improved if i.original is republished)
+    assert (reused.title, reused.summary) == (stored.title, stored.summary)
+    assert reused.suggestions == stored.suggestions
+    assert reused.id != stored.id
+    assert llm.calls == 1  # one batch, for the unrelated story only
+    assert asyncio.run(repo.existing_links([republished.link, unrelated.link])) == {
+        republished.link,
+        unrelated.link,
+    }
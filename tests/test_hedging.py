@@ -0,0 +1,70 @@
+import threading
+import time
+from collections.abc import Callable
+
+from prophet.infra.llm_hedging import FALLBACK, PRIMARY, Hedger
+
+
+def _slow(seconds: float, calls: list[str]) -> Callable[[str], str]:
+    """Answers "small" at once and other models after `seconds`."""
+
+    def complete(model: str) -> str:
+        calls.append(model)
+        time.sleep(0 if model == "small" else seconds)
+        return model
+
+    return complete
+
+
+def test_time_queued_for_admission_is_not_latency() -> None:
+    hedger = Hedger("big", budgets={"stage": 0.5})
+
+    def queued(_: threading.Event) -> bool:
+        time.sleep(0.02)
+        return True
+
+    for _ in range(20):
+        _, route = hedger.run("stage", lambda model: model, admit=queued)
+        assert route.seconds < 0.02
+
+    slowest = hedger.latencies.quantile("stage", "big", 1.0)
+    assert slowest is not None and slowest < 0.01
+
+
+def test_fallback_is_only_sent_while_the_limits_have_room() -> None:
+    calls: list[str] = []
+    hedger = Hedger("big", "small", budgets={"stage": 0.1})
+
+    result, route = hedger.run("stage", _slow(0.2, calls), can_hedge=lambda: False)
+
+    assert (result, route.path) == ("big", PRIMARY)
+    assert calls == ["big"]
+
+    calls.clear()
+    result, route = hedger.run("stage", _slow(0.2, calls), can_hedge=lambda: True)
+
+    assert (result, route.path) == ("small", FALLBACK)
+    assert calls == ["big", "big", "small"]  # hedged after half the budget
+
+
+def test_requests_not_yet_admitted_are_dropped_once_answered() -> None:
+    calls: list[str] = []
+    admitted = 0
+    dropped = threading.Event()
+    hedger = Hedger("big", budgets={"stage": 0.1})
+
+    def admit(cancelled: threading.Event) -> bool:
+        nonlocal admitted
+        admitted += 1
+        if admitted == 1:
+            return True
+        if cancelled.wait(5):
+            dropped.set()
+            return False
+        return True
+
+    _, route = hedger.run("stage", _slow(0.1, calls), admit=admit)
+
+    assert route.path == PRIMARY
+    assert dropped.wait(1)
+    assert calls == ["big"]
@@ -0,0 +1,83 @@
+import asyncio
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from bench.images import IMAGE_BYTES, ImageServer, serve_images
+from prophet.infra.image_cache import ImageCache, ImageFetchError
+
+
+@pytest.fixture
+def server() -> Iterator[ImageServer]:
+    with serve_images() as server:
+        yield server
+
+
+def test_concurrent_misses_share_one_download(
+    server: ImageServer, tmp_path: Path
+) -> None:
+    cache = ImageCache(tmp_path)
+
+    async def fetch_all() -> list[tuple[Path, str]]:
+        try:
+            return await asyncio.gather(
+                *(cache.fetch("img0", f"{server.url}/img0.jpg") for _ in range(10))
+            )
+        finally:
+            await cache.aclose()
+
+    fetched = asyncio.run(fetch_all())
+
+    assert server.requests == ["/img0.jpg"]
+    assert set(fetched) == {(tmp_path / "img0.jpg", "image/jpeg")}
+    assert cache.get("img0") == fetched[0]
+
+
+def test_least_recently_used_images_are_evicted(
+    server: ImageServer, tmp_path: Path
+) -> None:
+    cache = ImageCache(tmp_path, max_bytes=3 * IMAGE_BYTES)
+
+    async def fetch_in_turn() -> None:
+        try:
+            for i in range(5):
+                _ = await cache.fetch(f"img{i}", f"{server.url}/img{i}.jpg")
+                # an older use than the next fetch, at the file system's resolution
+                os.utime(tmp_path / f"img{i}.jpg", (i, i))
+        finally:
+            await cache.aclose()
+
+    asyncio.run(fetch_in_turn())
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "img2.jpg",
+        "img3.jpg",
+        "img4.jpg",
+    ]
+
+
+def test_prefetch_skips_cached_and_failing_images(
+    server: ImageServer, tmp_path: Path
+) -> None:
+    cache = ImageCache(tmp_path)
+    images = {
+        "cached": f"{server.url}/cached.jpg",
+        "new": f"{server.url}/new.jpg",
+        "gone": f"{server.url}/missing/gone.jpg",
+    }
+
+    async def prefetch() -> int:
+        try:
+            _ = await cache.fetch("cached", images["cached"])
+            with pytest.raises(ImageFetchError):
+                _ = await cache.fetch("gone", images["gone"])
+            return await cache.prefetch(images)
+        finally:
+            await cache.aclose()
+
+    assert asyncio.run(prefetch()) == 1
+    assert server.requests.count("/cached.jpg") == 1
+    assert cache.get("new") is not None
+    assert cache.get("gone") is None
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from typing import Any, override
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.improvement_repo import (
+    IAsyncImprovementRepo,
+    IImprovementRepo,
+    PageCursor,
+)
+from prophet.domain.original import Original
+from prophet.infra.improvement_async_adapter import AsyncImprovementRepoAdapter
+from prophet.infra.improvement_instrumented_repo import InstrumentedImprovementRepo
+from prophet.metrics import REPO_CALL_SECONDS
+
+ARTICLE = Improvement(
+    original=Original(
+        title="Original",
+        summary="",
+        link="https://example.com/a",
+        date=datetime(2026, 1, 1, tzinfo=timezone.utc),
+    ),
+    title="Improved",
+    summary="",
+)
+CURSOR = PageCursor.after(ARTICLE)
+CUTOFF = datetime(2026, 1, 2, tzinfo=timezone.utc)
+
+# every method with its arguments and what the blocking repo answers
+CALLS: dict[str, tuple[tuple[Any, ...], Any]] = {
+    "add": ((ARTICLE,), None),
+    "add_all": (([ARTICLE],), None),
+    "get": ((ARTICLE.id,), ARTICLE),
+    "get_all": ((5,), [ARTICLE]),
+    "get_page": ((10, CURSOR), [ARTICLE]),
+    "existing_links": ((["https://example.com/a"],), {"https://example.com/a"}),
+    "remove": ((ARTICLE.id,), ARTICLE),
+    "remove_all": (([ARTICLE.id],), [ARTICLE]),
+    "retain_newest": ((3,), 1),
+    "delete_older_than": ((CUTOFF,), 2),
+}
+
+
+class _RecordingRepo(IImprovementRepo):
+    """Answers every call from `CALLS`, recording its arguments and the
+    thread it ran on."""
+
+    calls: dict[str, tuple[tuple[Any, ...], int]]
+
+    def __init__(self) -> None:
+        self.calls = {}
+
+    def _record(self, name: str, *args: Any) -> Any:
+        self.calls[name] = (args, threading.get_ident())
+        return CALLS[name][1]
+
+    @override
+    def add(self, improvement: Improvement) -> None:
+        return self._record("add", improvement)
+
+    @override
+    def add_all(self, improvements: list[Improvement]) -> None:
+        return self._record("add_all", improvements)
+
+    @override
+    def get(self, id: str) -> Improvement:
+        return self._record("get", id)
+
+    @override
+    def get_all(self, last_n: int | None = None) -> list[Improvement]:
+        return self._record("get_all", last_n)
+
+    @override
+    def get_page(
+        self, limit: int, after: PageCursor | None = None
+    ) -> list[Improvement]:
+        return self._record("get_page", limit, after)
+
+    @override
+    def existing_links(self, links: list[str]) -> set[str]:
+        return self._record("existing_links", links)
+
+    @override
+    def remove(self, id: str) -> Improvement:
+        return self._record("remove", id)
+
+    @override
+    def remove_all(self, ids: list[str]) -> list[Improvement]:
+        return self._record("remove_all", ids)
+
+    @override
+    def retain_newest(self, n: int) -> int:
+        return self._record("retain_newest", n)
+
+    @override
+    def delete_older_than(self, ts: datetime) -> int:
+        return self._record("delete_older_than", ts)
+
+
+def _call_all(repo: IAsyncImprovementRepo) -> tuple[dict[str, Any], int]:
+    """Every method's result through `repo`, and the event loop's thread."""
+
+    async def scenario() -> dict[str, Any]:
+        results: dict[str, Any] = {}
+        for name, (args, _) in CALLS.items():
+            method: Callable[..., Awaitable[Any]] = getattr(repo, name)
+            results[name] = await method(*args)
+        return results
+
+    return asyncio.run(scenario()), threading.get_ident()
+
+
+def test_calls_cover_the_whole_protocol() -> None:
+    for protocol in (IImprovementRepo, IAsyncImprovementRepo):
+        assert {n for n in vars(protocol) if not n.startswith("_")} == set(CALLS)
+
+
+def test_adapter_forwards_every_call_to_a_worker_thread() -> None:
+    blocking = _RecordingRepo()
+
+    results, loop_thread = _call_all(AsyncImprovementRepoAdapter(blocking))
+
+    assert results == {name: answer for name, (_, answer) in CALLS.items()}
+    assert {name: args for name, (args, _) in blocking.calls.items()} == {
+        name: args for name, (args, _) in CALLS.items()
+    }
+    assert all(thread != loop_thread for _, thread in blocking.calls.values())
+
+
+def test_instrumented_repo_times_every_call() -> None:
+    blocking = _RecordingRepo()
+    before = {name: REPO_CALL_SECONDS.count(method=name) for name in CALLS}
+
+    results, _ = _call_all(
+        InstrumentedImprovementRepo(AsyncImprovementRepoAdapter(blocking))
+    )
+
+    assert results == {name: answer for name, (_, answer) in CALLS.items()}
+    assert set(blocking.calls) == set(CALLS)
+    assert {
+        name: REPO_CALL_SECONDS.count(method=name) - before[name] for name in CALLS
+    } == dict.fromkeys(CALLS, 1)
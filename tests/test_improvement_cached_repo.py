@@ -0,0 +1,151 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import Path
+from typing import override
+
+import httpx
+from fastapi import FastAPI
+
+from prophet import view
+from prophet.container import get_repo, get_snapshots, get_votes
+from prophet.domain.improvement import Improvement
+from prophet.domain.original import Original
+from prophet.infra.improvement_async_adapter import AsyncImprovementRepoAdapter
+from prophet.infra.improvement_cached_repo import CachedImprovementRepo
+from prophet.infra.improvement_memory_repo import ImprovementMemoryRepo
+from prophet.infra.snapshot_store import SnapshotStore
+from prophet.infra.vote_sqlite_repo import VoteSqliteRepo
+from prophet.votes import VoteCounter
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class _CountingRepo(AsyncImprovementRepoAdapter):
+    """Counts the listings loaded from the memory repo, each taking a while."""
+
+    loads: int
+
+    def __init__(self) -> None:
+        super().__init__(ImprovementMemoryRepo())
+        self.loads = 0
+
+    @override
+    async def get_all(self, last_n: int | None = None) -> list[Improvement]:
+        self.loads += 1
+        await asyncio.sleep(0.01)
+        return await super().get_all(last_n)
+
+
+def _improvement(i: int) -> Improvement:
+    return Improvement(
+        original=Original(
+            title=f"Original {i}",
+            summary="",
+            link=f"https://example.com/{i}",
+            date=BASE + timedelta(minutes=i),
+        ),
+        title=f"Improved {i}",
+        summary="",
+    )
+
+
+def test_writes_invalidate_and_deleting_nothing_does_not() -> None:
+    store = _CountingRepo()
+    repo = CachedImprovementRepo(store)
+
+    async def scenario() -> list[int]:
+        loads: list[int] = []
+        added = _improvement(3)
+        await repo.add_all([_improvement(i) for i in range(3)])
+        for write in (
+            lambda: repo.add(added),
+            lambda: repo.remove(added.id),
+            lambda: repo.retain_newest(10),  # deletes nothing
+            lambda: repo.retain_newest(2),
+            lambda: repo.delete_older_than(BASE),  # deletes nothing
+        ):
+            _ = await repo.get_all()
+            _ = await repo.get_all()
+            _ = await write()
+            loads.append(store.loads)
+        return loads
+
+    assert asyncio.run(scenario()) == [1, 2, 3, 3, 4]
+    assert len(asyncio.run(repo.get_all())) == 2
+
+
+def test_image_links_are_looked_up_in_one_map_per_listing() -> None:
+    store = _CountingRepo()
+    repo = CachedImprovementRepo(store)
+    first, second = _improvement(0), _improvement(1)
+    first.original.image_link = "https://example.com/0.jpg"
+
+    async def scenario() -> list[str | None]:
+        await repo.add_all([first, second])
+        links = [
+            await repo.image_link(first.original.id),
+            await repo.image_link(second.original.id),
+            await repo.image_link("unknown"),
+        ]
+        _ = await repo.remove(first.id)
+        links.append(await repo.image_link(first.original.id))
+        return links
+
+    assert asyncio.run(scenario()) == ["https://example.com/0.jpg", "", None, None]
+    assert store.loads == 2
+
+
+def test_concurrent_misses_share_one_load() -> None:
+    store = _CountingRepo()
+    repo = CachedImprovementRepo(store)
+
+    async def read_together() -> list[list[Improvement]]:
+        await repo.add(_improvement(0))
+        return await asyncio.gather(*(repo.get_all() for _ in range(10)))
+
+    listings = asyncio.run(read_together())
+
+    assert store.loads == 1
+    assert all(len(listing) == 1 for listing in listings)
+    assert repo.stats()["misses"] == 1
+    assert repo.stats()["hits"] == 9
+
+
+def test_unchanged_listing_is_not_modified(tmp_path: Path) -> None:
+    repo = CachedImprovementRepo(AsyncImprovementRepoAdapter(ImprovementMemoryRepo()))
+    votes = VoteCounter(VoteSqliteRepo(tmp_path / "votes.sqlite"))
+    snapshots = SnapshotStore(tmp_path / "snapshots")
+    app = FastAPI()
+    view.define_routes(app)
+    app.dependency_overrides[get_repo] = lambda: repo
+    app.dependency_overrides[get_votes] = lambda: votes
+    app.dependency_overrides[get_snapshots] = lambda: snapshots
+
+    async def requests() -> list[httpx.Response]:
+        await repo.add(_improvement(0))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            first = await c.get("/improvements")
+            etag, modified = first.headers["ETag"], first.headers["Last-Modified"]
+            earlier = format_datetime(repo.last_modified - timedelta(hours=1), True)
+            responses = [
+                first,
+                await c.get("/improvements", headers={"If-None-Match": etag}),
+                await c.get("/improvements", headers={"If-Modified-Since": modified}),
+                await c.get("/improvements", headers={"If-Modified-Since": earlier}),
+                # If-None-Match takes precedence
+                await c.get(
+                    "/improvements",
+                    headers={"If-None-Match": '"other"', "If-Modified-Since": modified},
+                ),
+            ]
+            await repo.add(_improvement(1))
+            responses.append(
+                await c.get("/improvements", headers={"If-None-Match": etag})
+            )
+            return responses
+
+    statuses = [r.status_code for r in asyncio.run(requests())]
+
+    assert statuses == [200, 304, 304, 200, 200, 200]
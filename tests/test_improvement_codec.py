@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+
+from postgrest import APIError
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.original import Original
+from prophet.infra import improvement_codec as codec
+from prophet.infra.improvement_supa_repo import missing_suggestions
+
+
+def _improvement(suggestions: list[str]) -> Improvement:
+    return Improvement(
+        original=Original(
+            title="t",
+            summary="s",
+            link="https://example.com/1",
+            date=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        ),
+        title="t",
+        summary="s",
+        suggestions=suggestions,
+    )
+
+
+def test_rows_leave_out_empty_suggestions() -> None:
+    with_some = _improvement(["t", "u"])
+    without = _improvement([])
+
+    assert codec.to_row(with_some)["suggestions"] == ["t", "u"]
+    assert "suggestions" not in codec.to_row(with_some, suggestions=False)
+    assert "suggestions" not in codec.to_row(without)
+    assert codec.from_record(codec.to_row(without)).suggestions == []
+
+
+def test_recognizes_a_table_without_the_suggestions_column() -> None:
+    missing = APIError(
+        {
+            "code": "PGRST204",
+            "message": "Could not find the 'suggestions' column of "
+            + "'improvements' in the schema cache",
+        }
+    )
+    duplicate = APIError({"code": "23505", "message": "duplicate key value"})
+
+    assert missing_suggestions(missing)
+    assert not missing_suggestions(duplicate)
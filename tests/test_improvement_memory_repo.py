@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta, timezone
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.original import Original
+from prophet.infra.improvement_memory_repo import ImprovementMemoryRepo
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _improvement(link: str, minutes: int) -> Improvement:
+    return Improvement(
+        original=Original(
+            title=link, summary="", link=link, date=BASE + timedelta(minutes=minutes)
+        ),
+        title=link,
+        summary="",
+    )
+
+
+def test_retain_newest_keeps_ties_on_the_nth_date_like_the_stores() -> None:
+    repo = ImprovementMemoryRepo()
+    repo.add_all(
+        [_improvement(f"l{i}", minutes) for i, minutes in enumerate([0, 1, 1, 2])]
+    )
+
+    assert repo.retain_newest(2) == 1
+    assert sorted(i.original.link for i in repo.get_all()) == ["l1", "l2", "l3"]
+    assert repo.retain_newest(5) == 0
+
+
+def test_dropping_a_replaced_record_keeps_the_link_of_its_successor() -> None:
+    repo = ImprovementMemoryRepo()
+    old = _improvement("https://example.com/a", 0)
+    new = _improvement("https://example.com/a", 5)
+    repo.add_all([old, new])
+
+    assert repo.delete_older_than(BASE + timedelta(minutes=1)) == 1
+    assert repo.existing_links([old.original.link]) == {old.original.link}
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.improvement_repo import ImprovementNotFoundError, PageCursor
+from prophet.domain.original import Original
+from prophet.infra.improvement_sqlite_repo import ImprovementSqliteRepo
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _improvement(link: str, minutes: int) -> Improvement:
+    return Improvement(
+        original=Original(
+            title=link, summary="", link=link, date=BASE + timedelta(minutes=minutes)
+        ),
+        title=link,
+        summary="",
+        suggestions=[link, "Another take"],
+    )
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> ImprovementSqliteRepo:
+    return ImprovementSqliteRepo(tmp_path / "improvements.sqlite")
+
+
+def _links(improvements: list[Improvement]) -> list[str]:
+    return [imp.original.link for imp in improvements]
+
+
+def test_pages_newest_first_across_equal_dates(repo: ImprovementSqliteRepo) -> None:
+    stored = [_improvement(f"l{i}", minutes) for i, minutes in enumerate([0, 1, 1, 2])]
+    repo.add_all(stored)
+    newest_first = _links(repo.get_all())
+
+    pages: list[str] = []
+    cursor: PageCursor | None = None
+    while page := repo.get_page(3, after=cursor):
+        pages.extend(_links(page))
+        cursor = PageCursor.after(page[-1])
+
+    assert pages == newest_first
+    assert newest_first[0] == "l3"
+    assert newest_first[-1] == "l0"
+    assert repo.get(stored[1].id).suggestions == stored[1].suggestions
+
+
+def test_existing_links_are_only_the_stored_ones(repo: ImprovementSqliteRepo) -> None:
+    repo.add_all([_improvement("l0", 0), _improvement("l1", 1)])
+
+    assert repo.existing_links(["l1", "l2"]) == {"l1"}
+    assert repo.existing_links([]) == set()
+
+
+def test_retain_newest_keeps_ties_on_the_nth_date(repo: ImprovementSqliteRepo) -> None:
+    repo.add_all([_improvement(f"l{i}", m) for i, m in enumerate([0, 1, 1, 2])])
+
+    assert repo.retain_newest(2) == 1
+    assert sorted(_links(repo.get_all())) == ["l1", "l2", "l3"]
+    assert repo.retain_newest(5) == 0
+    with pytest.raises(ValueError):
+        _ = repo.retain_newest(0)
+
+
+def test_delete_older_than_keeps_the_cutoff(repo: ImprovementSqliteRepo) -> None:
+    repo.add_all([_improvement(f"l{i}", m) for i, m in enumerate([0, 1, 1, 2])])
+
+    assert repo.delete_older_than(BASE + timedelta(minutes=1)) == 1
+    assert sorted(_links(repo.get_all())) == ["l1", "l2", "l3"]
+
+
+def test_remove_all_returns_what_was_removed(repo: ImprovementSqliteRepo) -> None:
+    stored = [_improvement(f"l{i}", i) for i in range(3)]
+    repo.add_all(stored)
+
+    removed = repo.remove_all([stored[0].id, "missing", stored[2].id])
+
+    assert sorted(imp.id for imp in removed) == sorted([stored[0].id, stored[2].id])
+    assert repo.remove_all([]) == []
+    assert repo.remove(stored[1].id).id == stored[1].id
+    with pytest.raises(ImprovementNotFoundError):
+        _ = repo.remove(stored[1].id)
@@ -0,0 +1,83 @@
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.improvement_repo import IImprovementRepo
+from prophet.domain.original import Original
+from prophet.infra.improvement_memory_repo import ImprovementMemoryRepo
+from prophet.infra.improvement_pickle_repo import ImprovementPickleRepo
+from prophet.infra.improvement_sqlite_repo import ImprovementSqliteRepo
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+MINUTES = [0, 1, 1, 2]  # two improvements tie on the second newest date
+
+STORES: dict[str, Callable[[Path], IImprovementRepo]] = {
+    "memory": lambda _: ImprovementMemoryRepo(),
+    "pickle": lambda tmp: ImprovementPickleRepo(tmp / "pickle"),
+    "sqlite": lambda tmp: ImprovementSqliteRepo(tmp / "improvements.sqlite"),
+}
+
+
+@pytest.fixture(params=STORES)
+def repo(request: pytest.FixtureRequest, tmp_path: Path) -> IImprovementRepo:
+    repo = STORES[request.param](tmp_path)
+    repo.add_all(
+        [
+            Improvement(
+                original=Original(
+                    title=f"l{i}",
+                    summary="",
+                    link=f"l{i}",
+                    date=BASE + timedelta(minutes=minutes),
+                ),
+                title=f"l{i}",
+                summary="",
+            )
+            for i, minutes in enumerate(MINUTES)
+        ]
+    )
+    return repo
+
+
+def _links(repo: IImprovementRepo) -> list[str]:
+    return sorted(imp.original.link for imp in repo.get_all())
+
+
+def test_retain_newest_keeps_ties_on_the_nth_date(repo: IImprovementRepo) -> None:
+    assert repo.retain_newest(2) == 1
+    assert _links(repo) == ["l1", "l2", "l3"]
+
+
+def test_retain_newest_keeps_everything_within_n(repo: IImprovementRepo) -> None:
+    assert repo.retain_newest(len(MINUTES)) == 0
+    assert repo.retain_newest(1) == 3
+    assert _links(repo) == ["l3"]
+    with pytest.raises(ValueError):
+        _ = repo.retain_newest(0)
+
+
+@pytest.mark.parametrize(
+    "cutoff",
+    [
+        BASE + timedelta(minutes=1),
+        BASE.astimezone(timezone(timedelta(hours=2))) + timedelta(minutes=1),
+        # naive, in local time like `datetime.now()`
+        (BASE + timedelta(minutes=1)).astimezone().replace(tzinfo=None),
+    ],
+    ids=["utc", "offset", "naive"],
+)
+def test_delete_older_than_keeps_the_cutoff(
+    repo: IImprovementRepo, cutoff: datetime
+) -> None:
+    assert repo.delete_older_than(cutoff) == 1
+    assert _links(repo) == ["l1", "l2", "l3"]
+
+
+def test_existing_links_are_only_the_stored_ones(repo: IImprovementRepo) -> None:
+    assert repo.existing_links(["l1", "l3", "missing", "l1"]) == {"l1", "l3"}
+    assert repo.existing_links([]) == set()
+    _ = repo.remove(next(imp.id for imp in repo.get_all() if imp.original.link == "l1"))
+    assert repo.existing_links(["l1", "l3"]) == {"l3"}
@@ -0,0 +1,52 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import override
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.original import Original
+from prophet.infra.improvement_async_adapter import AsyncImprovementRepoAdapter
+from prophet.infra.improvement_memory_repo import ImprovementMemoryRepo
+from prophet.infra.improvement_tiered_repo import TieredImprovementRepo
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class _BackingRepo(AsyncImprovementRepoAdapter):
+    """A memory store recording the links it is asked about."""
+
+    asked: list[list[str]]
+
+    def __init__(self) -> None:
+        super().__init__(ImprovementMemoryRepo())
+        self.asked = []
+
+    @override
+    async def existing_links(self, links: list[str]) -> set[str]:
+        self.asked.append(links)
+        return await super().existing_links(links)
+
+
+def _improvement(link: str) -> Improvement:
+    return Improvement(
+        original=Original(title=link, summary="", link=link, date=BASE),
+        title=link,
+        summary="",
+    )
+
+
+def test_existing_links_confirms_unknown_links_with_the_store() -> None:
+    backing = _BackingRepo()
+    repo = TieredImprovementRepo(backing)
+
+    async def scenario() -> list[set[str]]:
+        await repo.add_all([_improvement("l0"), _improvement("l1")])
+        await repo.warm()
+        # stored by another process after the tier was loaded
+        backing.repo.add(_improvement("l2"))
+        return [
+            await repo.existing_links(["l0", "l1"]),
+            await repo.existing_links(["l1", "l2", "l3"]),
+        ]
+
+    assert asyncio.run(scenario()) == [{"l0", "l1"}, {"l1", "l2"}]
+    assert backing.asked == [["l2", "l3"]]
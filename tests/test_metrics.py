@@ -0,0 +1,68 @@
+import asyncio
+from pathlib import Path
+
+import httpx
+
+from prophet import metrics
+from prophet.app import app
+from prophet.container import get_snapshots
+from prophet.infra.snapshot_store import SnapshotStore
+
+
+def test_registry_renders_the_text_exposition_format() -> None:
+    registry = metrics.Registry()
+    requests = registry.counter("requests_total", "Requests served", ["path"])
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    requests.inc(path='/a "quoted"\\path')
+    requests.inc(2, path='/a "quoted"\\path')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    assert registry.render() == (
+        "# HELP requests_total Requests served\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{path="/a \\"quoted\\"\\\\path"} 3\n'
+        "# HELP latency_seconds Latency\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{le="0.1"} 1\n'
+        'latency_seconds_bucket{le="1.0"} 2\n'
+        'latency_seconds_bucket{le="+Inf"} 3\n'
+        "latency_seconds_sum 5.55\n"
+        "latency_seconds_count 3\n"
+    )
+
+
+def test_requests_are_labelled_by_route_template_or_mount(tmp_path: Path) -> None:
+    app.dependency_overrides[get_snapshots] = lambda: SnapshotStore(tmp_path)
+
+    async def scrape() -> httpx.Response:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            for path in (
+                "/static/style.css",
+                "/static/missing.css",
+                "/snapshots/v1/index.html",
+                "/snapshots/v2/index.html",
+                "/no/such/page",
+            ):
+                _ = await client.get(path)
+            return await client.get("/metrics")
+
+    try:
+        response = asyncio.run(scrape())
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    for labels, count in [
+        ('route="/static",method="GET",status="200"', 1),
+        ('route="/static",method="GET",status="404"', 1),
+        ('route="/snapshots/{version}/{name}",method="GET",status="404"', 2),
+        ('route="unmatched",method="GET",status="404"', 1),
+    ]:
+        assert f"prophet_http_request_seconds_count{{{labels}}} {count}" in lines
+    assert not any("/static/style.css" in line for line in lines)
@@ -0,0 +1,41 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.improvement_repo import PageCursor
+from prophet.domain.original import Original
+
+
+def test_round_trips_through_encode() -> None:
+    improvement = Improvement(
+        original=Original(
+            title="t",
+            summary="s",
+            link="https://example.com/1",
+            date=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        ),
+        title="t",
+        summary="s",
+    )
+    cursor = PageCursor.after(improvement)
+
+    assert PageCursor.decode(cursor.encode()) == cursor
+    original_id = PageCursor(cursor.date_ts, improvement.original.id)
+    assert PageCursor.decode(original_id.encode()) == original_id
+
+
+@pytest.mark.parametrize(
+    "encoded",
+    [
+        "1767225600",
+        "1767225600_",
+        "soon_0b6e4cbe-4c4b-4f6a-9a4e-3b1d2f0c9a7e",
+        "1767225600_0b6e4cbe-4c4b-4f6a-9a4e-3b1d2f0c9a7e,uuid.gt.0",
+        "1767225600_0b6e4cbe),date_orig_ts.gt.0,and(uuid.lt.x",
+        "1767225600_" + "A" * 64,
+    ],
+)
+def test_rejects_anything_but_a_timestamp_and_id(encoded: str) -> None:
+    with pytest.raises(ValueError, match="Invalid page cursor"):
+        _ = PageCursor.decode(encoded)
@@ -0,0 +1,39 @@
+import httpx
+
+from prophet.infra.llm_groq import BACKOFF_BASE, RateLimiter
+
+# Groq sends these with every response, the requests reset is the daily window
+QUOTA_HEADERS = {
+    "x-ratelimit-remaining-requests": "14370",
+    "x-ratelimit-reset-requests": "2m59.56s",
+    "x-ratelimit-remaining-tokens": "5800",
+    "x-ratelimit-reset-tokens": "2.5s",
+}
+
+
+def test_server_error_backs_off_exponentially_without_pausing():
+    limiter = RateLimiter(30, 12000)
+    response = httpx.Response(500, headers=QUOTA_HEADERS)
+
+    assert limiter.backoff(1, response) <= BACKOFF_BASE
+    assert limiter.requests.available() > 0
+    assert limiter.tokens.available() > 0
+
+
+def test_rate_limit_pauses_only_the_exhausted_quota():
+    limiter = RateLimiter(30, 12000)
+    response = httpx.Response(
+        429, headers=QUOTA_HEADERS | {"x-ratelimit-remaining-tokens": "0"}
+    )
+
+    assert limiter.backoff(1, response) == 2.5
+    assert limiter.tokens.available() == 0
+    assert limiter.requests.available() > 0
+
+
+def test_rate_limit_follows_retry_after():
+    limiter = RateLimiter(30, 12000)
+    response = httpx.Response(429, headers=QUOTA_HEADERS | {"retry-after": "7"})
+
+    assert limiter.backoff(1, response) == 7
+    assert limiter.requests.available() == 0
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import threading
+from datetime import datetime
+from typing import override
+
+import pytest
+
+from prophet.config import AiConfig
+from prophet.domain.improvement import Improvement
+from prophet.domain.original import Original
+from prophet.infra.llm_fake import FakeLLMClient
+from prophet.infra.llm_groq import GroqClient, parse_batch_response
+from prophet.rewriter import Rewriter
+
+
+class _CountingLLM(FakeLLMClient):
+    """Tracks how many calls overlap and fails for titles in `failing`."""
+
+    failing: set[str]
+    in_flight: int
+    most_in_flight: int
+
+    def __init__(self, latency: float, failing: set[str] | None = None) -> None:
+        super().__init__(latency)
+        self.failing = failing or set()
+        self.in_flight = 0
+        self.most_in_flight = 0
+        self._lock = threading.Lock()
+
+    @override
+    def get_alternative_title_suggestions(
+        self, original_content: str, previous_titles: list[str] | None = None
+    ) -> str:
+        with self._lock:
+            self.in_flight += 1
+            self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        try:
+            if original_content in self.failing:
+                raise RuntimeError("model overloaded")
+            return super().get_alternative_title_suggestions(
+                original_content, previous_titles
+            )
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _originals(n: int) -> list[Original]:
+    return [
+        Original(
+            title=f"Title {i}",
+            summary=f"Summary {i}",
+            link=f"https://example.com/{i}",
+            date=datetime(2026, 1, 1),
+        )
+        for i in range(n)
+    ]
+
+
+def test_at_most_concurrency_articles_are_in_flight() -> None:
+    llm = _CountingLLM(latency=0.02)
+    originals = _originals(12)
+
+    improvements = asyncio.run(Rewriter(llm, concurrency=3).improve_all(originals))
+
+    assert [i.original for i in improvements] == originals
+    assert llm.most_in_flight == 3
+
+
+def test_a_failing_article_is_left_out_without_affecting_the_others() -> None:
+    llm = _CountingLLM(latency=0.01, failing={"Title 2"})
+    originals = _originals(5)
+
+    improvements = asyncio.run(Rewriter(llm, concurrency=2).improve_all(originals))
+
+    assert [i.original.title for i in improvements] == [
+        "Title 0",
+        "Title 1",
+        "Title 3",
+        "Title 4",
+    ]
+
+
+class _CannedGroq(GroqClient):
+    """Answers every batch completion with `answer` and rewrites single
+    articles with the fake client, so nothing reaches Groq."""
+
+    answer: str
+    single: _CountingLLM
+
+    def __init__(self, answer: str) -> None:
+        super().__init__(AiConfig(API_KEY="offline", CACHE_PATH=None))
+        self.answer = answer
+        self.single = _CountingLLM(latency=0)
+
+    @override
+    def _complete(
+        self,
+        messages: list[dict[str, str]],
+        json_mode: bool = False,
+        stage: str = "other",
+    ) -> str:
+        return self.answer
+
+    @override
+    def rewrite(
+        self, original: Original, previous_titles: list[str] | None = None
+    ) -> Improvement:
+        return self.single.rewrite(original, previous_titles)
+
+
+def _batch(*articles: dict[str, object]) -> str:
+    return json.dumps({"articles": list(articles)})
+
+
+def _article(
+    id: object, title: object = "New", summary: object = "Text"
+) -> dict[str, object]:
+    return {"id": id, "title": title, "summary": summary, "suggestions": ["New"]}
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        f"```json\n{_batch(_article(0), _article(1))}\n```",
+        json.dumps([_article(0), _article(1)]),
+        json.dumps([{"title": "New", "summary": "Text"}] * 2),  # no ids
+    ],
+    ids=["fenced", "bare list", "positional"],
+)
+def test_parses_lenient_answers(content: str) -> None:
+    assert set(parse_batch_response(content, 2)) == {0, 1}
+
+
+def test_skips_unknown_duplicate_and_malformed_entries() -> None:
+    content = _batch(
+        _article(0, title=' "Quoted" '),
+        _article(0, title="Duplicate"),
+        _article(7),  # not in the batch
+        _article("x"),
+        _article(1, title=3),
+        _article(2, summary=None),
+        "not an article",
+        {**_article("3"), "suggestions": ["Fine", 4, None]},
+    )
+
+    assert parse_batch_response(content, 5) == {
+        0: ("Quoted", "Text", ["New"]),
+        3: ("New", "Text", ["Fine"]),
+    }
+
+
+@pytest.mark.parametrize(
+    "content",
+    ['{"articles": [{"id": 0, "title": "New", "summ', "{}", '{"articles": 3}', ""],
+    ids=["truncated", "empty object", "wrong type", "empty"],
+)
+def test_unusable_answers_parse_to_nothing(content: str) -> None:
+    assert parse_batch_response(content, 2) == {}
+
+
+def test_batch_rewrites_articles_missing_from_the_answer_one_by_one() -> None:
+    llm = _CannedGroq(_batch(_article(0, title="Batched 0"), _article(2)))
+
+    improvements = llm.rewrite_batch(_originals(3))
+
+    assert [i.title for i in improvements] == ["Batched 0", "Title 1 (1)", "New"]
+    assert improvements[0].suggestions[0] == "Batched 0"
+
+
+def test_unusable_batch_answer_rewrites_every_article_one_by_one() -> None:
+    llm = _CannedGroq('{"articles": [{"id": 0, "tit')
+    originals = _originals(3)
+
+    improvements = llm.rewrite_batch(originals)
+
+    assert [i.original for i in improvements] == originals
+    assert [i.title for i in improvements] == [f"Title {i} (1)" for i in range(3)]
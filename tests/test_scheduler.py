@@ -0,0 +1,156 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from typing import override
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.lease import IRefreshLease
+from prophet.domain.original import Original
+from prophet.infra.feed_fetcher import FeedFetcher
+from prophet.scheduler import FeedScheduler, ScheduledFeed
+
+
+class _StubFetcher(FeedFetcher):
+    """Delivers the same originals on every fetch and counts commits."""
+
+    originals: list[Original]
+    commits: int
+
+    def __init__(self, originals: list[Original]) -> None:
+        super().__init__("stub", state_file=None)
+        self.originals = originals
+        self.commits = 0
+
+    @override
+    async def fetch(
+        self, known_links: Callable[[list[str]], Awaitable[set[str]]] | None = None
+    ) -> list[Original]:
+        known = (
+            await known_links([o.link for o in self.originals])
+            if known_links
+            else set()
+        )
+        return [o for o in self.originals if o.link not in known]
+
+    @override
+    def commit(self) -> None:
+        self.commits += 1
+
+
+class _FlakyLease(IRefreshLease):
+    """Grants every claim, except that the first `failures` claims raise."""
+
+    ttl: float = 90.0
+    failures: int
+    released: list[str]
+
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.released = []
+
+    @override
+    def try_acquire(self) -> bool:
+        return True
+
+    @override
+    def release(self) -> None:
+        pass
+
+    @override
+    def claim(self, ids: list[str]) -> set[str]:
+        if self.failures:
+            self.failures -= 1
+            raise OSError("claims directory unavailable")
+        return set(ids)
+
+    @override
+    def release_claims(self, ids: list[str]) -> None:
+        self.released.extend(ids)
+
+
+def _originals(n: int) -> list[Original]:
+    return [
+        Original(
+            title=f"Title {i}",
+            summary="",
+            link=f"https://example.com/{i}",
+            date=datetime(2026, 1, 1),
+        )
+        for i in range(n)
+    ]
+
+
+async def _store(originals: list[Original]) -> list[Improvement]:
+    return [Improvement(original=o, title=o.title, summary="") for o in originals]
+
+
+def test_originals_of_a_failed_claim_are_fetched_again() -> None:
+    fetcher = _StubFetcher(_originals(3))
+    scheduler = FeedScheduler(
+        [ScheduledFeed(fetcher, interval=60)], _store, lease=_FlakyLease(failures=1)
+    )
+
+    first = asyncio.run(scheduler.run_once())
+    second = asyncio.run(scheduler.run_once())
+
+    assert first == []
+    assert [imp.original for imp in second] == fetcher.originals
+    assert fetcher.commits == 1
+
+
+def test_failing_after_cycle_neither_fails_nor_backs_off_the_feed() -> None:
+    fetcher = _StubFetcher(_originals(2))
+    feed = ScheduledFeed(fetcher, interval=0.01)
+    cycles = 0
+
+    async def after_cycle() -> None:
+        nonlocal cycles
+        cycles += 1
+        raise RuntimeError("snapshot directory full")
+
+    async def poll() -> None:
+        scheduler = FeedScheduler([feed], _store, after_cycle=after_cycle)
+        scheduler.start()
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+
+    asyncio.run(poll())
+
+    assert cycles > 1
+    assert feed.failures == 0
+    assert fetcher.commits == cycles
+
+
+def test_originals_stored_elsewhere_before_the_claim_are_skipped() -> None:
+    originals = _originals(3)
+    stored = {originals[0].link}
+    processed: list[Original] = []
+
+    class RacingLease(_FlakyLease):
+        """Another process stores the second original and releases its
+        claim right before this one claims."""
+
+        @override
+        def claim(self, ids: list[str]) -> set[str]:
+            stored.add(originals[1].link)
+            return super().claim(ids)
+
+    async def known_links(links: list[str]) -> set[str]:
+        return stored & set(links)
+
+    async def store(originals: list[Original]) -> list[Improvement]:
+        processed.extend(originals)
+        return await _store(originals)
+
+    lease = RacingLease()
+    scheduler = FeedScheduler(
+        [ScheduledFeed(_StubFetcher(originals), interval=60)],
+        store,
+        known_links=known_links,
+        lease=lease,
+    )
+
+    _ = asyncio.run(scheduler.run_once())
+
+    assert processed == [originals[2]]
+    assert sorted(lease.released) == sorted([originals[1].id, originals[2].id])
@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+
+from prophet import view
+from prophet.container import get_repo, get_search, get_votes
+from prophet.domain.improvement import Improvement
+from prophet.domain.original import Original
+from prophet.infra.improvement_async_adapter import AsyncImprovementRepoAdapter
+from prophet.infra.improvement_cached_repo import CachedImprovementRepo
+from prophet.infra.improvement_indexed_repo import IndexedImprovementRepo
+from prophet.infra.improvement_memory_repo import ImprovementMemoryRepo
+from prophet.infra.search_index import SearchIndex
+from prophet.infra.vote_sqlite_repo import VoteSqliteRepo
+from prophet.votes import VoteCounter
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _improvement(i: int, minutes: int) -> Improvement:
+    return Improvement(
+        original=Original(
+            title=f"Pollen count {i} soars",
+            summary="",
+            link=f"https://example.com/{i}",
+            date=BASE + timedelta(minutes=minutes),
+        ),
+        title=f"Bees {i} declare victory",
+        summary="",
+    )
+
+
+def test_retain_newest_keeps_ties_like_the_repos() -> None:
+    index = SearchIndex(None)
+    memory = ImprovementMemoryRepo()
+    repo = IndexedImprovementRepo(AsyncImprovementRepoAdapter(memory), index)
+    improvements = [_improvement(0, 0), _improvement(1, 1), _improvement(2, 1)]
+    asyncio.run(repo.add_all(improvements))
+
+    assert asyncio.run(repo.retain_newest(1)) == 1
+
+    assert len(index) == len(memory) == 2
+    assert improvements[0].id not in index
+    assert set(index.search("bees")) == {imp.id for imp in improvements[1:]}
+
+
+def test_search_skips_hits_removed_from_the_repo(tmp_path: Path) -> None:
+    index = SearchIndex(None)
+    memory = ImprovementMemoryRepo()
+    improvements = [_improvement(i, i) for i in range(3)]
+    memory.add_all(improvements)
+    index.add_all(improvements)
+    _ = memory.remove(improvements[1].id)  # by another worker
+    repo = CachedImprovementRepo(AsyncImprovementRepoAdapter(memory))
+
+    app = FastAPI()
+    view.define_routes(app)
+    app.dependency_overrides[get_repo] = lambda: repo
+    app.dependency_overrides[get_search] = lambda: index
+    votes = VoteCounter(VoteSqliteRepo(tmp_path / "votes.sqlite"))
+    app.dependency_overrides[get_votes] = lambda: votes
+
+    async def search() -> httpx.Response:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await c.get("/search", params={"q": "bees"})
+
+    response = asyncio.run(search())
+
+    assert response.status_code == 200
+    assert "Bees 2 declare victory" in response.text
+    assert "Bees 0 declare victory" in response.text
+    assert "Bees 1 declare victory" not in response.text
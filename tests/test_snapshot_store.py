@@ -0,0 +1,33 @@
+from pathlib import Path
+
+from prophet.infra.snapshot_store import SnapshotStore
+
+
+def _publish(store: SnapshotStore, version: str) -> None:
+    _ = store.publish(version, {"index.html": f"<p>{version}</p>".encode()})
+
+
+def test_only_the_current_and_previous_versions_stay_loaded(tmp_path: Path) -> None:
+    store = SnapshotStore(tmp_path)
+    for version in ("v1", "v2", "v3"):
+        _publish(store, version)
+
+    current = store.current()
+    assert current is not None and current.version == "v3"
+    assert store.get("v3") is current
+    assert store.get("v2") is store.get("v2")
+    # older versions are still served, but read from disk every time
+    v1 = store.get("v1")
+    assert v1 is not None and v1 is not store.get("v1")
+    assert v1.read(v1.path / "index.html") == b"<p>v1</p>"
+
+
+def test_follows_versions_published_by_another_worker(tmp_path: Path) -> None:
+    store, other = SnapshotStore(tmp_path), SnapshotStore(tmp_path)
+    _publish(store, "v1")
+
+    _publish(other, "v2")
+
+    current = store.current()
+    assert current is not None and current.version == "v2"
+    assert store.get("v1") is store.get("v1")
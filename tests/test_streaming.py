@@ -0,0 +1,70 @@
+import asyncio
+from collections.abc import Callable, Iterator
+
+import httpx
+import pytest
+
+from prophet.app import app
+from prophet.container import get_llm
+from prophet.infra.llm_fake import FakeLLMClient
+
+type Get = Callable[..., httpx.Response]
+
+
+@pytest.fixture
+def get() -> Iterator[Get]:
+    app.dependency_overrides[get_llm] = FakeLLMClient
+
+    def get(url: str, **params: str) -> httpx.Response:
+        async def request() -> httpx.Response:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                return await client.get(url, params=params)
+
+        return asyncio.run(request())
+
+    try:
+        yield get
+    finally:
+        app.dependency_overrides.clear()
+
+
+def _events(body: str) -> list[tuple[str, str]]:
+    """(event, data) of every server-sent event in `body`."""
+    events: list[tuple[str, str]] = []
+    for message in body.strip().split("\n\n"):
+        lines = message.split("\n")
+        event = lines[0].removeprefix("event: ")
+        data = "\n".join(line.removeprefix("data: ") for line in lines[1:])
+        events.append((event, data))
+    return events
+
+
+def test_title_streams_each_stage_as_it_grows(get: Get) -> None:
+    response = get("/improve-title/stream", content="Man bites dog")
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    stages = [event for event, _ in events]
+    assert stages.index("title") > stages.index("suggestions")
+    assert stages[-1] == "done"
+    # every message carries the stage's text so far
+    suggestions = [data for event, data in events if event == "suggestions"]
+    assert suggestions[0] == "Man"
+    assert suggestions[-1].splitlines() == [f"Man bites dog ({i})" for i in (1, 2, 3)]
+    assert events[-1] == ("done", "Man bites dog (1)")
+
+
+def test_summary_stream_ends_with_the_whole_summary(get: Get) -> None:
+    response = get(
+        "/improve-summary/stream",
+        original_title="Man bites dog",
+        new_title="Dog bitten",
+        original_summary="It happened.",
+    )
+
+    events = _events(response.text)
+    assert {event for event, _ in events} == {"summary", "done"}
+    assert events[-1] == ("done", "Dog bitten: It happened.")
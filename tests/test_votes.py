@@ -0,0 +1,125 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import override
+
+import pytest
+
+from prophet.domain.improvement import Improvement
+from prophet.domain.original import Original
+from prophet.domain.votes import IVoteRepo, VoteKey
+from prophet.votes import VoteCounter
+
+
+class _MemoryVotes(IVoteRepo):
+    """Vote counts in a dict, recording every write; the first `failures`
+    writes raise."""
+
+    counts: dict[VoteKey, int]
+    writes: list[dict[VoteKey, int]]
+    failures: int
+
+    def __init__(self, failures: int = 0) -> None:
+        self.counts = {}
+        self.writes = []
+        self.failures = failures
+
+    @override
+    def add_votes(self, counts: dict[VoteKey, int]) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise OSError("database is locked")
+        self.writes.append(dict(counts))
+        for key, count in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+
+    @override
+    def get_votes(self, ids: list[str]) -> dict[str, dict[int, int]]:
+        votes: dict[str, dict[int, int]] = {}
+        for (id, index), count in self.counts.items():
+            if id in ids:
+                votes.setdefault(id, {})[index] = count
+        return votes
+
+
+ARTICLE = Improvement(
+    original=Original(
+        title="Original",
+        summary="",
+        link="https://example.com/a",
+        date=datetime(2026, 1, 1, tzinfo=timezone.utc),
+    ),
+    title="Chosen",
+    summary="",
+    suggestions=["Chosen", "Runner-up", "Long shot"],
+)
+
+
+def test_a_flush_writes_the_votes_summed_in_one_go() -> None:
+    repo = _MemoryVotes()
+    counter = VoteCounter(repo)
+
+    async def vote_and_flush() -> int:
+        for index in [1, 1, 2, 1]:
+            _ = await counter.vote(ARTICLE, index)
+        return await counter.flush()
+
+    assert asyncio.run(vote_and_flush()) == 4
+    assert repo.writes == [{(ARTICLE.id, 1): 3, (ARTICLE.id, 2): 1}]
+    assert counter.flushes == 1
+
+
+def test_a_failed_flush_keeps_the_votes_for_the_next() -> None:
+    repo = _MemoryVotes(failures=1)
+    counter = VoteCounter(repo)
+
+    async def scenario() -> list[int]:
+        _ = await counter.vote(ARTICLE, 1)
+        with pytest.raises(OSError):
+            _ = await counter.flush()
+        _ = await counter.vote(ARTICLE, 1)
+        assert await counter.flush() == 2
+        return await counter.counts(ARTICLE)
+
+    assert asyncio.run(scenario()) == [0, 2, 0]
+    assert repo.writes == [{(ARTICLE.id, 1): 2}]
+
+
+def test_stop_writes_what_is_still_buffered() -> None:
+    repo = _MemoryVotes()
+    counter = VoteCounter(repo, flush_interval=60)
+
+    async def scenario() -> float:
+        counter.start()
+        _ = await counter.vote(ARTICLE, 2)
+        start = time.perf_counter()
+        await counter.stop()
+        return time.perf_counter() - start
+
+    assert asyncio.run(scenario()) < 5
+    assert repo.counts == {(ARTICLE.id, 2): 1}
+
+
+def test_the_leading_suggestion_becomes_the_title() -> None:
+    repo = _MemoryVotes()
+    promotions: list[str] = []
+
+    async def on_promote() -> None:
+        promotions.append("published")
+
+    counter = VoteCounter(repo, on_promote=on_promote)
+
+    async def scenario() -> list[str]:
+        titles: list[str] = []
+        _ = await counter.vote(ARTICLE, 1)
+        titles.append((await counter.promote([ARTICLE]))[0].title)
+        _ = await counter.flush()
+        # another worker's votes arrive with the next flush
+        repo.add_votes({(ARTICLE.id, 2): 5})
+        _ = await counter.flush()
+        titles.append((await counter.promote([ARTICLE]))[0].title)
+        _ = await counter.flush()
+        return titles
+
+    assert asyncio.run(scenario()) == ["Runner-up", "Long shot"]
+    assert promotions == ["published", "published"]